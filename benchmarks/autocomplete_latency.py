@@ -0,0 +1,62 @@
+"""
+Задержка автодополнения имён транспорта по индексу в памяти воркера
+(TransportNameIndex) на синтетическом парке машин, а также время полной
+загрузки и инкрементального обновления индекса.
+
+    python -m benchmarks.autocomplete_latency
+    VEHICLES=1000000 QUERIES=50000 python -m benchmarks.autocomplete_latency
+"""
+from datetime import datetime
+import os
+import random
+import statistics
+import time
+
+from src.teltonika_http.services.transport_search import TransportNameIndex
+
+
+VEHICLES = int(os.environ.get("VEHICLES", "500000"))
+QUERIES = int(os.environ.get("QUERIES", "20000"))
+
+BRANDS = ["КАМАЗ", "МАЗ", "ГАЗель", "Volvo FH", "Scania R", "MAN TGX", "Урал", "ПАЗ", "Hyundai HD", "Isuzu"]
+
+
+def make_rows(n: int, rnd: random.Random) -> list[tuple[str, str, datetime]]:
+    now = datetime.now()
+    return [
+        (f"{350000000000000 + i}", f"{rnd.choice(BRANDS)} {rnd.randint(1, 999):03} {rnd.randint(10, 99)}", now)
+        for i in range(n)
+    ]
+
+
+def main():
+    rnd = random.Random(42)
+    rows = make_rows(VEHICLES, rnd)
+    rows.sort(key=lambda r: r[1])  # как из БД: ORDER BY name
+
+    index = TransportNameIndex()
+    started = time.perf_counter()
+    index.load(rows)
+    print(f"load {VEHICLES} names: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    prefixes = [name[:rnd.randint(1, len(name))] for _, name, _ in rnd.sample(rows, QUERIES)]
+    latencies = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.search(prefix, 10)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(
+        f"search x{QUERIES}: p50 {statistics.median(latencies):.3f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms, max {latencies[-1]:.3f} ms"
+    )
+
+    for batch in (10, 5000):
+        renamed = [(imei, name + " new", now) for imei, name, now in rnd.sample(rows, batch)]
+        started = time.perf_counter()
+        index.upsert(renamed)
+        print(f"upsert {batch} renamed: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Микро-бенчмарки горячих путей сервисов и слоя данных (pytest-benchmark).
+
+Работают на локальных заменах: SQLite в памяти (aiosqlite) вместо Postgres
+и fakeredis вместо redis-server, поэтому запускаются где угодно и
+сравнимы между коммитами одной машины.
+
+    # сохранить базовую линию (.benchmarks/<machine>/0001_baseline.json)
+    pytest benchmarks --benchmark-save=baseline
+
+    # сравнить текущий код с сохранённой линией, упасть при регрессии > 10%
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import asyncio
+
+import fakeredis
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.teltonika_http.infra.db.db import Base
+from src.teltonika_http.infra.db.models import Transport, Sensor
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+
+
+FLEET_SIZE = 10_000
+
+
+def imei(n: int) -> str:
+    return f"35630704{n:07d}"
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def run(loop):
+    """Синхронная обёртка для benchmark(): run(coro_fn, *args)."""
+    def _run(coro_fn, *args, **kwargs):
+        return loop.run_until_complete(coro_fn(*args, **kwargs))
+    return _run
+
+
+@pytest.fixture(scope="session")
+def db(loop):
+    """async_sessionmaker над SQLite в памяти с FLEET_SIZE записями транспорта."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Transport.__table__, Sensor.__table__])
+            await conn.execute(
+                insert(Transport),
+                [{"imei": imei(n), "name": f"Truck {n}"} for n in range(FLEET_SIZE)],
+            )
+
+    loop.run_until_complete(setup())
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    loop.run_until_complete(engine.dispose())
+
+
+@pytest.fixture(scope="session")
+def redis_client(loop):
+    """RedisClient в бинарном режиме поверх fakeredis."""
+    client = RedisClient(decode_responses=False)
+    client._redis = fakeredis.FakeAsyncRedis(decode_responses=False)
+    client._closed = False
+    yield client
+    loop.run_until_complete(client._redis.aclose())
+
+
+@pytest.fixture
+def online(loop, redis_client):
+    """
+    Помечает долю парка онлайн: online(0.1) создаёт connection:{imei}
+    и запись в индексе для каждого десятого устройства.
+    """
+    async def mark(ratio: float):
+        await redis_client._redis.flushall()
+        step = max(1, round(1 / ratio))
+        pipe = redis_client._redis.pipeline(transaction=False)
+        for n in range(0, FLEET_SIZE, step):
+            pipe.hset(f"connection:{imei(n)}", mapping={
+                "imei": imei(n), "ip": "10.0.0.1", "port": "5027",
+                "server_node": "tcp-1", "last_seen": str(1768212063.0 + n),
+            })
+            pipe.zadd("connections:active", {imei(n): 1768212063.0 + n})
+        await pipe.execute()
+
+    def _online(ratio: float):
+        loop.run_until_complete(mark(ratio))
+
+    return _online
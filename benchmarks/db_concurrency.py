@@ -0,0 +1,84 @@
+"""
+Бенчмарк пропускной способности одного воркера: sync ORM vs async ORM.
+
+Имитирует N одновременных запросов внутри одного event loop (как это
+происходит в uvicorn-воркере) и считает, сколько запросов в секунду
+удаётся обработать:
+
+ - "sync"  — старая схема: create_engine + sessionmaker, вызов прямо из
+             корутины (блокирует event loop на время запроса);
+ - "async" — create_async_engine (asyncpg) + async_sessionmaker.
+
+Запрос — `SELECT pg_sleep(:delay)`, чтобы задержка БД была предсказуемой.
+
+Запуск (нужен доступный Postgres):
+
+    POSTGRES_DSN=postgres:secret@localhost:5432/teltonika_db \
+        python benchmarks/db_concurrency.py --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+
+QUERY = text("SELECT pg_sleep(:delay)")
+
+
+async def run_sync(dsn: str, requests: int, concurrency: int, delay: float) -> float:
+    engine = create_engine(f"postgresql://{dsn}", pool_size=concurrency)
+    session = sessionmaker(engine)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            with session() as s:
+                s.execute(QUERY, {"delay": delay})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return requests / elapsed
+
+
+async def run_async(dsn: str, requests: int, concurrency: int, delay: float) -> float:
+    engine = create_async_engine(f"postgresql+asyncpg://{dsn}", pool_size=concurrency)
+    session = async_sessionmaker(engine)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            async with session() as s:
+                await s.execute(QUERY, {"delay": delay})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return requests / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.005, help="server-side query latency, seconds")
+    args = parser.parse_args()
+
+    dsn = os.environ["POSTGRES_DSN"]
+
+    sync_rps = await run_sync(dsn, args.requests, args.concurrency, args.delay)
+    async_rps = await run_async(dsn, args.requests, args.concurrency, args.delay)
+
+    print(f"requests={args.requests} concurrency={args.concurrency} delay={args.delay * 1000:.1f}ms")
+    print(f"sync  ORM: {sync_rps:10.1f} req/s")
+    print(f"async ORM: {async_rps:10.1f} req/s  (x{async_rps / sync_rps:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+RPS тривиального эндпоинта с прежним стеком middleware (BaseHTTPMiddleware
+через @app.middleware("http")) и с middleware на чистом ASGI.
+
+Оба стека делают одно и то же: обработка ошибок, X-Process-Time,
+X-Request-ID, access-лог. Запросы идут через httpx.ASGITransport,
+без сети, так что в цифрах только накладные расходы фреймворка.
+
+    python -m benchmarks.middleware_rps
+    REQUESTS=20000 CONCURRENCY=64 python -m benchmarks.middleware_rps
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from src.teltonika_http.util.middlewares import (
+    AccessLogMiddleware, ErrorMiddleware, RequestIdMiddleware, TimingMiddleware
+)
+
+
+REQUESTS = int(os.environ.get("REQUESTS", "10000"))
+CONCURRENCY = int(os.environ.get("CONCURRENCY", "32"))
+
+access_logger = logging.getLogger("access")
+
+
+def _endpoint(app: FastAPI) -> FastAPI:
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    return app
+
+
+def legacy_app() -> FastAPI:
+    app = FastAPI()
+
+    async def error_middleware(request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=500, content={"error": "INTERNAL_ERROR"})
+
+    async def timing_middleware(request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        response.headers["x-process-time"] = f"{time.perf_counter() - started:.6f}"
+        return response
+
+    async def access_log_middleware(request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        access_logger.info(
+            "%s %s %s %.1fms", request.method, request.url.path, response.status_code,
+            (time.perf_counter() - started) * 1000,
+        )
+        return response
+
+    async def request_id_middleware(request: Request, call_next):
+        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+        response = await call_next(request)
+        response.headers["x-request-id"] = request_id
+        return response
+
+    for middleware in (error_middleware, timing_middleware, access_log_middleware, request_id_middleware):
+        app.middleware("http")(middleware)
+    return _endpoint(app)
+
+
+def asgi_app() -> FastAPI:
+    app = FastAPI()
+    for middleware in (ErrorMiddleware, TimingMiddleware, AccessLogMiddleware, RequestIdMiddleware):
+        app.add_middleware(middleware)
+    return _endpoint(app)
+
+
+def bare_app() -> FastAPI:
+    return _endpoint(FastAPI())
+
+
+async def measure(app: FastAPI) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # прогрев
+        for _ in range(100):
+            await client.get("/ping")
+
+        remaining = REQUESTS
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get("/ping")
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return REQUESTS / (time.perf_counter() - started)
+
+
+async def main():
+    print(f"requests={REQUESTS} concurrency={CONCURRENCY}")
+    print(f"{'stack':10} {'rps':>8}")
+    for name, factory in (("bare", bare_app), ("legacy", legacy_app), ("asgi", asgi_app)):
+        print(f"{name:10} {await measure(factory()):8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
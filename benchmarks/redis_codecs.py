@@ -0,0 +1,66 @@
+"""
+Микро-бенчмарк кодеков RedisClient: стоимость encode/decode и память Redis.
+
+Полезная нагрузка — типичное соединение (как в хеше connection:{imei}).
+Если задан REDIS_URL, дополнительно сравнивается MEMORY USAGE:
+ - хеш connection:{imei} с плоскими полями (как пишет TCP-сервер);
+ - то же соединение одним значением через каждый кодек.
+
+    python -m benchmarks.redis_codecs
+    REDIS_URL=redis://:pass@localhost:6379/15 python -m benchmarks.redis_codecs
+"""
+import asyncio
+import os
+import timeit
+
+from src.teltonika_http.infra.broker.codecs import CODECS, get_codec
+
+
+CONNECTION = {
+    "imei": "356307042441013",
+    "ip": "185.12.44.201",
+    "port": "50412",
+    "server_node": "tcp-node-3",
+    "last_seen": 1768212063.482911,
+}
+NUMBER = 200_000
+
+
+def bench_codecs() -> list:
+    available = []
+    print(f"{'codec':8} {'encode ns':>10} {'decode ns':>10} {'bytes':>6}")
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print(f"{name:8} not installed")
+            continue
+        available.append(codec)
+        payload = codec.encode(CONNECTION)
+        enc = timeit.timeit(lambda: codec.encode(CONNECTION), number=NUMBER) / NUMBER * 1e9
+        dec = timeit.timeit(lambda: codec.decode(payload), number=NUMBER) / NUMBER * 1e9
+        print(f"{name:8} {enc:10.0f} {dec:10.0f} {len(payload):6}")
+    return available
+
+
+async def bench_memory(url: str, codecs: list) -> None:
+    import redis.asyncio as aioredis
+
+    r = aioredis.from_url(url)
+    try:
+        await r.hset("bench:connection:hash", mapping={k: str(v) for k, v in CONNECTION.items()})
+        print(f"\n{'layout':16} {'MEMORY USAGE':>12}")
+        print(f"{'hash':16} {await r.memory_usage('bench:connection:hash'):12}")
+        for codec in codecs:
+            key = f"bench:connection:{codec.name}"
+            await r.set(key, codec.encode(CONNECTION))
+            print(f"{codec.name:16} {await r.memory_usage(key):12}")
+    finally:
+        await r.delete("bench:connection:hash", *(f"bench:connection:{c.name}" for c in codecs))
+        await r.aclose()
+
+
+if __name__ == "__main__":
+    codecs = bench_codecs()
+    if url := os.environ.get("REDIS_URL"):
+        asyncio.run(bench_memory(url, codecs))
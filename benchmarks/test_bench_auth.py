@@ -0,0 +1,15 @@
+from datetime import timedelta
+
+from src.teltonika_http.services.auth import AuthService
+
+
+def test_create_access_token(benchmark):
+    benchmark(AuthService.create_access_token, {"sub": "user@example.com", "id": 1}, timedelta(minutes=30))
+
+
+def test_decode_token(benchmark):
+    token = AuthService.create_access_token({"sub": "user@example.com", "id": 1})
+
+    decoded = benchmark(AuthService.decode_token, token)
+
+    assert decoded["id"] == 1
@@ -0,0 +1,33 @@
+import pytest
+
+from src.teltonika_http.services.broker import BrokerService
+from src.teltonika_http.services.connection import ConnectionService
+
+
+ONLINE_RATIOS = [0.01, 0.1, 0.5]
+
+
+@pytest.mark.parametrize("ratio", ONLINE_RATIOS)
+def test_get_all_offset(benchmark, run, db, redis_client, online, ratio):
+    online(ratio)
+    service = ConnectionService(db, BrokerService(redis_client))
+
+    benchmark(run, service.get_all, 50, 0)
+
+
+@pytest.mark.parametrize("ratio", ONLINE_RATIOS)
+def test_get_all_cursor(benchmark, run, db, redis_client, online, ratio):
+    online(ratio)
+    service = ConnectionService(db, BrokerService(redis_client))
+
+    benchmark(run, service.get_all_cursor, 50, None)
+
+
+@pytest.mark.parametrize("ratio", ONLINE_RATIOS)
+def test_get_all_indexed(benchmark, run, db, redis_client, online, ratio):
+    online(ratio)
+    service = ConnectionService(db, BrokerService(redis_client))
+
+    page = benchmark(run, service.get_all_indexed, 50, 0)
+
+    assert len(page.data) == 50
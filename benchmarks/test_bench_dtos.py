@@ -0,0 +1,20 @@
+from src.teltonika_http.util.dtos import TransportDto, TransportListDto, ConnectionDto
+
+from .conftest import imei
+
+
+def test_transport_list_serialization(benchmark):
+    page = TransportListDto(
+        data=[TransportDto(imei=imei(n), name=f"Truck {n}") for n in range(100)],
+        total_pages=100,
+        total_elements=10_000,
+        has_hext=True,
+    )
+
+    benchmark(page.model_dump_json)
+
+
+def test_connection_validation(benchmark):
+    raw = {"imei": imei(1), "ip": "10.0.0.1", "port": "5027", "server_node": "tcp-1", "last_seen": "1768212063.5"}
+
+    benchmark(ConnectionDto.model_validate, raw)
@@ -0,0 +1,35 @@
+import pytest
+
+from src.teltonika_http.infra.db.queries.count_provider import CountStrategy
+from src.teltonika_http.infra.db.queries.transport_orm import TransportOrm
+
+from .conftest import FLEET_SIZE, imei
+
+
+def test_get_first(benchmark, run, db):
+    item = benchmark(run, TransportOrm().get_first, db, imei=imei(FLEET_SIZE // 2))
+
+    assert item is not None
+
+
+@pytest.mark.parametrize("count", [CountStrategy.exact, CountStrategy.cached])
+def test_all_paginate(benchmark, run, db, count):
+    page = benchmark(run, TransportOrm().all_paginate, db, 50, 100, count_strategy=count)
+
+    assert len(page.data) == 50
+
+
+@pytest.mark.parametrize("offset", [0, FLEET_SIZE // 2, FLEET_SIZE - 100])
+def test_all_offset(benchmark, run, db, offset):
+    page = benchmark(run, TransportOrm().all_offset, db, 50, offset)
+
+    assert len(page.data) == 50
+
+
+def test_all_keyset(benchmark, run, db):
+    cursor = run(TransportOrm().all_keyset, db, FLEET_SIZE - 100).next_cursor
+
+    page = benchmark(run, TransportOrm().all_keyset, db, 50, cursor)
+
+    assert len(page.data) == 50
+
@@ -0,0 +1,27 @@
+from .conftest import FLEET_SIZE, imei
+
+
+def test_keys_exist(benchmark, run, redis_client, online):
+    online(0.1)
+    keys = [f"connection:{imei(n)}" for n in range(500)]
+
+    result = benchmark(run, redis_client.keys_exist, keys)
+
+    assert sum(result) == 50
+
+
+def test_hgetall(benchmark, run, redis_client, online):
+    online(1)
+
+    result = benchmark(run, redis_client.hgetall, f"connection:{imei(1)}")
+
+    assert result["imei"] == imei(1)
+
+
+def test_hgetall_many(benchmark, run, redis_client, online):
+    online(1)
+    keys = [f"connection:{imei(n)}" for n in range(0, FLEET_SIZE, FLEET_SIZE // 500)]
+
+    result = benchmark(run, redis_client.hgetall_many, keys)
+
+    assert len(result) == len(keys)
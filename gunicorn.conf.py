@@ -0,0 +1,21 @@
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+# Метрики воркеров собираются через каталог PROMETHEUS_MULTIPROC_DIR.
+# Каталог очищается при старте мастера, файлы умершего воркера помечаются,
+# чтобы его livesum-гейджи не попадали в сумму.
+
+
+def on_starting(server):
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,27 +1,67 @@
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueListener, TimedRotatingFileHandler
 import os
 from pathlib import Path
+import queue
+
+from src.teltonika_http.util.log import (
+    JsonFormatter, LazyQueueHandler, RateLimitFilter, SampleFilter, TextFormatter, parse_logger_values
+)
 
 
 logger = logging.getLogger()
 
 
-def setup_logger(base_path: str, log_level: int = logging.INFO):
+_listener: QueueListener | None = None
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logger(
+    base_path: str,
+    log_level: int = logging.INFO,
+    log_format: str = "text",
+    rate_limits: dict[str, float] | None = None,
+    sampling: dict[str, float] | None = None,
+):
+    """
+    Root-логгер пишет в очередь, файл пишет поток QueueListener —
+    event loop не блокируется на дисковом I/O и ротации.
+    """
+    global _listener
+
     file_handler = TimedRotatingFileHandler(
         filename=os.path.join(base_path, 'logs', 'teltonika.log'), 
         when="midnight", 
         backupCount=31, 
         encoding="utf-8",
     )
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(filename)s - %(lineno)s - %(message)s",
-    )
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    _stop_listener()
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
 
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
-    root_logger.handlers = [file_handler, ]
+    root_logger.handlers = [LazyQueueHandler(log_queue), ]
+
+    # Фильтры вешаются на сам логгер: запись отбрасывается до подстановки аргументов
+    for name, rate in (rate_limits or {}).items():
+        logging.getLogger(name).addFilter(RateLimitFilter(rate))
+    for name, ratio in (sampling or {}).items():
+        logging.getLogger(name).addFilter(SampleFilter(ratio))
+
+
+atexit.register(_stop_listener)
+
 
 class Settings():
     BASE_PATH = Path(__file__).parent.parent.parent
@@ -31,12 +71,84 @@ class Settings():
     POSTGRES_USER = os.environ["POSTGRES_USER"]
     POSTGRES_DB = os.environ["POSTGRES_DB"]
     POSTGRES_PASSWORD = os.environ["POSTGRES_PASSWORD"]
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+    COUNT_CACHE_TTL = float(os.environ.get("COUNT_CACHE_TTL", "30"))
+
+    # Кеш активности пользователей (per worker)
+    USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "60"))
+
+    # bcrypt
+    BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", "32"))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", "2"))
+
+    # Массовый импорт транспорта
+    IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "10000"))
+    IMPORT_MAX_CONFLICTS = int(os.environ.get("IMPORT_MAX_CONFLICTS", "1000"))
+
+    # Максимум IMEI в одном запросе POST /transports/lookup
+    LOOKUP_MAX_IMEIS = int(os.environ.get("LOOKUP_MAX_IMEIS", "5000"))
+
+    # Кеш транспорта (per worker)
+    TRANSPORT_CACHE_SIZE = int(os.environ.get("TRANSPORT_CACHE_SIZE", "50000"))
+    TRANSPORT_CACHE_TTL = float(os.environ.get("TRANSPORT_CACHE_TTL", "300"))
+    TRANSPORT_CACHE_NEGATIVE_TTL = float(os.environ.get("TRANSPORT_CACHE_NEGATIVE_TTL", "30"))
+
+    # Автодополнение имён транспорта: индекс в памяти каждого воркера
+    AUTOCOMPLETE_ENABLED = os.environ.get("AUTOCOMPLETE_ENABLED", "true").lower() == "true"
+    AUTOCOMPLETE_REFRESH_INTERVAL = float(os.environ.get("AUTOCOMPLETE_REFRESH_INTERVAL", "5"))
+    # Полная перезагрузка индекса (подхватывает удалённые записи)
+    AUTOCOMPLETE_FULL_RELOAD_INTERVAL = float(os.environ.get("AUTOCOMPLETE_FULL_RELOAD_INTERVAL", "3600"))
+
+    METRICS_SAMPLE_INTERVAL = float(os.environ.get("METRICS_SAMPLE_INTERVAL", "5"))
+
+    # Admission control: "группа=параллельность:очередь:макс_ожидание_с", пусто — выключено
+    ADMISSION_LIMITS = os.environ.get(
+        "ADMISSION_LIMITS", "auth=8:64:2,transports=32:256:1,connections=64:512:0.5"
+    )
+
+    # Rate limit /token и /refresh (token bucket в Redis): ёмкость и пополнение в секунду
+    RATE_LIMIT_USER_CAPACITY = float(os.environ.get("RATE_LIMIT_USER_CAPACITY", "5"))
+    RATE_LIMIT_USER_REFILL = float(os.environ.get("RATE_LIMIT_USER_REFILL", "0.1"))
+    RATE_LIMIT_IP_CAPACITY = float(os.environ.get("RATE_LIMIT_IP_CAPACITY", "30"))
+    RATE_LIMIT_IP_REFILL = float(os.environ.get("RATE_LIMIT_IP_REFILL", "1"))
+    # Сколько секунд (максимум) воркер отказывает исчерпанному ключу без запроса в Redis
+    RATE_LIMIT_LOCAL_BLOCK = float(os.environ.get("RATE_LIMIT_LOCAL_BLOCK", "5"))
+
+    # Хеши соединений: TTL при update_last_seen (0 — без TTL) и фоновый reaper
+    CONNECTION_TTL = int(os.environ.get("CONNECTION_TTL", "0"))
+    REAPER_ENABLED = os.environ.get("REAPER_ENABLED", "false").lower() == "true"
+    # Соединение считается устаревшим, если last_seen старше стольких секунд
+    REAPER_STALE_AFTER = float(os.environ.get("REAPER_STALE_AFTER", "300"))
+    REAPER_INTERVAL = float(os.environ.get("REAPER_INTERVAL", "60"))
+    REAPER_BATCH_SIZE = int(os.environ.get("REAPER_BATCH_SIZE", "500"))
+    REAPER_MAX_PER_SECOND = float(os.environ.get("REAPER_MAX_PER_SECOND", "5000"))
+
+    # Задачи обслуживания Redis (/admin/maintenance): бюджет ops/sec, нижняя граница
+    # при отступлении, размер страницы SCAN и потолок p99 задержки Redis в мс
+    MAINTENANCE_OPS_PER_SECOND = float(os.environ.get("MAINTENANCE_OPS_PER_SECOND", "2000"))
+    MAINTENANCE_MIN_OPS_PER_SECOND = float(os.environ.get("MAINTENANCE_MIN_OPS_PER_SECOND", "100"))
+    MAINTENANCE_PAGE_SIZE = int(os.environ.get("MAINTENANCE_PAGE_SIZE", "500"))
+    MAINTENANCE_P99_CEILING_MS = float(os.environ.get("MAINTENANCE_P99_CEILING_MS", "5"))
+
+    # Поток событий соединений (/connections/stream)
+    STREAM_CLIENT_QUEUE = int(os.environ.get("STREAM_CLIENT_QUEUE", "1000"))
+    STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", "15"))
 
     PORT = 8000
     HOST = "0.0.0.0"
     BACKLOG = 100
     DEBUG = os.environ["DEBUG"]
     LOG_LEVEL = 10 if DEBUG else 20
+    # text | json
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+    # Записей в секунду на логгер: "access=200,AuthService=50"
+    LOG_RATE_LIMITS = os.environ.get("LOG_RATE_LIMITS", "")
+    # Доля записей ниже WARNING: "access=0.1"
+    LOG_SAMPLING = os.environ.get("LOG_SAMPLING", "")
     ALGORITHM = os.environ["ALGORITHM"]
     SECRET_KEY = os.environ["SECRET_KEY"]
     ADMIN_TOKEN = os.environ["ADMIN_TOKEN"]
@@ -45,6 +157,26 @@ class Settings():
     REDIS_PORT = os.environ.get("REDIS_PORT", "6379")
     REDIS_DB = os.environ.get("REDIS_DB", "0")
     REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD', "supersecretpassword")
+    # Без decode_responses ответы Redis не декодируются из UTF-8 целиком
+    REDIS_DECODE_RESPONSES = os.environ.get("REDIS_DECODE_RESPONSES", "false").lower() == "true"
+    # json | orjson | msgpack (msgpack только при REDIS_DECODE_RESPONSES=false)
+    REDIS_CODEC = os.environ.get("REDIS_CODEC", "json")
+    # Свой кодек для префиксов ключей/каналов: "events:=msgpack,cache:=orjson"
+    REDIS_PREFIX_CODECS = os.environ.get("REDIS_PREFIX_CODECS", "")
+    # Redis Cluster: REDIS_HOST/REDIS_PORT — любой узел кластера
+    REDIS_CLUSTER = os.environ.get("REDIS_CLUSTER", "false").lower() == "true"
+    # Чтения (HGETALL/HGET/EXISTS/ZRANGE) — с реплик
+    REDIS_READ_FROM_REPLICAS = os.environ.get("REDIS_READ_FROM_REPLICAS", "false").lower() == "true"
+    # Без кластера: отдельная реплика для чтений, например redis://:pass@redis-replica:6379/0
+    REDIS_REPLICA_URL = os.environ.get("REDIS_REPLICA_URL") or None
+    # Число шардов индекса connections:active. Больше 1 — ключи с hash tag
+    # (connection:{cN}:<imei>, connections:active:{cN}); TCP-сервер должен писать так же
+    REDIS_INDEX_SHARDS = int(os.environ.get("REDIS_INDEX_SHARDS", "1"))
+    # Клиентский кеш чтений с инвалидацией через CLIENT TRACKING (Redis >= 6)
+    REDIS_CLIENT_CACHE = os.environ.get("REDIS_CLIENT_CACHE", "false").lower() == "true"
+    REDIS_CLIENT_CACHE_SIZE = int(os.environ.get("REDIS_CLIENT_CACHE_SIZE", "10000"))
+    REDIS_CLIENT_CACHE_TTL = float(os.environ.get("REDIS_CLIENT_CACHE_TTL", "30"))
+    REDIS_CLIENT_CACHE_PREFIXES = os.environ.get("REDIS_CLIENT_CACHE_PREFIXES", "connection:")
 
     @property
     def redis_url(self):
@@ -55,4 +187,10 @@ settings = Settings()
 
 
 def initial_setup():
-    setup_logger(settings.BASE_PATH, settings.LOG_LEVEL)
+    setup_logger(
+        settings.BASE_PATH,
+        settings.LOG_LEVEL,
+        log_format=settings.LOG_FORMAT,
+        rate_limits=parse_logger_values(settings.LOG_RATE_LIMITS),
+        sampling=parse_logger_values(settings.LOG_SAMPLING),
+    )
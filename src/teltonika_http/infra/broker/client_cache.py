@@ -0,0 +1,168 @@
+"""
+Клиентский кеш RedisClient на основе server-assisted tracking.
+
+Одно выделенное соединение подписано на __redis__:invalidate, второе
+включает CLIENT TRACKING ON REDIRECT <id> BCAST PREFIX ... — сервер
+присылает имена изменённых ключей с нужными префиксами, кто бы их ни
+менял. Локальное хранилище — TTLCache (ограничен по размеру, TTL —
+страховка на случай потерянного сообщения). При разрыве любого из
+выделенных соединений кеш очищается и выключается до переподключения.
+"""
+import asyncio
+import logging
+from typing import Any, Hashable
+
+import redis.asyncio as aioredis
+
+from src.teltonika_http.util.cache import MISSING, TTLCache
+
+
+logger = logging.getLogger("ClientSideCache")
+
+INVALIDATE_CHANNEL = b"__redis__:invalidate"
+
+
+class ClientSideCache:
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: float = 30.0,
+        prefixes: tuple[str, ...] = ("connection:",),
+        health_interval: float = 5.0,
+        reconnect_backoff: float = 1.0,
+    ):
+        self.prefixes = tuple(prefixes)
+        self._store = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Ключ -> маркер незавершённого чтения. Инвалидация удаляет маркер,
+        # и результат чтения, начатого до неё, в кеш не попадает
+        self._inflight: dict[Hashable, object] = {}
+        self._health_interval = health_interval
+        self._reconnect_backoff = reconnect_backoff
+        self._connection_kwargs: dict | None = None
+        self._task: asyncio.Task | None = None
+        self.active = False
+        self.invalidations = 0
+        self.flushes = 0
+
+    def covers(self, key: str) -> bool:
+        return self.active and key.startswith(self.prefixes)
+
+    # ---- чтение/запись ----
+    def get(self, key: str, op: Hashable) -> Any:
+        entry = self._store.get(key)
+        if entry is MISSING:
+            return MISSING
+        return entry.get(op, MISSING)
+
+    def begin(self, key: str) -> object:
+        """Отметить начало чтения key из Redis; вернуть маркер для store()."""
+        token = self._inflight.get(key)
+        if token is None:
+            token = self._inflight[key] = object()
+        return token
+
+    def store(self, key: str, op: Hashable, value: Any, token: object) -> None:
+        if not self.active or self._inflight.get(key) is not token:
+            return
+        # Заполнение после промаха — не обращение читателя: без учёта в hits/misses
+        entry = self._store.peek(key)
+        if entry is MISSING:
+            entry = {}
+            self._store.set(key, entry)
+        entry[op] = value
+
+    def end(self, key: str, token: object) -> None:
+        if self._inflight.get(key) is token:
+            del self._inflight[key]
+
+    def invalidate(self, keys: list | None) -> None:
+        """None — сервер просит сбросить всё (FLUSHALL, переполнение таблицы tracking)."""
+        if keys is None:
+            self.flush()
+            return
+        for key in keys:
+            if isinstance(key, bytes):
+                key = key.decode("utf-8", "replace")
+            self._store.invalidate(key)
+            self._inflight.pop(key, None)
+            self.invalidations += 1
+
+    def flush(self) -> None:
+        self._store.clear()
+        self._inflight.clear()
+        self.flushes += 1
+
+    def stats(self) -> dict:
+        return {
+            **self._store.stats(),
+            "active": self.active,
+            "invalidations": self.invalidations,
+            "flushes": self.flushes,
+        }
+
+    # ---- соединения tracking ----
+    async def start(self, connection_kwargs: dict) -> None:
+        self._connection_kwargs = connection_kwargs
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        self.active = False
+        self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            listener = aioredis.Connection(**self._connection_kwargs)
+            tracker = aioredis.Connection(**self._connection_kwargs)
+            try:
+                await listener.connect()
+                await listener.send_command("CLIENT", "ID")
+                listener_id = await listener.read_response()
+                await listener.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+                await listener.read_response()
+
+                await tracker.connect()
+                prefix_args = [arg for prefix in self.prefixes for arg in ("PREFIX", prefix)]
+                await tracker.send_command("CLIENT", "TRACKING", "ON", "REDIRECT", listener_id, "BCAST", *prefix_args)
+                await tracker.read_response()
+
+                self.flush()
+                self.active = True
+                logger.info("Client-side cache enabled for prefixes %s", self.prefixes)
+                await self._listen(listener, tracker)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Client-side cache tracking lost, cache disabled: %s", e)
+            finally:
+                # Без tracking нельзя доверять ни одной записи
+                self.active = False
+                self.flush()
+                for conn in (listener, tracker):
+                    try:
+                        await conn.disconnect()
+                    except Exception:
+                        pass
+            await asyncio.sleep(self._reconnect_backoff)
+
+    async def _listen(self, listener, tracker) -> None:
+        while True:
+            try:
+                message = await listener.read_response(timeout=self._health_interval)
+            except TimeoutError:
+                message = None
+            if message is None:
+                # Тишина: проверить, что соединение tracking живо
+                await tracker.send_command("PING")
+                await tracker.read_response()
+                continue
+            kind, channel, data = message[0], message[1], message[2]
+            if kind in (b"message", "message") and channel in (INVALIDATE_CHANNEL, INVALIDATE_CHANNEL.decode()):
+                self.invalidate(data)
@@ -0,0 +1,92 @@
+import json
+from typing import Any, Protocol
+
+
+class Codec(Protocol):
+    """Сериализация значений RedisClient."""
+    name: str
+    # True, если результат encode — валидный UTF-8 (можно работать с decode_responses=True)
+    text_safe: bool
+
+    def encode(self, obj: Any) -> bytes:
+        ...
+
+    def decode(self, data: bytes | str) -> Any:
+        ...
+
+
+class JsonCodec:
+    name = "json"
+    text_safe = True
+
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    def decode(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    name = "orjson"
+    text_safe = True
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError as e:
+            raise ImportError("orjson codec requires the 'orjson' package") from e
+        self._orjson = orjson
+
+    def encode(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj)
+
+    def decode(self, data: bytes | str) -> Any:
+        return self._orjson.loads(data)
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    text_safe = False
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError as e:
+            raise ImportError("msgpack codec requires the 'msgpack' package") from e
+        self._msgpack = msgpack
+
+    def encode(self, obj: Any) -> bytes:
+        return self._msgpack.packb(obj, use_bin_type=True)
+
+    def decode(self, data: bytes | str) -> Any:
+        if isinstance(data, str):
+            raise ValueError("msgpack payload must be bytes, use decode_responses=False")
+        return self._msgpack.unpackb(data, raw=False)
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+
+
+def get_codec(codec: "Codec | str") -> Codec:
+    """Экземпляр кодека по имени ("json", "orjson", "msgpack") или сам кодек."""
+    if not isinstance(codec, str):
+        return codec
+    try:
+        return CODECS[codec]()
+    except KeyError:
+        raise ValueError(f"Unknown redis codec: {codec!r}, expected one of {sorted(CODECS)}")
+
+
+def parse_prefix_codecs(spec: str) -> dict[str, str]:
+    """'events:=msgpack,cache:=orjson' -> {'events:': 'msgpack', 'cache:': 'orjson'}"""
+    result = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, _, name = item.rpartition("=")
+        if not prefix or not name:
+            raise ValueError(f"Malformed prefix codec spec: {item!r}")
+        result[prefix] = name
+    return result
@@ -1,11 +1,22 @@
 import asyncio
+from collections import defaultdict
 from dataclasses import dataclass
-import json
 from typing import Any, Callable, Optional, Iterable, Union, List
 import logging
+import uuid
 
 import redis.asyncio as aioredis
-from redis.exceptions import ConnectionError as RedisConnectionError, RedisError
+from redis.cluster import LoadBalancingStrategy
+from redis.crc import key_slot
+from redis.exceptions import ConnectionError as RedisConnectionError, NoScriptError, RedisError
+
+from src.teltonika_http.util.cache import MISSING
+from .client_cache import ClientSideCache
+from .codecs import Codec, get_codec
+from .scripts import (
+    EXISTS_MANY, EXTEND_LOCK, HSET_IF_FIELD_IN, REAP_INDEXED, RELEASE_LOCK, REPLACE_IF_EQUAL, SCRIPTS, TOUCH_INDEXED_HASH,
+    UNLINK_BY_TYPE, VERSION_COUNTER, LuaScript,
+)
 
 
 logger = logging.getLogger("RedisClient")
@@ -26,10 +37,18 @@ class RedisClient:
 
     Поддерживает:
      - подключение через connection pool
-     - автоматическую сериализацию (JSON)
+     - сериализацию через подключаемый кодек (json/orjson/msgpack),
+       в том числе свой кодек для отдельных префиксов ключей/каналов
+     - работу без decode_responses: ответы не декодируются из UTF-8,
+       хеши декодируются только при чтении
      - базовые операции: get/set/delete, hget/hset, lpush/rpop
      - publish и простой subscribe с обработчиком
      - контекстный менеджер async with
+     - Redis Cluster: батчи keys_exist/delete_hashes_by_pattern группируются
+       по слотам и узлам; чтения (HGETALL/HGET/EXISTS/ZRANGE) можно отправлять
+       на реплики (read_from_replicas в кластере или replica_url без кластера)
+     - опциональный клиентский кеш hgetall/hget/keys_exist с инвалидацией
+       через CLIENT TRACKING (только один узел без чтения с реплик)
     """
     def __init__(
         self,
@@ -38,36 +57,130 @@ class RedisClient:
         max_connections: int = 10,
         reconnect_attempts: int = 5,
         reconnect_backoff: float = 0.5,  # базовый backoff в секундах
+        codec: Codec | str = "json",
+        prefix_codecs: dict[str, Codec | str] | None = None,
+        cluster: bool = False,
+        read_from_replicas: bool = False,
+        replica_url: str | None = None,
+        client_cache: ClientSideCache | None = None,
     ):
         self._url = url
+        self._cluster = cluster
+        self._read_from_replicas = read_from_replicas
+        self._replica_url = replica_url
+        if client_cache is not None and (cluster or replica_url):
+            logger.warning("Client-side cache is not supported with cluster or replica reads, disabled")
+            client_cache = None
+        self._client_cache = client_cache
         self._decode = decode_responses
         self._max_connections = max_connections
         self._pool: Optional[aioredis.ConnectionPool] = None
-        self._redis: Optional[aioredis.Redis] = None
+        self._redis: Optional[aioredis.Redis | aioredis.RedisCluster] = None
+        # Клиент для чтений: реплика или тот же self._redis
+        self._reader: Optional[aioredis.Redis | aioredis.RedisCluster] = None
+        self._replica_pool: Optional[aioredis.ConnectionPool] = None
         self._reconnect_attempts = reconnect_attempts
         self._reconnect_backoff = reconnect_backoff
         self._pubsub_tasks = set()
+        # В кластере: обычный клиент к одному узлу для SUBSCRIBE
+        self._subscriber: Optional[aioredis.Redis] = None
         self._closed = True
-        self._dumps = json.dumps
-        self._loads = json.loads
+        self._codec = get_codec(codec)
+        # Длинные префиксы проверяются первыми
+        self._prefix_codecs = sorted(
+            ((prefix, get_codec(c)) for prefix, c in (prefix_codecs or {}).items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        if decode_responses:
+            for c in [self._codec, *(c for _, c in self._prefix_codecs)]:
+                if not c.text_safe:
+                    raise ValueError(f"{c.name} codec requires decode_responses=False")
 
     async def connect(self) -> None:
         """Создать pool и клиент. Можно вызывать несколько раз — будет безопасно."""
         if self._redis and not self._closed:
             return
+        self._create_clients()
+        # пробный запрос для проверки подключения
+        await self._ensure_connected()
+        self._closed = False
+        await self.load_scripts()
+        if self._client_cache is not None:
+            await self._client_cache.start(self._pool.connection_kwargs)
+
+    def _create_clients(self) -> None:
+        if self._cluster:
+            self._pool = None
+            self._redis = aioredis.RedisCluster.from_url(
+                self._url,
+                max_connections=self._max_connections,
+                decode_responses=self._decode,
+                load_balancing_strategy=(
+                    LoadBalancingStrategy.ROUND_ROBIN_REPLICAS if self._read_from_replicas else None
+                ),
+            )
+            # Чтения на реплики маршрутизирует сам RedisCluster
+            self._reader = self._redis
+            return
+
         self._pool = aioredis.ConnectionPool.from_url(
             self._url,
             max_connections=self._max_connections,
             decode_responses=self._decode,
         )
         self._redis = aioredis.Redis(connection_pool=self._pool, decode_responses=self._decode)
-        # пробный запрос для проверки подключения
-        await self._ensure_connected()
-        self._closed = False
+        if self._replica_url:
+            self._replica_pool = aioredis.ConnectionPool.from_url(
+                self._replica_url,
+                max_connections=self._max_connections,
+                decode_responses=self._decode,
+            )
+            self._reader = aioredis.Redis(connection_pool=self._replica_pool, decode_responses=self._decode)
+        else:
+            self._reader = self._redis
+
+    @property
+    def _read_client(self) -> aioredis.Redis | aioredis.RedisCluster:
+        return self._reader if self._reader is not None else self._redis
+
+    @property
+    def client_cache(self) -> ClientSideCache | None:
+        return self._client_cache
+
+    @property
+    def cluster(self) -> bool:
+        return self._cluster
+
+    async def _cached(self, key: str, op: Any, fetch: Callable) -> Any:
+        """Ответ из клиентского кеша или fetch() с сохранением результата."""
+        cache = self._client_cache
+        if cache is None or not cache.covers(key):
+            return await fetch()
+        value = cache.get(key, op)
+        if value is not MISSING:
+            return value
+        token = cache.begin(key)
+        try:
+            value = await fetch()
+            cache.store(key, op, value, token)
+        finally:
+            cache.end(key, token)
+        return value
 
     async def startup(self):
         await self.connect()
 
+    def pool_stats(self) -> dict:
+        """Занятые и свободные соединения пула (для метрик)."""
+        if self._pool is None:
+            return {"in_use": 0, "available": 0, "max": self._max_connections}
+        return {
+            "in_use": len(self._pool._in_use_connections),
+            "available": len(self._pool._available_connections),
+            "max": self._max_connections,
+        }
+
     async def ping(self) -> bool:
         return await self._redis.ping()
 
@@ -79,18 +192,34 @@ class RedisClient:
         # отменяем задачи pubsub
         for t in list(self._pubsub_tasks):
             t.cancel()
-        if self._redis:
+        if self._client_cache is not None:
+            await self._client_cache.stop()
+        if self._reader is not None and self._reader is not self._redis:
             try:
-                await self._redis.close()
+                await self._reader.close()
             except Exception:
                 pass
-            self._redis = None
-        if self._pool:
+        self._reader = None
+        if self._subscriber is not None:
             try:
-                await self._pool.disconnect()
+                await self._subscriber.close()
             except Exception:
                 pass
-            self._pool = None
+            self._subscriber = None
+        if self._redis:
+            try:
+                await self._redis.close()
+            except Exception:
+                pass
+            self._redis = None
+        for pool in (self._pool, self._replica_pool):
+            if pool:
+                try:
+                    await pool.disconnect()
+                except Exception:
+                    pass
+        self._pool = None
+        self._replica_pool = None
         self._closed = True
 
     async def __aenter__(self):
@@ -119,26 +248,41 @@ class RedisClient:
                 try:
                     if self._pool:
                         await self._pool.disconnect()
+                    if self._replica_pool:
+                        await self._replica_pool.disconnect()
+                    if self._cluster and self._redis is not None:
+                        await self._redis.close()
                 except Exception:
                     pass
-                self._pool = aioredis.ConnectionPool.from_url(
-                    self._url,
-                    max_connections=self._max_connections,
-                    decode_responses=self._decode,
-                )
-                self._redis = aioredis.Redis(connection_pool=self._pool, decode_responses=self._decode)
+                self._create_clients()
         raise last_exc or RedisConnectionError("failed to connect to redis")
 
-    def _to_bytes(self, obj: Any) -> bytes:
-        # ensure bytes for redis (if using decode_responses=False)
-        return self._dumps(obj).encode('utf-8')
+    def _codec_for(self, key: str | bytes | None) -> Codec:
+        if key is not None and self._prefix_codecs:
+            if isinstance(key, bytes):
+                key = key.decode("utf-8", "replace")
+            for prefix, codec in self._prefix_codecs:
+                if key.startswith(prefix):
+                    return codec
+        return self._codec
+
+    def _to_bytes(self, obj: Any, key: str | None = None) -> bytes:
+        return self._codec_for(key).encode(obj)
     
-    def _from_bytes(self, b: bytes) -> Any:
+    def _from_bytes(self, b: bytes | str, key: str | None = None) -> Any:
         if b is None:
             return None
-        if isinstance(b, bytes):
-            return self._loads(b.decode('utf-8'))
-        return self._loads(b)
+        return self._codec_for(key).decode(b)
+
+    @staticmethod
+    def _to_str(value: bytes | str) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def _decode_hash(self, raw: dict) -> dict:
+        """Поля хеша — плоские строковые значения, как в режиме decode_responses=True."""
+        if self._decode:
+            return raw
+        return {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
 
     # ---- basic commands ----
     async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
@@ -152,7 +296,7 @@ class RedisClient:
                 # если decode_responses=True, redis принимает/возвращает строки
                 payload = value
             else:
-                payload = self._to_bytes(value)
+                payload = self._to_bytes(value, key)
             return await self._redis.set(key, payload, ex=ex)
         except (RedisConnectionError, OSError) as e:
             # попытка переподключиться и повторить один раз
@@ -173,18 +317,29 @@ class RedisClient:
 
         if raw is None:
             return None
-        if self._decode:
-            # decode_responses=True -> raw is str
-            try:
-                return self._loads(raw)
-            except Exception:
-                return raw  # не JSON
-        else:
-            # raw bytes
-            try:
-                return self._from_bytes(raw)
-            except Exception:
-                return raw
+        try:
+            return self._from_bytes(raw, key)
+        except Exception:
+            return raw  # значение записано не этим кодеком
+
+    async def get_int(self, key: str) -> int | None:
+        """Числовое значение (счётчик INCR) без участия кодека."""
+        await self.connect()
+        raw = await self._redis.get(key)
+        return int(raw) if raw is not None else None
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        await self.connect()
+        return await self._redis.incr(key, amount)
+
+    async def version_counter(self, name: str, amount: int = 0) -> tuple[str, int]:
+        """
+        (epoch, счётчик) из хеша name, счётчик увеличивается на amount.
+        epoch — случайный, создаётся вместе с хешем: счётчик, потерянный
+        вместе с данными Redis, не выдаст прежних значений.
+        """
+        epoch, counter = await self.run_script(VERSION_COUNTER, keys=[name], args=[uuid.uuid4().hex[:8], amount])
+        return self._to_str(epoch), int(counter)
 
     async def delete(self, *keys: str) -> int:
         await self.connect()
@@ -193,72 +348,354 @@ class RedisClient:
     # ---- hash operations ----
     async def hset(self, name: str, mapping: dict, ttl: int | None = None) -> int:
         await self.connect()
-        res = await self._redis.hset(name, mapping=mapping)
-        if ttl is not None:
-            await self._redis.expire(name, ttl)
+        if ttl is None:
+            return await self._redis.hset(name, mapping=mapping)
+        # HSET и EXPIRE одной транзакцией: хеш не останется без TTL
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hset(name, mapping=mapping)
+        pipe.expire(name, ttl)
+        res, _ = await pipe.execute()
         return res
 
+    async def hset_if(self, name: str, field: str, expected: Iterable[str], mapping: dict) -> bool:
+        """HSET mapping, только если значение field — одно из expected (атомарно)."""
+        expected = list(expected)
+        args = [field, len(expected), *expected, *(item for pair in mapping.items() for item in pair)]
+        return bool(await self.run_script(HSET_IF_FIELD_IN, keys=[name], args=args))
+
     async def hset_kv(self, name: str, key: str, value: Any) -> int:
         await self.connect()
-        payload = self._to_bytes(value)
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+            # Скаляры пишутся как есть: их читают и сторонние клиенты (TCP-сервер)
+            payload = value
+        else:
+            payload = self._to_bytes(value, name)
         return await self._redis.hset(name, key, payload)
 
     async def hgetall(self, name: str) -> dict:
         await self.connect()
-        raw = await self._redis.hgetall(name)
-        # If None return raw. If response decoded, return raw as well
-        if raw is None:
-            return None
-        if self._decode:
-            return raw
-        else:
-            # TODO: decode dict
-            raise NotImplementedError
+
+        async def fetch():
+            raw = await self._read_client.hgetall(name)
+            if raw is None:
+                return None
+            return self._decode_hash(raw)
+
+        result = await self._cached(name, "hgetall", fetch)
+        # Копия: вызывающий код не должен менять закешированный dict
+        return dict(result) if result is not None else None
+
+    async def hgetall_many(self, names: list[str]) -> list[dict]:
+        """HGETALL для многих ключей одним pipeline. Отсутствующий ключ -> пустой dict."""
+        if not names:
+            return []
+        await self.connect()
+        # В кластере pipeline разбивается по узлам: один round trip на узел
+        pipe = self._read_client.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(name)
+        result = await pipe.execute()
+        return [self._decode_hash(raw) for raw in result]
 
     async def hget(self, name: str, key: str) -> Any:
         await self.connect()
-        raw = await self._redis.hget(name, key)
-        if raw is None:
-            return None
-        return self._from_bytes(raw)
+
+        async def fetch():
+            raw = await self._read_client.hget(name, key)
+            if raw is None:
+                return None
+            # Поля хеша — плоские строки, как и в hgetall
+            return self._to_str(raw)
+
+        return await self._cached(name, ("hget", key), fetch)
 
     # ---- list operations ----
     async def lpush(self, name: str, *values: Any) -> int:
         await self.connect()
-        payloads = [self._to_bytes(v) for v in values]
+        payloads = [self._to_bytes(v, name) for v in values]
         return await self._redis.lpush(name, *payloads)
 
     async def keys_exist(self, keys: list[str]) -> list[bool]:
         if not keys:
-            return
-        
-        pipe = self._redis.pipeline(transaction=False)
-        for key in keys:
-            pipe.exists(key)
-        result = await pipe.execute()
-        logger.debug(f"requested if exists. Redis says: {result}")
-        return [bool(x) for x in result]
+            return []
+        cache = self._client_cache
+        if cache is None or not cache.active:
+            return await self._keys_exist_remote(keys)
+
+        # Из Redis — только ключи, которых нет в кеше
+        result = [cache.get(key, "exists") if cache.covers(key) else MISSING for key in keys]
+        missing = [i for i, value in enumerate(result) if value is MISSING]
+        if missing:
+            missing_keys = [keys[i] for i in missing]
+            tokens = [cache.begin(key) for key in missing_keys]
+            try:
+                fetched = await self._keys_exist_remote(missing_keys)
+                for i, key, token, exists in zip(missing, missing_keys, tokens, fetched):
+                    result[i] = exists
+                    if cache.covers(key):
+                        cache.store(key, "exists", exists, token)
+            finally:
+                for key, token in zip(missing_keys, tokens):
+                    cache.end(key, token)
+        return result
+
+    async def _keys_exist_remote(self, keys: list[str]) -> list[bool]:
+        if self._cluster or self._read_client is not self._redis:
+            # Ключи в разных слотах/на реплике: EXISTS в pipeline,
+            # в кластере — один round trip на узел
+            pipe = self._read_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.exists(key)
+            result = [bool(x) for x in await pipe.execute()]
+        else:
+            bitmap = await self.run_script(EXISTS_MANY, keys=keys)
+            if isinstance(bitmap, bytes):
+                bitmap = bitmap.decode()
+            result = [bit == "1" for bit in bitmap]
+        logger.debug("requested if exists: %s of %s keys", sum(result), len(keys))
+        return result
+
+    # ---- sorted set operations ----
+    async def zadd(self, name: str, mapping: dict[str, float]) -> int:
+        await self.connect()
+        return await self._redis.zadd(name, mapping)
+
+    async def zrem(self, name: str, *members: str) -> int:
+        await self.connect()
+        return await self._redis.zrem(name, *members)
+
+    async def zrevrangebyscore(
+        self,
+        name: str,
+        max_score: float | str = "+inf",
+        min_score: float | str = "-inf",
+        offset: int = 0,
+        count: int | None = None,
+        withscores: bool = False,
+    ) -> list[str] | list[tuple[str, float]]:
+        """
+        Участники с min_score <= score <= max_score, от большего score к меньшему.
+        С withscores — пары (участник, score).
+        """
+        await self.connect()
+        if count is None:
+            members = await self._read_client.zrevrangebyscore(name, max_score, min_score, withscores=withscores)
+        else:
+            members = await self._read_client.zrevrangebyscore(
+                name, max_score, min_score, start=offset, num=count, withscores=withscores
+            )
+        if withscores:
+            return [(self._to_str(m), float(score)) for m, score in members]
+        return [self._to_str(m) for m in members]
+
+    async def zrangebyscore(
+        self,
+        name: str,
+        min_score: float | str = "-inf",
+        max_score: float | str = "+inf",
+        offset: int = 0,
+        count: int | None = None,
+    ) -> list[str]:
+        """Участники с min_score <= score <= max_score, от меньшего score к большему."""
+        await self.connect()
+        if count is None:
+            members = await self._redis.zrangebyscore(name, min_score, max_score)
+        else:
+            members = await self._redis.zrangebyscore(name, min_score, max_score, start=offset, num=count)
+        return [self._to_str(m) for m in members]
+
+    async def zcount(
+        self, name: str, min_score: float | str = "-inf", max_score: float | str = "+inf"
+    ) -> int:
+        await self.connect()
+        return await self._read_client.zcount(name, min_score, max_score)
 
     async def rpop(self, name: str) -> Any:
         await self.connect()
         raw = await self._redis.rpop(name)
         if raw is None:
             return None
-        return self._from_bytes(raw)
+        return self._from_bytes(raw, name)
+
+    # ---- scripting ----
+    async def load_scripts(self) -> None:
+        """SCRIPT LOAD всех зарегистрированных скриптов одним pipeline."""
+        if not SCRIPTS:
+            return
+        if self._cluster:
+            # RedisCluster отправляет SCRIPT LOAD на все primary-узлы
+            for script in SCRIPTS.values():
+                await self._redis.script_load(script.source)
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        for script in SCRIPTS.values():
+            pipe.script_load(script.source)
+        await pipe.execute()
+
+    async def run_script(self, script: LuaScript, keys: list[str], args: list | tuple = ()) -> Any:
+        """EVALSHA; на NOSCRIPT загрузить скрипт и повторить один раз."""
+        await self.connect()
+        try:
+            return await self._redis.evalsha(script.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            logger.info("Script %s missing on server, reloading", script.name)
+            await self._redis.script_load(script.source)
+            return await self._redis.evalsha(script.sha, len(keys), *keys, *args)
+
+    async def run_script_by_slot(
+        self, script: LuaScript, keys: list[str], args: list | tuple = ()
+    ) -> list:
+        """
+        Для кластера: ключи группируются по слотам, скрипт вызывается
+        отдельно для каждой группы, вызовы идут параллельно (pipeline
+        RedisCluster не пропускает EVALSHA), не больше max_connections
+        одновременно — пул узла не исчерпывается. Результаты — по группам.
+        """
+        await self.connect()
+        groups: dict[int, list] = defaultdict(list)
+        for key in keys:
+            groups[key_slot(key.encode() if isinstance(key, str) else key)].append(key)
+        limit = asyncio.Semaphore(self._max_connections)
+
+        async def call(group: list):
+            async with limit:
+                return await self._redis.evalsha(script.sha, len(group), *group, *args)
+
+        async def execute():
+            return await asyncio.gather(*(call(group) for group in groups.values()))
+
+        try:
+            return await execute()
+        except NoScriptError:
+            logger.info("Script %s missing on cluster node, reloading", script.name)
+            await self.load_scripts()
+            return await execute()
+
+    async def touch_indexed_hash(
+        self,
+        name: str,
+        field: str,
+        value: float,
+        index: str,
+        member: str,
+        channel: str | None = None,
+        message: Any = None,
+        ttl: int | None = None,
+    ) -> None:
+        """
+        Записать поле хеша, обновить score члена в sorted set индекса
+        (score = value), при ttl — продлить TTL хеша и, если задан канал,
+        опубликовать сообщение — атомарно, одним вызовом.
+        """
+        if self._cluster and key_slot(name.encode()) != key_slot(index.encode()):
+            # Ключи без общего hash tag: скрипт невозможен, пишем pipeline по узлам
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.hset(name, field, value)
+            if ttl:
+                pipe.expire(name, ttl)
+            pipe.zadd(index, {member: value})
+            await pipe.execute()
+            if channel is not None:
+                await self._publish(channel, self._to_bytes(message, channel))
+            return
+
+        args = [field, value, member, ttl or 0]
+        if channel is not None:
+            args += [channel, self._to_bytes(message, channel)]
+        await self.run_script(TOUCH_INDEXED_HASH, keys=[name, index], args=args)
+
+    async def reap_indexed(
+        self, index: str, keys: list[str], members: list[str], max_score: float
+    ) -> list[tuple[str, float]]:
+        """
+        Удалить хеши keys и их members из индекса, если score члена всё ещё
+        <= max_score. Возвращает удалённых членов с их score.
+        """
+        if not members:
+            return []
+        if self._cluster and any(key_slot(k.encode()) != key_slot(index.encode()) for k in keys):
+            # Без общего hash tag атомарность невозможна: проверка score и
+            # удаление раздельно, соединение может успеть обновиться между ними
+            pipe = self._redis.pipeline(transaction=False)
+            for member in members:
+                pipe.zscore(index, member)
+            scores = await pipe.execute()
+            stale = [(k, m, s) for k, m, s in zip(keys, members, scores) if s is not None and s <= max_score]
+            if not stale:
+                return []
+            pipe = self._redis.pipeline(transaction=False)
+            for key, _, _ in stale:
+                pipe.unlink(key)
+            pipe.zrem(index, *(m for _, m, _ in stale))
+            await pipe.execute()
+            return [(m, s) for _, m, s in stale]
+
+        reaped = await self.run_script(REAP_INDEXED, keys=[index, *keys], args=[max_score, *members])
+        return [(self._to_str(m), float(s)) for m, s in zip(reaped[::2], reaped[1::2])]
+
+    # ---- locks ----
+    async def acquire_lock(self, name: str, ttl: float) -> str | None:
+        """SET NX PX: токен владельца или None, если блокировка занята."""
+        await self.connect()
+        token = uuid.uuid4().hex
+        if await self._redis.set(name, token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    async def release_lock(self, name: str, token: str) -> bool:
+        return bool(await self.run_script(RELEASE_LOCK, keys=[name], args=[token]))
+
+    async def extend_lock(self, name: str, token: str, ttl: float) -> bool:
+        """Продлить блокировку до ttl секунд; False — блокировка уже не наша."""
+        return bool(await self.run_script(EXTEND_LOCK, keys=[name], args=[token, int(ttl * 1000)]))
 
     # ---- pub/sub ----
     async def publish(self, channel: str, message: Any) -> int:
         await self.connect()
-        payload = self._to_bytes(message)
+        payload = self._to_bytes(message, channel)
+        return await self._publish(channel, payload)
+
+    async def publish_many(self, channel: str, messages: list[Any]) -> None:
+        """Несколько сообщений в канал одним pipeline."""
+        if not messages:
+            return
+        await self.connect()
+        pipe = self._redis.pipeline(transaction=False)
+        for message in messages:
+            # execute_command: у pipeline RedisCluster тоже нет publish()
+            pipe.execute_command("PUBLISH", channel, self._to_bytes(message, channel))
+        await pipe.execute()
+
+    async def _publish(self, channel: str, payload: bytes) -> int:
+        if self._cluster:
+            # У RedisCluster (redis.asyncio) нет publish(): команда уходит
+            # на любой узел, кластер сам рассылает её по шине
+            return await self._redis.execute_command("PUBLISH", channel, payload)
         return await self._redis.publish(channel, payload)
 
+    def _pubsub_client(self) -> aioredis.Redis:
+        """
+        Клиент для SUBSCRIBE. У RedisCluster (redis.asyncio) нет pubsub(), а
+        обычный PUBLISH в кластере рассылается всем узлам — подписка идёт через
+        отдельное соединение к одному из них.
+        """
+        if not self._cluster:
+            return self._redis
+        if self._subscriber is None:
+            # Параметры узла (адрес, авторизация, TLS) — как у соединений самого кластера
+            node = self._redis.get_default_node()
+            self._subscriber = aioredis.Redis.from_pool(aioredis.ConnectionPool(
+                connection_class=node.connection_class, **node.connection_kwargs
+            ))
+        return self._subscriber
+
     async def subscribe(self, channel: str, handler: Callable[[Any], None]):
         """
         Подписка на канал. handler может быть асинхронной функцией или обычной.
         Запускает фоновую задачу, которую можно отменить (client.close() сделает cancel).
         """
         await self.connect()
-        pubsub = self._redis.pubsub()
+        pubsub = self._pubsub_client().pubsub()
         await pubsub.subscribe(channel)
 
         async def _reader():
@@ -271,7 +708,7 @@ class RedisClient:
                         continue
                     data = msg.get("data")
                     try:
-                        data = self._from_bytes(data)
+                        data = self._from_bytes(data, channel)
                     except Exception:
                         pass
                     if asyncio.iscoroutinefunction(handler):
@@ -336,33 +773,74 @@ class RedisClient:
             keys: Iterable[Union[str, bytes]]
         ) -> int:
         """
-        Для пачки keys: получаем TYPE для каждого ключа через pipeline,
-        фильтруем только 'hash' и делаем UNLINK (faster, non-blocking delete).
-        Возвращаем количество удалённых ключей в этой пачке.
+        Для пачки keys одним вызовом скрипта: TYPE каждого ключа и UNLINK
+        только ключей типа 'hash'. Возвращаем количество удалённых ключей.
         """
-        # 1) Получаем типы пакетно
-        pipe = self._redis.pipeline(transaction=False)
-        for k in keys:
-            pipe.type(k)
-        types = await pipe.execute()
-
-        # 2) Фильтруем ключи типа 'hash' (учитываем str и bytes)
-        keys_to_delete = []
-        for k, t in zip(keys, types):
-            # t может быть 'hash' (str) или b'hash' (bytes) в зависимости от decode_responses
-            if t == "hash" or t == b"hash":
-                keys_to_delete.append(k)
-
-        if not keys_to_delete:
+        return await self.unlink_by_type(list(keys), "hash")
+
+    async def unlink_by_type(self, keys: list[str], key_type: str) -> int:
+        """UNLINK только ключей типа key_type, одним скриптом (в кластере — по слотам)."""
+        if not keys:
             return 0
+        if self._cluster:
+            # SCAN в кластере идёт по всем узлам, ключи пачки — из разных слотов
+            return sum(int(r or 0) for r in await self.run_script_by_slot(UNLINK_BY_TYPE, keys, [key_type]))
+        res = await self.run_script(UNLINK_BY_TYPE, keys=keys, args=[key_type])
+        return int(res or 0)
 
-        # 3) Удаляем неблокирующе — UNLINK (fallback на DEL если UNLINK не поддерживается)
-        try:
-            # unlink принимает *args
-            res = await self._redis.unlink(*keys_to_delete)
-        except AttributeError:
-            # старые клиенты/серверы могут не поддерживать UNLINK в API, используем delete
-            res = await self._redis.delete(*keys_to_delete)
+    # ---- maintenance primitives ----
+    async def scan_page(
+        self, cursor: int = 0, match: str | None = None, count: int = 500, key_type: str | None = None
+    ) -> ScanPage:
+        """Одна страница SCAN. Курсор можно сохранить и продолжить с него позже."""
+        if self._cluster:
+            raise ValueError("scan_page is not supported in cluster mode")
+        await self.connect()
+        next_cursor, keys = await self._redis.scan(cursor=cursor, match=match, count=count, _type=key_type)
+        keys = [self._to_str(k) for k in keys]
+        return ScanPage(
+            cursor=int(next_cursor),
+            has_more=int(next_cursor) != 0,
+            total=None,
+            keys=keys,
+            returned=len(keys),
+        )
 
-        # res обычно число удалённых ключей
-        return int(res or 0)
+    async def types(self, keys: list[str]) -> list[str]:
+        await self.connect()
+        pipe = self._redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.type(key)
+        return [self._to_str(t) for t in await pipe.execute()]
+
+    async def ttls(self, keys: list[str]) -> list[int]:
+        await self.connect()
+        pipe = self._redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.ttl(key)
+        return await pipe.execute()
+
+    async def get_raw_many(self, keys: list[str]) -> list[bytes | str | None]:
+        """Значения строковых ключей без декодирования кодеком."""
+        if not keys:
+            return []
+        await self.connect()
+        return await self._redis.mget(keys)
+
+    async def replace_if_equal(self, items: list[tuple[str, bytes | str, bytes | str]]) -> int:
+        """(ключ, ожидаемое, новое): заменить значение, если оно не изменилось; TTL сохраняется."""
+        if not items:
+            return 0
+        args = [value for _, old, new in items for value in (old, new)]
+        return int(await self.run_script(REPLACE_IF_EQUAL, keys=[key for key, _, _ in items], args=args))
+
+    async def renamenx_many(self, renames: list[tuple[str, str]]) -> int:
+        """RENAMENX пачкой; ключ, чьё новое имя занято, остаётся на месте."""
+        if not renames:
+            return 0
+        await self.connect()
+        pipe = self._redis.pipeline(transaction=False)
+        for src, dst in renames:
+            pipe.renamenx(src, dst)
+        results = await pipe.execute(raise_on_error=False)
+        return sum(1 for r in results if r is True or r == 1)
@@ -0,0 +1,165 @@
+"""
+Реестр Lua-скриптов RedisClient.
+
+Скрипт вызывается по EVALSHA: SHA1 считается локально, текст загружается
+(SCRIPT LOAD) при подключении и повторно — если сервер ответил NOSCRIPT
+(рестарт, failover, SCRIPT FLUSH). Каждый скрипт заменяет несколько
+round trip'ов одним атомарным вызовом.
+"""
+from dataclasses import dataclass, field
+import hashlib
+
+
+@dataclass(frozen=True)
+class LuaScript:
+    name: str
+    source: str
+    sha: str = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "sha", hashlib.sha1(self.source.encode()).hexdigest())
+
+
+SCRIPTS: dict[str, LuaScript] = {}
+
+
+def register_script(name: str, source: str) -> LuaScript:
+    """Добавить скрипт в реестр; RedisClient загрузит его при подключении."""
+    script = LuaScript(name, source)
+    existing = SCRIPTS.get(name)
+    if existing is not None and existing.sha != script.sha:
+        raise ValueError(f"Script {name!r} is already registered with different source")
+    SCRIPTS[name] = script
+    return script
+
+
+# KEYS — проверяемые ключи. Возвращает строку из '0'/'1' по ключу —
+# одна bulk-строка вместо N EXISTS в pipeline и N целых в ответе.
+EXISTS_MANY = register_script("exists_many", """
+local bits = {}
+for i, key in ipairs(KEYS) do
+    bits[i] = redis.call('EXISTS', key) == 1 and '1' or '0'
+end
+return table.concat(bits)
+""")
+
+
+# KEYS — кандидаты, ARGV[1] — тип (hash, string, ...).
+# Удаляет (UNLINK) только ключи нужного типа, возвращает их количество.
+# Заменяет pipeline из TYPE и отдельный UNLINK.
+UNLINK_BY_TYPE = register_script("unlink_by_type", """
+local matched = {}
+for _, key in ipairs(KEYS) do
+    if redis.call('TYPE', key).ok == ARGV[1] then
+        matched[#matched + 1] = key
+    end
+end
+local deleted = 0
+-- unpack ограничен стеком Lua, удаляем частями
+for i = 1, #matched, 1000 do
+    deleted = deleted + redis.call('UNLINK', unpack(matched, i, math.min(i + 999, #matched)))
+end
+return deleted
+""")
+
+
+# KEYS[1] — хеш соединения, KEYS[2] — sorted set индекса.
+# ARGV: поле, значение/score, член индекса, TTL хеша в секундах (0 — без TTL),
+# [канал, сообщение]. HSET + ZADD (+ EXPIRE, PUBLISH) атомарно за один round trip.
+TOUCH_INDEXED_HASH = register_script("touch_indexed_hash", """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+if tonumber(ARGV[4]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+end
+if ARGV[5] then
+    redis.call('PUBLISH', ARGV[5], ARGV[6])
+end
+return 1
+""")
+
+
+# KEYS[1] — sorted set индекса, KEYS[2..] — хеши соединений.
+# ARGV[1] — максимальный score, ARGV[2..] — члены индекса (в порядке KEYS[2..]).
+# Удаляет хеш и член индекса, только если score всё ещё <= ARGV[1]:
+# соединение, обновившее last_seen после выборки, не трогаем.
+# Возвращает удалённых членов с их score: член, score, член, score, ...
+REAP_INDEXED = register_script("reap_indexed", """
+local max_score = tonumber(ARGV[1])
+local reaped = {}
+for i = 2, #KEYS do
+    local member = ARGV[i]
+    local score = redis.call('ZSCORE', KEYS[1], member)
+    if score and tonumber(score) <= max_score then
+        redis.call('UNLINK', KEYS[i])
+        redis.call('ZREM', KEYS[1], member)
+        reaped[#reaped + 1] = member
+        reaped[#reaped + 1] = score
+    end
+end
+return reaped
+""")
+
+
+# KEYS — строковые ключи, ARGV — пары (ожидаемое значение, новое значение).
+# SET с сохранением TTL, только если значение не изменилось после чтения.
+# Возвращает число заменённых.
+REPLACE_IF_EQUAL = register_script("replace_if_equal", """
+local replaced = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[2 * i - 1] then
+        redis.call('SET', key, ARGV[2 * i], 'KEEPTTL')
+        replaced = replaced + 1
+    end
+end
+return replaced
+""")
+
+
+# KEYS[1] — ключ блокировки, ARGV[1] — токен владельца.
+# Снимает блокировку, только если она всё ещё наша.
+RELEASE_LOCK = register_script("release_lock", """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+# KEYS[1] — ключ блокировки, ARGV[1] — токен владельца, ARGV[2] — новый TTL в мс.
+# Продлевает блокировку, только если она всё ещё наша.
+EXTEND_LOCK = register_script("extend_lock", """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""")
+
+
+# KEYS[1] — хеш, ARGV[1] — поле, ARGV[2] — число n допустимых значений,
+# ARGV[3..n+2] — допустимые значения, дальше — пары (поле, значение).
+# HSET пар, только если поле всё ещё имеет одно из допустимых значений
+# (compare-and-set статуса). Возвращает 1, если записал.
+HSET_IF_FIELD_IN = register_script("hset_if_field_in", """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+local n = tonumber(ARGV[2])
+for i = 3, n + 2 do
+    if current == ARGV[i] then
+        redis.call('HSET', KEYS[1], unpack(ARGV, n + 3))
+        return 1
+    end
+end
+return 0
+""")
+
+
+# KEYS[1] — хеш версии (поля epoch, counter), ARGV[1] — epoch на случай,
+# если хеша нет, ARGV[2] — приращение counter (0 — только чтение).
+# Хеш, пропавший после FLUSHALL, рестарта без persistence или failover,
+# получает новый epoch: счётчик, начатый заново, не повторит старые версии.
+# Возвращает {epoch, counter}.
+VERSION_COUNTER = register_script("version_counter", """
+redis.call('HSETNX', KEYS[1], 'epoch', ARGV[1])
+local counter = redis.call('HINCRBY', KEYS[1], 'counter', ARGV[2])
+return {redis.call('HGET', KEYS[1], 'epoch'), counter}
+""")
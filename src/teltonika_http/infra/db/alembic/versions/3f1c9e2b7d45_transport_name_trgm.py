@@ -0,0 +1,34 @@
+"""transport name trigram index
+
+Revision ID: 3f1c9e2b7d45
+Revises: 7a863a2a44cd
+Create Date: 2026-10-17 09:12:41.218503
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9e2b7d45'
+down_revision: Union[str, Sequence[str], None] = '7a863a2a44cd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY не блокирует запись в transports, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transports_name_trgm "
+            "ON transports USING gin (name gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_transports_name_trgm")
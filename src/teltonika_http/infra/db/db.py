@@ -1,5 +1,5 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase
 import logging
 
 from src.teltonika_http.config import settings
@@ -15,11 +15,23 @@ class DbCredentials():
         return f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:" \
             f"5432/{settings.POSTGRES_DB}"
 
+    @property
+    def async_url(self):
+        return f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:" \
+            f"5432/{settings.POSTGRES_DB}"
+
 db_creds = DbCredentials()
 
-engine = create_engine(db_creds.url)
+engine = create_async_engine(
+    db_creds.async_url,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
 
-session = sessionmaker(engine)
+# expire_on_commit=False: после commit объекты не должны лениво
+# подгружаться заново — в async-режиме это вызвало бы MissingGreenlet
+session = async_sessionmaker(engine, expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
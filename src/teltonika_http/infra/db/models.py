@@ -49,9 +49,11 @@ class Transport(Base):
     name: Mapped[str] = mapped_column(String(150))
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(onupdate=func.now(), nullable=True)
+    # Без явного selectinload обращение к sensors — ошибка, а не N+1 запрос
     sensors: Mapped[list["Sensor"]] = relationship(
         "Sensor",
         back_populates="transport",
+        lazy="raise",
     )
 
 
@@ -2,16 +2,19 @@ from abc import ABC
 import functools
 import logging
 from math import ceil
-from typing import Callable
+from typing import Callable, Sequence
 
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, update, delete, func, inspect
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ORMOption
 from pydantic import BaseModel
 
 from ..db import Base
 from ..exceptions import RepositoryError, ItemExistsException, AppError
-from src.teltonika_http.util.dtos import ItemListPageDto
+from src.teltonika_http.util.dtos import ItemListPageDto, ItemListCursorDto
+from src.teltonika_http.util.pagination import encode_cursor, decode_cursor
+from .count_provider import CountStrategy, count_provider
 
 
 logger = logging.getLogger("Database")
@@ -19,19 +22,19 @@ logger = logging.getLogger("Database")
 
 def handle_db_errors(func):
     @functools.wraps(func)
-    def wrapper(self, session_factory, *args, **kwargs):
+    async def wrapper(self, session_factory, *args, **kwargs):
         try:
-            return func(self, session_factory, *args, **kwargs)
+            return await func(self, session_factory, *args, **kwargs)
         except AppError:
             raise
         except SQLAlchemyError as e:
             model_name = getattr(self, "model", Base).__name__
-            logger.error(f"Database error in {model_name}.{func.__name__}: {e}")
+            logger.error("Database error in %s.%s: %s", model_name, func.__name__, e)
             
             # Throwing app error
             raise RepositoryError(f"Data layer error in {func.__name__}")
         except Exception as e:
-            logger.critical(f"Unexpected error in repository: {e}")
+            logger.critical("Unexpected error in repository: %s", e)
             raise RepositoryError("Internal repository failure")
     return wrapper
 
@@ -44,9 +47,25 @@ class BaseOrm(ABC):
         self._dto: type[BaseModel] = dto
         self.logger = logging.getLogger("Database")
 
-    def all_paginate(
-            self, session_factory: Callable[[], Session], page_size, page_num, **kwargs
+    @property
+    def _pk(self):
+        """Колонка первичного ключа — по ней упорядочиваются все выборки страницами."""
+        return inspect(self.model).primary_key[0]
+
+    async def all_paginate(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            page_size,
+            page_num,
+            count_strategy: CountStrategy = CountStrategy.exact,
+            options: Sequence[ORMOption] = (),
+            dto: type[BaseModel] | None = None,
+            **kwargs
     ) -> ItemListPageDto:
+        """
+        options — опции загрузки связей (selectinload и т.п.), dto — модель
+        ответа вместо DTO по умолчанию (например, с вложенными связями).
+        """
         if page_size <= 0:
             raise ValueError("page_size must be > 0")
         if page_num < 0:
@@ -54,79 +73,123 @@ class BaseOrm(ABC):
         
         offset = page_size * page_num
         
-        with session_factory() as s:
+        # Getting total items and total pages
+        filters = {k: v for k, v in kwargs.items() if hasattr(self.model, k)}
+        total_items = await count_provider.count(
+            session_factory, self.model, count_strategy, **filters
+        )
+        total_pages = ceil(total_items / page_size) if total_items else 0
 
-            # Build the SQL query with given params in kwargs
-            query = (
-                select(func.count()).select_from(self.model)
-            )
-            for k, v in kwargs.items():
-                if hasattr(self.model, k):
-                    query = query.where(getattr(self.model, k) == v)
-
-            # Getting total items and total pages
-            total_items = s.execute(query).scalar_one()
-            total_pages = ceil(total_items / page_size) if total_items else 0
+        async with session_factory() as s:
 
-            # Building the main query itself
+            # Building the main query itself. One extra row tells if there is a next page,
+            # since the total may be cached or estimated
             query = (
-                select(self.model).offset(offset).limit(page_size)
+                select(self.model).options(*options).order_by(self._pk).offset(offset).limit(page_size + 1)
             )
             for k, v in kwargs.items():
                 if hasattr(self.model, k):
                     query = query.where(getattr(self.model, k) == v)
 
-            items = s.execute(query).scalars().all()
+            items = (await s.execute(query)).scalars().all()
 
-            has_next = page_num + 1 < total_pages
+            has_next = len(items) > page_size
+            items = items[:page_size]
 
+            dto = dto or self._dto
             return ItemListPageDto(
-                data=[self._dto.model_validate(item, from_attributes=True) for item in items],
+                data=[dto.model_validate(item, from_attributes=True) for item in items],
                 total_pages=total_pages,
                 total_elements=total_items,
-                has_hext=has_next
+                has_next=has_next
             )
 
+    async def all_keyset(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            page_size: int,
+            cursor: str | None = None,
+            options: Sequence[ORMOption] = (),
+            dto: type[BaseModel] | None = None,
+            **kwargs
+    ) -> ItemListCursorDto:
+        """
+        Keyset-пагинация по первичному ключу:
+        WHERE pk > :last ORDER BY pk LIMIT :page_size + 1.
+
+        Лишняя (page_size + 1) строка не возвращается клиенту и служит только
+        признаком has_next, поэтому COUNT(*) не нужен.
+
+        Связи из options (selectinload) грузятся одним запросом на страницу.
+        """
+        if page_size <= 0:
+            raise ValueError("page_size must be > 0")
+
+        query = select(self.model).options(*options).order_by(self._pk).limit(page_size + 1)
+        if cursor:
+            query = query.where(self._pk > decode_cursor(cursor))
+        for k, v in kwargs.items():
+            if hasattr(self.model, k):
+                query = query.where(getattr(self.model, k) == v)
+
+        async with session_factory() as s:
+            items = (await s.execute(query)).scalars().all()
+
+        has_next = len(items) > page_size
+        items = items[:page_size]
+        next_cursor = encode_cursor(str(getattr(items[-1], self._pk.key))) if has_next else None
+
+        dto = dto or self._dto
+        return ItemListCursorDto(
+            data=[dto.model_validate(item, from_attributes=True) for item in items],
+            next_cursor=next_cursor,
+            has_next=has_next
+        )
+
     @handle_db_errors
-    def get_first(self, session_factory, **kwargs) -> Base:
-        with session_factory() as session:
-            query = select(self.model)
+    async def get_first(self, session_factory, options: Sequence[ORMOption] = (), **kwargs) -> Base:
+        async with session_factory() as session:
+            query = select(self.model).options(*options)
             for k, v in kwargs.items():
                 if hasattr(self.model, k):
                     query = query.where(getattr(self.model, k) == v)
 
-            return session.execute(query).scalars().first()
+            return (await session.execute(query)).scalars().first()
         
     @handle_db_errors
-    def create(self, session_factory, **kwargs):
-        with session_factory() as s:
+    async def create(self, session_factory, **kwargs):
+        async with session_factory() as s:
             try:
                 tr = self.model(**kwargs)
                 s.add(tr)
-                s.flush()
-                s.commit()
+                await s.flush()
+                await s.commit()
             except IntegrityError:
                 raise ItemExistsException
+        count_provider.invalidate(self.model)
 
     @handle_db_errors
-    def update(self, session_factory, entity_id: int, **values):
-        with session_factory() as s:
+    async def update(self, session_factory, entity_id: int, **values) -> int:
+        """Число изменённых строк: 0 — записи с таким id нет."""
+        async with session_factory() as s:
             stmt = (
                 update(self.model)
                 .where(self.model.id == entity_id)
                 .values(**values)
                 .execution_options(synchronize_session="fetch")
             )
-            s.execute(stmt)
-            s.commit()
+            result = await s.execute(stmt)
+            await s.commit()
+            return result.rowcount
 
     @handle_db_errors
-    def delete(self, session_factory, entity_id: int):
-        with session_factory() as s:
+    async def delete(self, session_factory, entity_id: int):
+        async with session_factory() as s:
             stmt = (
                 delete(self.model)
                 .where(self.model.id == entity_id)
                 .execution_options(synchronize_session="fetch")
             )
-            s.execute(stmt)
-            s.commit()
+            await s.execute(stmt)
+            await s.commit()
+        count_provider.invalidate(self.model)
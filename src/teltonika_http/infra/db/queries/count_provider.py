@@ -0,0 +1,90 @@
+import enum
+import logging
+import time
+from typing import Callable
+
+from sqlalchemy import select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import Base
+from src.teltonika_http.config import settings
+
+
+logger = logging.getLogger("CountProvider")
+
+
+class CountStrategy(str, enum.Enum):
+    exact = "exact"          # SELECT count(*) на каждый запрос
+    cached = "cached"        # count(*), закешированный на TTL внутри воркера
+    estimated = "estimated"  # оценка планировщика из pg_class.reltuples
+
+
+class CountProvider:
+    """
+    Источник total_elements для постраничных списков.
+
+    Кеш живёт внутри воркера: create/delete в BaseOrm сбрасывают его сразу,
+    а изменения из других воркеров видны не позже чем через ttl секунд.
+    """
+    def __init__(self, ttl: float = 30.0):
+        self._ttl = ttl
+        self._cache: dict[tuple, tuple[float, int]] = {}
+
+    async def count(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            model: type[Base],
+            strategy: CountStrategy = CountStrategy.exact,
+            **filters
+    ) -> int:
+        # Оценка планировщика есть только для таблицы целиком
+        if strategy == CountStrategy.estimated and not filters:
+            estimated = await self._estimated(session_factory, model)
+            if estimated is not None:
+                return estimated
+            strategy = CountStrategy.cached
+
+        if strategy == CountStrategy.cached:
+            key = self._key(model, filters)
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] > time.monotonic():
+                return hit[1]
+            total = await self._exact(session_factory, model, **filters)
+            self._cache[key] = (time.monotonic() + self._ttl, total)
+            return total
+
+        return await self._exact(session_factory, model, **filters)
+
+    def invalidate(self, model: type[Base]) -> None:
+        table = model.__tablename__
+        for key in [k for k in self._cache if k[0] == table]:
+            self._cache.pop(key, None)
+
+    @staticmethod
+    def _key(model: type[Base], filters: dict) -> tuple:
+        return (model.__tablename__, tuple(sorted((k, str(v)) for k, v in filters.items())))
+
+    @staticmethod
+    async def _exact(session_factory, model: type[Base], **filters) -> int:
+        query = select(func.count()).select_from(model)
+        for k, v in filters.items():
+            if hasattr(model, k):
+                query = query.where(getattr(model, k) == v)
+        async with session_factory() as s:
+            return (await s.execute(query)).scalar_one()
+
+    @staticmethod
+    async def _estimated(session_factory, model: type[Base]) -> int | None:
+        async with session_factory() as s:
+            reltuples = (await s.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": model.__tablename__},
+            )).scalar_one_or_none()
+        # reltuples = -1 у таблицы, по которой ещё не было VACUUM/ANALYZE
+        if reltuples is None or reltuples < 0:
+            logger.debug("No planner estimate for %s, falling back to count(*)", model.__tablename__)
+            return None
+        return int(reltuples)
+
+
+count_provider = CountProvider(ttl=settings.COUNT_CACHE_TTL)
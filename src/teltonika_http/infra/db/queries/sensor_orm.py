@@ -8,29 +8,29 @@ from ..models import Transport, Sensor
 class SensorOrm:
 
     @staticmethod
-    def all() -> list[Sensor]:
-        with session() as s:
-            return s.execute(
+    async def all() -> list[Sensor]:
+        async with session() as s:
+            return (await s.execute(
                 select(Sensor)
-            ).unique().scalars().all()
+            )).unique().scalars().all()
 
     @staticmethod
-    def create(**kwargs):
-        with session() as s:
+    async def create(**kwargs):
+        async with session() as s:
             sens = Sensor(**kwargs)
             s.add(sens)
-            s.flush()
-            s.commit()
+            await s.flush()
+            await s.commit()
 
     @staticmethod
-    def delete(sensor: Sensor):
-        with session() as s:
-            s.delete(sensor)
-            s.commit()
+    async def delete(sensor: Sensor):
+        async with session() as s:
+            await s.delete(sensor)
+            await s.commit()
 
     @staticmethod
-    def update(sensor: Sensor):
-        with session() as s:
+    async def update(sensor: Sensor):
+        async with session() as s:
             s.add(sensor)
-            s.commit()
+            await s.commit()
 
@@ -1,53 +1,236 @@
-from typing import Callable
+from datetime import datetime
+from typing import AsyncIterator, Callable
 import logging
 
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+from sqlalchemy import select, any_, bindparam, func, or_, text, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from .base_orm import BaseOrm
+from .base_orm import BaseOrm, handle_db_errors
+from .count_provider import CountStrategy, count_provider
 from ..models import Transport
-from src.teltonika_http.util.dtos import ItemListOffsetDto, TransportDto
+from src.teltonika_http.util.dtos import ItemListOffsetDto, TransportDto, TransportImportConflictDto
 
 
 logger = logging.getLogger("TransportOrm")
 
 
+def escape_like(value: str) -> str:
+    """Экранировать спецсимволы LIKE (\\ — escape-символ Postgres по умолчанию)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# Датчики страницы — одним запросом WHERE transport_imei IN (...), а не на каждую строку
+WITH_SENSORS = (selectinload(Transport.sensors),)
+
+
 class TransportOrm(BaseOrm):
 
     def __init__(self):
         super().__init__(Transport, TransportDto)
 
-    def all_offset(
-        self, session_factory: Callable[[], Session], page_size: int, offset: int
+    async def all_offset(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        page_size: int,
+        offset: int,
+        count_strategy: CountStrategy | None = CountStrategy.exact,
     ) -> ItemListOffsetDto:
-        with session_factory() as session:
-            if page_size <= 0:
-                raise ValueError("page_size must be > 0")
-            if offset < 0:
-                raise ValueError("page_num must be >= 0")
-
-            # Count items
-            total_items = session.execute(
-                select(func.count())
-                .select_from(self.model)
-            ).scalar_one()
+        """count_strategy=None — не считать total_elements вовсе (has_next берётся из лишней строки)."""
+        if page_size <= 0:
+            raise ValueError("page_size must be > 0")
+        if offset < 0:
+            raise ValueError("page_num must be >= 0")
+
+        # Count items
+        total_items = None
+        if count_strategy is not None:
+            total_items = await count_provider.count(session_factory, self.model, count_strategy)
 
+        async with session_factory() as session:
             query = (
                 select(self.model)
+                .order_by(self.model.imei)
                 .offset(offset)
-                .limit(page_size)
+                .limit(page_size + 1)
             )
 
-            res = session.execute(query).scalars().all()
+            res = (await session.execute(query)).scalars().all()
 
-            logger.debug(f"Items got: {len(res)}, {offset=}, {total_items=}")
-            has_next = len(res) + offset < total_items
-            logger.debug(f"Does DB have more records? {has_next=}")
+        has_next = len(res) > page_size
+        res = res[:page_size]
+        logger.debug("Items got: %s, offset=%r, total_items=%r", len(res), offset, total_items)
+        logger.debug("Does DB have more records? has_next=%r", has_next)
 
-            return ItemListOffsetDto(
-                data=[self._dto.model_validate(item, from_attributes=True) for item in res],
-                total_elements=total_items,
-                offset=offset + len(res),
-                has_next=has_next
-            )
-         
+        return ItemListOffsetDto(
+            data=[self._dto.model_validate(item, from_attributes=True) for item in res],
+            total_elements=total_items,
+            offset=offset + len(res),
+            has_next=has_next
+        )
+
+    @handle_db_errors
+    async def get_many(
+        self, session_factory: Callable[[], AsyncSession], imeis: list[str]
+    ) -> list[Transport]:
+        """Все записи по списку IMEI одним запросом: WHERE imei = ANY(:imeis)."""
+        if not imeis:
+            return []
+        query = select(self.model).where(
+            self.model.imei == any_(bindparam("imeis", imeis, type_=ARRAY(String)))
+        )
+        async with session_factory() as session:
+            return (await session.execute(query)).scalars().all()
+
+    @handle_db_errors
+    async def search(
+        self, session_factory: Callable[[], AsyncSession], q: str, limit: int
+    ) -> list[tuple[str, str, float]]:
+        """
+        Поиск по части имени (GIN-индекс ix_transports_name_trgm):
+        name % q (триграммная близость) или name ILIKE '%q%' — для коротких
+        запросов, у которых мало триграмм. Сортировка по similarity.
+        Возвращает (imei, name, similarity).
+        """
+        score = func.similarity(self.model.name, q).label("score")
+        query = (
+            select(self.model.imei, self.model.name, score)
+            .where(or_(
+                self.model.name.op("%")(q),
+                self.model.name.ilike(f"%{escape_like(q)}%"),
+            ))
+            .order_by(score.desc(), self.model.imei)
+            .limit(limit)
+        )
+        async with session_factory() as session:
+            return [tuple(row) for row in (await session.execute(query)).all()]
+
+    @handle_db_errors
+    async def prefix_search(
+        self, session_factory: Callable[[], AsyncSession], prefix: str, limit: int
+    ) -> list[tuple[str, str]]:
+        """(imei, name) с именем, начинающимся с prefix без учёта регистра."""
+        query = (
+            select(self.model.imei, self.model.name)
+            .where(self.model.name.ilike(f"{escape_like(prefix)}%"))
+            .order_by(func.lower(self.model.name), self.model.imei)
+            .limit(limit)
+        )
+        async with session_factory() as session:
+            return [tuple(row) for row in (await session.execute(query)).all()]
+
+    @handle_db_errors
+    async def names_changed_since(
+        self, session_factory: Callable[[], AsyncSession], since: datetime | None
+    ) -> list[tuple[str, str, datetime]]:
+        """
+        (imei, name, время изменения) записей, созданных или изменённых
+        не раньше since; since=None — все записи, упорядоченные по имени.
+        """
+        changed_at = func.coalesce(self.model.updated_at, self.model.created_at).label("changed_at")
+        query = select(self.model.imei, self.model.name, changed_at)
+        if since is None:
+            query = query.order_by(self.model.name)
+        else:
+            query = query.where(changed_at >= since)
+        rows = []
+        async with session_factory() as session:
+            # Частями через серверный курсор: между частями event loop свободен
+            result = await session.stream(query)
+            async for partition in result.partitions(10000):
+                rows.extend(tuple(row) for row in partition)
+        return rows
+
+    @handle_db_errors
+    async def bulk_import(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        batches: AsyncIterator[list[tuple[int, str, str]]],
+        max_conflicts: int = 1000,
+    ) -> tuple[int, int, list[TransportImportConflictDto]]:
+        """
+        Массовая вставка через COPY во временную staging-таблицу и
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING в transports.
+
+        batches — пачки строк (номер строки во входном файле, imei, name).
+        Staging очищается после каждой пачки, так что память и размер
+        временной таблицы ограничены размером пачки; IMEI, вставленные этим
+        импортом, копятся во второй временной таблице — по ней дубль из
+        более ранней пачки отличается от уже существовавшего в БД. Весь
+        импорт идёт одной транзакцией: при ошибке ничего не вставляется.
+
+        Возвращает (вставлено, всего конфликтов, первые max_conflicts конфликтов).
+        """
+        inserted_total = 0
+        conflicts_total = 0
+        conflicts: list[TransportImportConflictDto] = []
+
+        async with session_factory() as s:
+            conn = await s.connection()
+            # Через SQLAlchemy: адаптер asyncpg открывает транзакцию лениво, при
+            # первом своём execute. Вызовы asyncpg напрямую до этого шли бы в
+            # autocommit, и ON COMMIT DROP удалял бы таблицу сразу после создания
+            await conn.execute(text(
+                "CREATE TEMP TABLE transports_import "
+                "(line integer, imei varchar(20), name varchar(150)) ON COMMIT DROP"
+            ))
+            await conn.execute(text(
+                "CREATE TEMP TABLE transports_imported (imei varchar(20) PRIMARY KEY) ON COMMIT DROP"
+            ))
+            raw = await conn.get_raw_connection()
+            pg = raw.driver_connection  # asyncpg.Connection, уже внутри транзакции
+
+            async for batch in batches:
+                if not batch:
+                    continue
+                await pg.copy_records_to_table(
+                    "transports_import", records=batch, columns=("line", "imei", "name")
+                )
+
+                # Из дублей внутри файла побеждает первая строка
+                inserted = await pg.fetch(
+                    "WITH ins AS ("
+                    "    INSERT INTO transports (imei, name) "
+                    "    SELECT DISTINCT ON (imei) imei, name FROM transports_import "
+                    "    ORDER BY imei, line "
+                    "    ON CONFLICT (imei) DO NOTHING RETURNING imei"
+                    "), seen AS ("
+                    "    INSERT INTO transports_imported SELECT imei FROM ins"
+                    ") "
+                    "SELECT imei FROM ins"
+                )
+                inserted_imeis = [r["imei"] for r in inserted]
+                inserted_total += len(inserted_imeis)
+
+                # Всё, что не попало в таблицу: либо IMEI уже был в БД,
+                # либо он вставлен из более ранней строки этого же файла
+                # (в этой пачке или в одной из предыдущих)
+                rejected = await pg.fetch(
+                    "WITH winners AS ("
+                    "    SELECT imei, min(line) AS line FROM transports_import "
+                    "    WHERE imei = ANY($1::text[]) GROUP BY imei"
+                    ") "
+                    "SELECT i.line, i.imei, (d.imei IS NOT NULL) AS duplicate "
+                    "FROM transports_import i "
+                    "LEFT JOIN winners w ON w.imei = i.imei "
+                    "LEFT JOIN transports_imported d ON d.imei = i.imei "
+                    "WHERE w.line IS DISTINCT FROM i.line "
+                    "ORDER BY i.line",
+                    inserted_imeis,
+                )
+                conflicts_total += len(rejected)
+                for r in rejected[:max(0, max_conflicts - len(conflicts))]:
+                    conflicts.append(TransportImportConflictDto(
+                        line=r["line"],
+                        imei=r["imei"],
+                        reason="duplicate_in_file" if r["duplicate"] else "already_exists",
+                    ))
+
+                await pg.execute("TRUNCATE transports_import")
+                logger.debug("Imported batch of %s rows, inserted=%s", len(batch), len(inserted_imeis))
+
+            await s.commit()
+
+        count_provider.invalidate(self.model)
+        return inserted_total, conflicts_total, conflicts
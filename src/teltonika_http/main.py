@@ -1,7 +1,7 @@
 import logging
 
 from fastapi import FastAPI
-from .routes import admin, auth, users, transport, connection
+from .routes import admin, auth, users, transport, connection, metrics
 
 from src.teltonika_http.config import initial_setup
 from src.teltonika_http.util.boot import lifespan, register_exception_handlers, register_middlewares
@@ -25,3 +25,4 @@ app.include_router(router=auth.router)
 app.include_router(router=users.router)
 app.include_router(router=transport.router)
 app.include_router(router=connection.router)
+app.include_router(router=metrics.router)
@@ -1,13 +1,25 @@
 import logging
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form, Header
 from starlette import status
 
-from src.teltonika_http.util.dependencies import db_dep
-from src.teltonika_http.util.dtos import LoginUserDto, AdminCreateUserDto
+from src.teltonika_http.util.dependencies import db_dep, broker_dep, broker_service_dep
+from src.teltonika_http.util.dtos import (
+    LoginUserDto, AdminCreateUserDto, AdminSetUserActiveDto, TransportImportReportDto,
+    MaintenanceJobCreateDto, MaintenanceJobDto
+)
 from src.teltonika_http.services.auth import AuthService
+from src.teltonika_http.infra.db.exceptions import ItemNotFoundException
 from src.teltonika_http.infra.db.queries import UserOrm
+from src.teltonika_http.services.user_cache import user_cache, publish_user_invalidation
+from src.teltonika_http.services.password_hasher import password_hasher
+from src.teltonika_http.services.transport_cache import transport_cache
+from src.teltonika_http.services.transport_search import transport_name_index
+from src.teltonika_http.services.transport_import import (
+    TransportImportService, ImportFormat, aiter_upload_lines
+)
 from src.teltonika_http import config
+from src.teltonika_http.util.admission import admission_limiters
 
 logger = logging.getLogger(__name__)
 
@@ -20,27 +32,169 @@ router = APIRouter(
 @router.post("/create-user", response_model=LoginUserDto, include_in_schema=config.settings.DEBUG)
 async def create_user(request: Request, body: AdminCreateUserDto, session: db_dep):
     client = request.client.host if request.client else "-"
-    logger.info(f"CONNECT {request.method} {request.url.path} from={client} username={body.username}")
+    logger.info("CONNECT %s %s from=%s username=%s", request.method, request.url.path, client, body.username)
     logger.debug(
-        f"REQUEST {request.method} {request.url} body={{'username':'{body.username}', 'email':'{body.email}', 'admin_token':'***'}}"
+        "REQUEST %s %s body={'username':'%s', 'email':'%s', 'admin_token':'***'}",
+        request.method, request.url, body.username, body.email,
     )
 
     if body.admin_token != config.settings.ADMIN_TOKEN:
-        logger.warning(f"Invalid admin_token for create-user from={client} username={body.username}")
+        logger.warning("Invalid admin_token for create-user from=%s username=%s", client, body.username)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to perform this operation!"
         )
 
-    UserOrm().create(
+    await UserOrm().create(
         session,
         username=body.username,
-        hashed_password=AuthService.hash_password(body.password),
+        hashed_password=await password_hasher.run(AuthService.hash_password, body.password),
         email=body.email
     )
 
-    logger.info(f"User created username={body.username} status=200")
+    logger.info("User created username=%s status=200", body.username)
     return LoginUserDto(
         username=body.username,
         email=body.email
     )
+
+
+@router.post("/set-user-active", include_in_schema=config.settings.DEBUG)
+async def set_user_active(request: Request, body: AdminSetUserActiveDto, session: db_dep, broker: broker_dep):
+    client = request.client.host if request.client else "-"
+    logger.info("CONNECT %s %s from=%s user_id=%s", request.method, request.url.path, client, body.user_id)
+
+    if body.admin_token != config.settings.ADMIN_TOKEN:
+        logger.warning("Invalid admin_token for set-user-active from=%s user_id=%s", client, body.user_id)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to perform this operation!"
+        )
+
+    if not await UserOrm().update(session, body.user_id, is_active=body.is_active):
+        logger.info("User user_id=%s not found status=404", body.user_id)
+        raise ItemNotFoundException(message="User not found")
+    # Все воркеры должны забыть закешированное состояние пользователя
+    await publish_user_invalidation(broker, body.user_id)
+
+    logger.info("User user_id=%s is_active=%s status=200", body.user_id, body.is_active)
+    return {"user_id": body.user_id, "is_active": body.is_active}
+
+
+@router.post("/import-transports", response_model=TransportImportReportDto, include_in_schema=config.settings.DEBUG)
+async def import_transports(
+    request: Request,
+    session: db_dep,
+    broker: broker_service_dep,
+    admin_token: str = Form(...),
+    file: UploadFile = File(...),
+    format: ImportFormat | None = Form(None),
+):
+    """
+    Массовый импорт транспорта из CSV (imei,name) или NDJSON.
+    Уже существующие IMEI и дубли внутри файла попадают в отчёт конфликтов.
+    """
+    client = request.client.host if request.client else "-"
+    logger.info("CONNECT %s %s from=%s file=%s", request.method, request.url.path, client, file.filename)
+
+    if admin_token != config.settings.ADMIN_TOKEN:
+        logger.warning("Invalid admin_token for import-transports from=%s", client)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to perform this operation!"
+        )
+
+    if format is None:
+        is_ndjson = (file.filename or "").endswith((".ndjson", ".jsonl"))
+        format = ImportFormat.ndjson if is_ndjson else ImportFormat.csv
+
+    report = await TransportImportService(session, broker).import_lines(aiter_upload_lines(file), format)
+
+    logger.info("Transports imported inserted=%s conflicts=%s status=200", report.inserted, report.conflicts_total)
+    return report
+
+
+def _check_admin_token(x_admin_token: str) -> None:
+    if x_admin_token != config.settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to perform this operation!"
+        )
+
+
+@router.get("/cache-stats", include_in_schema=config.settings.DEBUG)
+async def cache_stats(broker: broker_dep, x_admin_token: str = Header(...)):
+    """Статистика локальных кешей этого воркера: размер, hit/miss, вытеснения."""
+    _check_admin_token(x_admin_token)
+    stats = {
+        "users": user_cache.stats(),
+        "transports": transport_cache.stats(),
+        "transport_names": transport_name_index.stats(),
+    }
+    if broker.client_cache is not None:
+        stats["redis"] = broker.client_cache.stats()
+    return stats
+
+
+@router.get("/admission-stats", include_in_schema=config.settings.DEBUG)
+async def admission_stats(x_admin_token: str = Header(...)):
+    """Admission control этого воркера: занятые слоты, глубина очередей, отказы."""
+    _check_admin_token(x_admin_token)
+    return {name: limiter.stats() for name, limiter in admission_limiters.items()}
+
+
+@router.get("/reaper-stats", include_in_schema=config.settings.DEBUG)
+async def reaper_stats(request: Request, x_admin_token: str = Header(...)):
+    """Очистка устаревших соединений в этом воркере: число проходов, удалено, длительность последнего."""
+    _check_admin_token(x_admin_token)
+    reaper = request.app.state.reaper
+    if reaper is None:
+        return {"enabled": False}
+    return {"enabled": True, **reaper.stats()}
+
+
+@router.post(
+    "/maintenance/jobs",
+    response_model=MaintenanceJobDto,
+    status_code=status.HTTP_202_ACCEPTED,
+    include_in_schema=config.settings.DEBUG,
+)
+async def start_maintenance_job(request: Request, body: MaintenanceJobCreateDto, x_admin_token: str = Header(...)):
+    """
+    Запуск задачи обслуживания ключей по шаблону: delete, reencode, migrate_prefix, stats.
+    Задача идёт в фоне страницами SCAN с ограничением ops/sec; прогресс — GET по id.
+    """
+    _check_admin_token(x_admin_token)
+    try:
+        job = await request.app.state.maintenance.start(
+            body.kind, body.pattern, body.params, body.ops_per_second, body.page_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    logger.info("Maintenance job %s started kind=%s pattern=%s", job["id"], body.kind.value, body.pattern)
+    return job
+
+
+@router.get("/maintenance/jobs/{job_id}", response_model=MaintenanceJobDto, include_in_schema=config.settings.DEBUG)
+async def get_maintenance_job(request: Request, job_id: str, x_admin_token: str = Header(...)):
+    _check_admin_token(x_admin_token)
+    return await request.app.state.maintenance.get(job_id)
+
+
+@router.post("/maintenance/jobs/{job_id}/cancel", response_model=MaintenanceJobDto, include_in_schema=config.settings.DEBUG)
+async def cancel_maintenance_job(request: Request, job_id: str, x_admin_token: str = Header(...)):
+    _check_admin_token(x_admin_token)
+    return await request.app.state.maintenance.cancel(job_id)
+
+
+@router.post("/maintenance/jobs/{job_id}/pause", response_model=MaintenanceJobDto, include_in_schema=config.settings.DEBUG)
+async def pause_maintenance_job(request: Request, job_id: str, x_admin_token: str = Header(...)):
+    _check_admin_token(x_admin_token)
+    return await request.app.state.maintenance.pause(job_id)
+
+
+@router.post("/maintenance/jobs/{job_id}/resume", response_model=MaintenanceJobDto, include_in_schema=config.settings.DEBUG)
+async def resume_maintenance_job(request: Request, job_id: str, x_admin_token: str = Header(...)):
+    """Продолжить с сохранённого курсора приостановленную, упавшую или прерванную рестартом задачу."""
+    _check_admin_token(x_admin_token)
+    return await request.app.state.maintenance.resume(job_id)
@@ -2,12 +2,13 @@ import logging
 
 from fastapi import APIRouter, HTTPException, Request
 
-from src.teltonika_http.util.dependencies import db_dep, token_form_dep
+from src.teltonika_http.util.dependencies import db_dep, broker_dep, token_form_dep
 from src.teltonika_http.util.dtos import TokenPairDto
 from src.teltonika_http.services.auth import (
     AuthService, 
     token_refresh_form_dep
 )
+from src.teltonika_http.services.rate_limiter import enforce_auth_limits
 
 
 logger = logging.getLogger(__name__)
@@ -18,7 +19,7 @@ router = APIRouter(
 
 
 @router.post("/token", response_model=TokenPairDto)
-async def token(request: Request, form_data: token_form_dep, db: db_dep):
+async def token(request: Request, form_data: token_form_dep, db: db_dep, broker: broker_dep):
     """
     Obtain token pair (access and refresh tokens)
     
@@ -30,16 +31,18 @@ async def token(request: Request, form_data: token_form_dep, db: db_dep):
     :type db: db_dep
     """
     client = request.client.host if request.client else "-"
-    logger.info(f"CONNECT {request.method} {request.url.path} from={client}")
+    logger.info("CONNECT %s %s from=%s", request.method, request.url.path, client)
     logger.debug(
-        f"REQUEST {request.method} {request.url} grant_type={getattr(form_data, 'grant_type', None)} "
-        f"username={getattr(form_data, 'username', None)}"
+        "REQUEST %s %s grant_type=%s username=%s",
+        request.method, request.url, getattr(form_data, 'grant_type', None), getattr(form_data, 'username', None),
     )
 
     if form_data.grant_type != "password":
         raise HTTPException(status_code=400, detail="Invalid grant type")
-    result = AuthService.get_token(form_data, db)
-    logger.info(f"Token issued for username={getattr(form_data, 'username', None)} status=200")  # ADDED
+    # До обращения к БД и bcrypt
+    await enforce_auth_limits(broker, client, form_data.username)
+    result = await AuthService.get_token(form_data, db)
+    logger.info("Token issued for username=%s status=200", getattr(form_data, 'username', None))  # ADDED
     return result
 
 
@@ -47,6 +50,7 @@ async def token(request: Request, form_data: token_form_dep, db: db_dep):
 async def refresh(
     request: Request,
     db: db_dep,
+    broker: broker_dep,
     # refresh_token: Annotated[str | None, Header()] = None,
     form_data: token_refresh_form_dep
 ):
@@ -64,4 +68,6 @@ async def refresh(
     #     logger.warning("Missing refresh_token for /auth/refresh")
     #     raise HTTPException(detail="Invalid refresh token", status_code=status.HTTP_401_UNAUTHORIZED)
 
+    client = request.client.host if request.client else "-"
+    await enforce_auth_limits(broker, client)
     return await AuthService.refresh(form_data.refresh_token)
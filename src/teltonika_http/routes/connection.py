@@ -1,11 +1,17 @@
+import json
 import logging
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from src.teltonika_http.services.connection import ConnectionService
+from src.teltonika_http.services.connection import ConnectionService, ConnectionSource
 from src.teltonika_http.util.dependencies import db_dep, broker_service_dep
 from src.teltonika_http.services.auth import current_user_dep
 from src.teltonika_http.util.dtos import ConnectionListDto, ConnectionDto
+from src.teltonika_http.services.connection_events import connection_event_hub
+from src.teltonika_http.config import settings
+from src.teltonika_http.infra.db.exceptions import ItemNotFoundException
+from src.teltonika_http.util.etag import make_etag, etag_matches, not_modified, set_etag
 
 
 logger = logging.getLogger("TransportRouter")
@@ -23,18 +29,74 @@ async def get_all(
     broker: broker_service_dep,
     _: current_user_dep,
     page_size: int,
-    offset: int,
+    offset: int | None = None,
+    cursor: str | None = None,
+    source: ConnectionSource = ConnectionSource.db,
+    seen_within: int | None = None,
 ):
-    res = await ConnectionService(db, broker).get_all(page_size, offset)
-    return res
+    """
+    Список IMEI с активным соединением.
+
+    source=index (или заданный seen_within, минуты) — выдача из индекса
+    активных соединений по last_seen, свежие первыми.
+    """
+    if source == ConnectionSource.index or seen_within is not None:
+        return await ConnectionService(db, broker).get_all_indexed(page_size, offset or 0, seen_within)
+    if offset is not None:
+        return await ConnectionService(db, broker).get_all(page_size, offset)
+    return await ConnectionService(db, broker).get_all_cursor(page_size, cursor)
     
 
 @router.get("/by-imei/{imei}", response_model=ConnectionDto)
 async def read_connection(
     broker: broker_service_dep,
+    response: Response,
     _: current_user_dep,
-    imei: str
+    imei: str,
+    if_none_match: str | None = Header(None),
 ) -> ConnectionDto:
+    # Любое изменение соединения обновляет last_seen, поэтому для 304
+    # достаточно одного HGET вместо HGETALL
+    last_seen = await broker.get_last_seen(imei)
+    if last_seen is None:
+        raise ItemNotFoundException(message="Connection not found")
+    etag = make_etag("connection", imei, last_seen)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
     res = await broker.get_connection_details(imei)
+    set_etag(response, etag)
     return ConnectionDto.model_validate(res)
-    
\ No newline at end of file
+
+
+@router.get("/stream")
+async def stream_connections(
+    request: Request,
+    _: current_user_dep,
+    imei: list[str] | None = Query(None),
+):
+    """
+    Server-Sent Events: connect / disconnect / last_seen по мере их появления.
+    imei (можно несколько раз) — получать события только по этим устройствам.
+    """
+    sub = connection_event_hub.subscribe(
+        settings.STREAM_CLIENT_QUEUE, set(imei) if imei else None
+    )
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                event = await sub.get(timeout=settings.STREAM_HEARTBEAT)
+                if event is None:
+                    # keepalive, заодно даёт шанс заметить отключение клиента
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            connection_event_hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
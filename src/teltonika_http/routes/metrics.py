@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from src.teltonika_http.util.metrics import render_metrics
+
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики Prometheus, собранные со всех воркеров gunicorn."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
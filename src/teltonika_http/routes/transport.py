@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Response, status
+from fastapi import APIRouter, Header, Query, Response, status
 import logging
 
-from src.teltonika_http.services.transport import TransportService
-from src.teltonika_http.util.dependencies import db_dep
+from src.teltonika_http.services.transport import TransportService, TransportInclude
+from src.teltonika_http.util.dependencies import db_dep, broker_service_dep
+from src.teltonika_http.util.etag import make_etag, etag_matches, not_modified, set_etag
 from src.teltonika_http.services.auth import current_user_dep
-from src.teltonika_http.util.dtos import TransportDto, TransportListDto
+from src.teltonika_http.infra.db.queries.count_provider import CountStrategy
+from src.teltonika_http.util.dtos import (
+    TransportDto, TransportListDto, TransportListCursorDto, TransportLookupRequestDto, TransportLookupDto,
+    TransportWithSensorsDto, TransportSearchDto, TransportAutocompleteDto
+)
 
 
 logger = logging.getLogger("TransportRouter")
@@ -16,32 +21,119 @@ router = APIRouter(
 )
 
 
-@router.get("/by-imei/{imei}")
+@router.get("/by-imei/{imei}", response_model=TransportWithSensorsDto | TransportDto)
 async def read_transport(
     imei: str, 
     db: db_dep,
-    _: current_user_dep
+    broker: broker_service_dep,
+    response: Response,
+    _: current_user_dep,
+    include: list[TransportInclude] = Query([]),
+    if_none_match: str | None = Header(None),
+):
+    """include=sensors — вместе с датчиками транспорта."""
+    if TransportInclude.sensors in include:
+        # Датчики пишет сторонний процесс мимо версии таблицы — без ETag
+        return await TransportService(db, broker).get_details(imei, include_sensors=True)
+
+    # ETag зависит только от версии таблицы: 304 отдаётся без запроса в Postgres
+    version = await broker.get_table_version("transports")
+    etag = make_etag("transport", version, imei)
+    if etag_matches(if_none_match, etag, allow_wildcard=False):
+        return not_modified(etag)
+
+    # ETag не говорит, существует ли IMEI: "*" учитывается только после
+    # get_details, иначе для неизвестного IMEI был бы 304 вместо 404
+    transport = await TransportService(db, broker).get_details(imei)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return transport
+
+
+@router.get("/search", response_model=TransportSearchDto)
+async def search_transports(
+    db: db_dep,
+    _: current_user_dep,
+    q: str = Query(..., min_length=1, max_length=150),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Поиск по части имени (pg_trgm), самые похожие — первыми."""
+    return await TransportService(db).search(q.strip(), limit)
+
+
+@router.get("/autocomplete", response_model=TransportAutocompleteDto)
+async def autocomplete_transports(
+    db: db_dep,
+    _: current_user_dep,
+    prefix: str = Query(..., min_length=1, max_length=150),
+    limit: int = Query(10, ge=1, le=50),
 ):
-    return await TransportService(db) \
-        .get_details(imei)
+    """Имена, начинающиеся с prefix (без учёта регистра), из индекса в памяти воркера."""
+    return await TransportService(db).autocomplete(prefix, limit)
 
 
 @router.post("/", response_model=TransportDto)
 async def create_transport(
     db: db_dep,
     transport: TransportDto,
+    broker: broker_service_dep,
     _: current_user_dep
 ):
-    await TransportService(db).create(transport)
+    await TransportService(db, broker).create(transport)
 
     return Response(status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/", response_model=TransportListDto)
+@router.get("/", response_model=TransportListDto | TransportListCursorDto)
 async def get_all(
     db: db_dep,
     _: current_user_dep,
     page_size: int,
-    page_num: int,
+    broker: broker_service_dep,
+    response: Response,
+    page_num: int | None = None,
+    cursor: str | None = None,
+    count: CountStrategy = CountStrategy.exact,
+    include: list[TransportInclude] = Query([]),
+    if_none_match: str | None = Header(None),
+):
+    """
+    Список транспорта.
+
+    Передан page_num — старый режим OFFSET (total_pages/total_elements).
+    count выбирает, как считать total_elements: exact, cached (TTL-кеш
+    воркера) или estimated (оценка планировщика Postgres).
+    Иначе — keyset-пагинация: первая страница без cursor, следующие —
+    с next_cursor из предыдущего ответа.
+
+    include=sensors добавляет датчики: один дополнительный запрос на
+    страницу (selectinload), независимо от её размера.
+    """
+    include_sensors = TransportInclude.sensors in include
+    if include_sensors:
+        # Датчики пишет сторонний процесс мимо версии таблицы — без ETag
+        if page_num is not None:
+            return await TransportService(db).get_all(page_size, page_num, count, include_sensors=True)
+        return await TransportService(db).get_all_cursor(page_size, cursor, include_sensors=True)
+
+    version = await broker.get_table_version("transports")
+    etag = make_etag("transports", version, page_size, page_num, cursor, count.value)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
+    if page_num is not None:
+        return await TransportService(db).get_all(page_size, page_num, count)
+    return await TransportService(db).get_all_cursor(page_size, cursor)
+
+
+@router.post("/lookup", response_model=TransportLookupDto)
+async def lookup_transports(
+    db: db_dep,
+    broker: broker_service_dep,
+    body: TransportLookupRequestDto,
+    _: current_user_dep
 ):
-    return await TransportService(db).get_all(page_size, page_num)
+    """Записи транспорта вместе с текущим соединением для списка IMEI."""
+    return await TransportService(db, broker).lookup(body.imeis)
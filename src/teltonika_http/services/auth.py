@@ -15,6 +15,9 @@ from src.teltonika_http.infra.db.queries import UserOrm
 from src.teltonika_http.util.dtos import UserDto, CurrentUserDto
 from src.teltonika_http import config
 from src.teltonika_http.util.exceptions import AppError
+from src.teltonika_http.util.cache import MISSING
+from src.teltonika_http.services.user_cache import user_cache
+from src.teltonika_http.services.password_hasher import password_hasher
 
 logger = logging.getLogger(__name__)
 
@@ -105,18 +108,17 @@ class AuthService:
     async def refresh(refresh_token: str) -> dict:
         
         # Логируем факт операции, без самого токена
-        logger.info(f"Refreshing access token using refresh token: {refresh_token}")
+        logger.debug("Refreshing access token")
 
         if not AuthService.__refresh_token_valid(refresh_token):
             raise TokenExpiredException
 
         if decoded_refresh_token := AuthService.decode_token(refresh_token):
-            print(decoded_refresh_token)
             access_token, new_refresh = AuthService.__create_token_pair(
                 email=decoded_refresh_token["sub"],
                 id=decoded_refresh_token["id"],
             )
-            logger.info("Access token refreshed successfully")
+            logger.debug("Access token refreshed successfully")
             return {
                 "access_token": access_token,
                 "refresh_token": new_refresh,
@@ -135,16 +137,24 @@ class AuthService:
         if not email or not user_id:
             logger.warning("Access token payload is missing required claims (sub/id)")
             raise NotValidatedException()
-        user = UserOrm().get_first(db, email=email, id=user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        if not user.is_active:
+
+        cached = user_cache.get(user_id)
+        if cached is not MISSING and cached[0] == email:
+            is_active = cached[1]
+        else:
+            user = await UserOrm().get_first(db, email=email, id=user_id)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+            is_active = user.is_active
+            user_cache.set(user_id, (email, is_active))
+
+        if not is_active:
             raise HTTPException(status_code=400, detail="User inactive")
         return CurrentUserDto(email=email, id=user_id)
 
     @staticmethod
     def __create_token_pair(**kwargs):
-        logger.debug(f"Creating token pair for user_id={kwargs.get('id')} email={kwargs.get('email')}")
+        logger.debug("Creating token pair for user_id=%s email=%s", kwargs.get('id'), kwargs.get('email'))
         access_token = AuthService.create_access_token(
             {"sub": kwargs['email'], "id": kwargs['id']},
             timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -153,37 +163,39 @@ class AuthService:
             {"sub": kwargs['email'], "id": kwargs['id']},
             timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
         )
-        logger.info("Token pair created")
+        logger.debug("Token pair created")
         return access_token, refresh_token
 
     @staticmethod
-    def get_token(form_data: OAuth2PasswordRequestForm, db: db_dep) -> dict:
-        logger.info(f"Issuing token via password grant for username={form_data.username}")
-        user = AuthService.authenticate_user(form_data.username, form_data.password, db)
+    async def get_token(form_data: OAuth2PasswordRequestForm, db: db_dep) -> dict:
+        logger.debug("Issuing token via password grant for username=%s", form_data.username)
+        user = await AuthService.authenticate_user(form_data.username, form_data.password, db)
         if not user:
-            logger.warning(f"Could not validate user: username={form_data.username}")
+            logger.warning("Could not validate user: username=%s", form_data.username)
             raise NotValidatedException()
 
         access_token, refresh_token = AuthService.__create_token_pair(email=user.email, id=user.id)
-        logger.info(f"Token issued for username={form_data.username}")
+        logger.debug("Token issued for username=%s", form_data.username)
         return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "Bearer"}
 
     @staticmethod
-    def authenticate_user(username: str, password: str, db) -> bool | UserModel:
-        logger.debug(f"Authenticating username={username}")
-        user = UserOrm().get_first(session_factory=db, username=username)
+    async def authenticate_user(username: str, password: str, db) -> bool | UserModel:
+        logger.debug("Authenticating username=%s", username)
+        user = await UserOrm().get_first(session_factory=db, username=username)
         if not user:
-            logger.warning(f"User not found: {username}")
+            logger.warning("User not found: %s", username)
             return False
-        if not AuthService.verify_password(password, user.hashed_password):
-            logger.warning(f"Invalid password for username={username}")
+        if not await password_hasher.run(AuthService.verify_password, password, user.hashed_password):
+            logger.warning("Invalid password for username=%s", username)
             return False
-        logger.info(f"User authenticated: {username}")
+        logger.debug("User authenticated: %s", username)
         return user
 
     @staticmethod
     def hash_password(password: str) -> str:
-        return bcrypt.hashpw(str.encode(password), bcrypt.gensalt()).decode(encoding="utf-8")
+        return bcrypt.hashpw(
+            str.encode(password), bcrypt.gensalt(rounds=config.settings.BCRYPT_ROUNDS)
+        ).decode(encoding="utf-8")
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -216,7 +228,7 @@ class AuthService:
         if exp_dt.tzinfo is None:
             exp_dt = exp_dt.replace(tzinfo=timezone.utc)
         valid = now_utc < exp_dt
-        logger.debug(f"Refresh token valid={valid} (now={now_utc}, exp={exp})")
+        logger.debug("Refresh token valid=%s (now=%s, exp=%s)", valid, now_utc, exp)
         if valid:
             return valid
         return False
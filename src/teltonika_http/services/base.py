@@ -12,5 +12,5 @@ class BaseService(ABC):
     
     def _handle_error(self, e: Exception):
         """Общий метод обработки внутренних ошибок"""
-        self.logger.error(f"Error occurred: {e}")
+        self.logger.error("Error occurred: %s", e)
         raise e
\ No newline at end of file
@@ -1,36 +1,157 @@
+import asyncio
 from datetime import datetime
+import heapq
+import itertools
 import logging
+import zlib
 
 from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.services.connection_events import CONNECTION_EVENTS_CHANNEL
 
 
 logger = logging.getLogger("BrokerService")
 
 
 class BrokerService:
-    def __init__(self, broker: RedisClient):
+    """
+    Ключи соединений. При index_shards > 1 индекс активных соединений
+    делится на шарды, а ключи получают hash tag шарда:
+    connection:{c3}:<imei> и connections:active:{c3} лежат в одном слоте
+    Redis Cluster, поэтому обновление хеша и индекса остаётся атомарным.
+    """
+    def __init__(self, broker: RedisClient, index_shards: int = 1, connection_ttl: int | None = None):
         self._broker = broker
+        # TTL хеша соединения, продлевается при каждом update_last_seen
+        self._connection_ttl = connection_ttl
         self._prefix = "connection"
+        # Sorted set активных IMEI, score = last_seen (unix timestamp)
+        self._index = "connections:active"
+        self._shards = max(index_shards, 1)
+
+    def _tag(self, imei: str) -> str:
+        return f"{{c{zlib.crc32(imei.encode()) % self._shards}}}"
+
+    def connection_key(self, imei: str) -> str:
+        if self._shards == 1:
+            return f"{self._prefix}:{imei}"
+        return f"{self._prefix}:{self._tag(imei)}:{imei}"
+
+    def index_key(self, imei: str) -> str:
+        if self._shards == 1:
+            return self._index
+        return f"{self._index}:{self._tag(imei)}"
+
+    def index_keys(self) -> list[str]:
+        if self._shards == 1:
+            return [self._index]
+        return [f"{self._index}:{{c{shard}}}" for shard in range(self._shards)]
 
     async def get_connections(self, imei_list: list[str]):
-        logger.debug(f"requesting {imei_list} if exists: {self._prefix}")
+        logger.debug("requesting %s keys if exists: %s", len(imei_list), self._prefix)
         return await self._broker.keys_exist(
-            [f"{self._prefix}:{imei}" for imei in imei_list]
+            [self.connection_key(imei) for imei in imei_list]
         )
 
     async def remove_connection(self, imei: str):
-        return await self._broker.delete(f"{self._prefix}:{imei}")
+        res = await self._broker.delete(self.connection_key(imei))
+        await self._broker.zrem(self.index_key(imei), imei)
+        await self._publish_event("disconnect", imei, datetime.timestamp(datetime.now()))
+        return res
     
     async def get_connection_details(self, imei: str):
-        return await self._broker.hgetall(f"{self._prefix}:{imei}")
+        return await self._broker.hgetall(self.connection_key(imei))
     
+    async def get_connections_details(self, imei_list: list[str]) -> list[dict]:
+        return await self._broker.hgetall_many(
+            [self.connection_key(imei) for imei in imei_list]
+        )
+
+    async def get_last_seen(self, imei: str):
+        return await self._broker.hget(self.connection_key(imei), "last_seen")
+
+    async def get_table_version(self, table: str) -> str:
+        """
+        Версия таблицы, общая для всех воркеров (для ETag): epoch и счётчик
+        изменений. epoch меняется, если счётчик пропал из Redis, — ETag,
+        выданные до этого, не совпадут с новыми.
+        """
+        epoch, counter = await self._broker.version_counter(f"table_version:{table}")
+        return f"{epoch}.{counter}"
+
+    async def bump_table_version(self, table: str) -> str:
+        epoch, counter = await self._broker.version_counter(f"table_version:{table}", 1)
+        return f"{epoch}.{counter}"
+
     async def connection_exists(self, imei: str) -> bool:
         ...
 
     async def update_last_seen(self, imei: str):
         ts_now = datetime.timestamp(datetime.now())
-        await self._broker.hset_kv(
-            f"{self._prefix}:{imei}",
+        # HSET + ZADD + PUBLISH одним скриптом
+        await self._broker.touch_indexed_hash(
+            self.connection_key(imei),
             "last_seen",
-            ts_now
-        )
\ No newline at end of file
+            ts_now,
+            self.index_key(imei),
+            imei,
+            channel=CONNECTION_EVENTS_CHANNEL,
+            message={"type": "last_seen", "imei": imei, "ts": ts_now},
+            ttl=self._connection_ttl,
+        )
+
+    async def reap_stale(self, index: str, cutoff: float, limit: int) -> tuple[int, list[tuple[str, float]]]:
+        """
+        До limit соединений шарда index с last_seen <= cutoff: удалить хеш и
+        запись индекса. Возвращает (сколько выбрано, удалённые (IMEI, last_seen)).
+        """
+        members = await self._broker.zrangebyscore(index, "-inf", cutoff, offset=0, count=limit)
+        reaped = await self._broker.reap_indexed(
+            index, [self.connection_key(imei) for imei in members], members, cutoff
+        )
+        return len(members), reaped
+
+    async def publish(self, channel: str, message):
+        return await self._broker.publish(channel, message)
+
+    async def publish_disconnects(self, removed: list[tuple[str, float]]):
+        """События disconnect для (IMEI, last_seen) одним pipeline."""
+        await self._broker.publish_many(
+            CONNECTION_EVENTS_CHANNEL,
+            [{"type": "disconnect", "imei": imei, "ts": ts} for imei, ts in removed],
+        )
+
+    async def _publish_event(self, event_type: str, imei: str, ts: float):
+        await self._broker.publish(
+            CONNECTION_EVENTS_CHANNEL,
+            {"type": event_type, "imei": imei, "ts": ts}
+        )
+
+    async def get_active(
+        self, page_size: int, offset: int = 0, seen_after: float | None = None
+    ) -> list[str]:
+        """IMEI активных соединений из индекса, начиная с самых свежих по last_seen."""
+        min_score = seen_after if seen_after is not None else "-inf"
+        if self._shards == 1:
+            return await self._broker.zrevrangebyscore(
+                self._index,
+                min_score=min_score,
+                offset=offset,
+                count=page_size,
+            )
+
+        # Из каждого шарда первые offset + page_size, слияние по убыванию last_seen
+        pages = await asyncio.gather(*(
+            self._broker.zrevrangebyscore(
+                index, min_score=min_score, offset=0, count=offset + page_size, withscores=True
+            )
+            for index in self.index_keys()
+        ))
+        merged = heapq.merge(*pages, key=lambda item: -item[1])
+        return [imei for imei, _ in itertools.islice(merged, offset, offset + page_size)]
+
+    async def count_active(self, seen_after: float | None = None) -> int:
+        min_score = seen_after if seen_after is not None else "-inf"
+        counts = await asyncio.gather(*(
+            self._broker.zcount(index, min_score=min_score) for index in self.index_keys()
+        ))
+        return sum(counts)
@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+import enum
 import logging
 
 from .base import BaseService
@@ -8,6 +10,11 @@ from src.teltonika_http.util.dtos import ConnectionListDto
 logger = logging.getLogger("ConnectionService")
 
 
+class ConnectionSource(str, enum.Enum):
+    db = "db"        # обход таблицы transports + EXISTS в Redis
+    index = "index"  # sorted set активных соединений в Redis
+
+
 class ConnectionService(BaseService):
 
     def __init__(self, db_session, broker):
@@ -24,45 +31,44 @@ class ConnectionService(BaseService):
             db_page_offset = offset
             connections = []
             # Get records of transport from DB
-            item_offset_list = self.db_orm().all_offset(
-                self.db, db_page_size, db_page_offset
+            item_offset_list = await self.db_orm().all_offset(
+                self.db, db_page_size, db_page_offset, count_strategy=None
             )
 
-            logger.debug(f"Data from DB ({len(item_offset_list.data)} items): {item_offset_list.data}")
+            logger.debug("Data from DB: %s items", len(item_offset_list.data))
 
             # Filter given recods by connection status
             active_connections = await self.broker.get_connections(
                 [tr.imei for tr in item_offset_list.data]
             )
 
-            logger.debug(f"Data from Redis ({len(active_connections)} items): {active_connections}")
+            logger.debug("Data from Redis: %s active", sum(active_connections))
 
             # Save all active connections by it's IMEI
             for transport, is_active in zip(item_offset_list.data, active_connections):
-                logger.debug(f"Result after initial request: {transport.imei=}, {is_active=}")
                 if is_active:
                     connections.append(transport.imei)
 
             # Iterate until connections == page size or records end
-            logger.debug(f"Should iterate in while? {len(connections) < page_size}, {item_offset_list.has_next}")
+            logger.debug("Should iterate in while? %s, %s", len(connections) < page_size, item_offset_list.has_next)
             while len(connections) < page_size and item_offset_list.has_next:
                 db_page_size = page_size - len(connections)
                 db_page_offset = item_offset_list.offset
-                logger.debug(f"while iteration: {db_page_size=}, {db_page_offset=}")
+                logger.debug("while iteration: db_page_size=%r, db_page_offset=%r", db_page_size, db_page_offset)
 
                 # Get records of transport from DB
-                item_offset_list = self.db_orm().all_offset(
-                    self.db, db_page_size, db_page_offset
+                item_offset_list = await self.db_orm().all_offset(
+                    self.db, db_page_size, db_page_offset, count_strategy=None
                 )
 
-                logger.debug(f"{item_offset_list.data}")
+                logger.debug("Data from DB: %s items", len(item_offset_list.data))
 
                 # Filter given recods by connection status
                 active_connections = await self.broker.get_connections(
                     [tr.imei for tr in item_offset_list.data]
                 )
 
-                logger.debug(f"{active_connections}")
+                logger.debug("Data from Redis: %s active", sum(active_connections))
 
                 # Save all active connections by it's IMEI
                 for transport, is_active in zip(item_offset_list.data, active_connections):
@@ -76,3 +82,73 @@ class ConnectionService(BaseService):
 
         except Exception as e:
             self._handle_error(e)
+
+    async def get_all_indexed(
+        self,
+        page_size: int,
+        offset: int,
+        seen_within: int | None = None,
+    ) -> ConnectionListDto:
+        """
+        Активные соединения прямо из индекса по last_seen, без обращения к БД:
+        O(log n + page_size) независимо от размера парка.
+
+        seen_within — оставить только соединения, активные за последние N минут.
+        """
+        if page_size <= 0:
+            raise ValueError("page_size must be > 0")
+        if offset < 0:
+            raise ValueError("offset must be >= 0")
+        try:
+            seen_after = None
+            if seen_within is not None:
+                seen_after = datetime.timestamp(datetime.now() - timedelta(minutes=seen_within))
+
+            connections = await self.broker.get_active(page_size, offset, seen_after)
+            total = await self.broker.count_active(seen_after)
+
+            return ConnectionListDto(
+                data=connections,
+                offset=offset + len(connections),
+                total_elements=total
+            )
+
+        except Exception as e:
+            self._handle_error(e)
+
+    async def get_all_cursor(
+        self,
+        page_size: int,
+        cursor: str | None,
+    ) -> ConnectionListDto:
+        """
+        То же, что get_all, но по keyset-курсору (imei последней просмотренной
+        записи). Курсор указывает на последнюю проверенную запись транспорта,
+        а не на последнее активное соединение, чтобы не сканировать повторно.
+        """
+        try:
+            connections = []
+            has_next = True
+            while len(connections) < page_size and has_next:
+                item_cursor_list = await self.db_orm().all_keyset(
+                    self.db, page_size - len(connections), cursor
+                )
+
+                active_connections = await self.broker.get_connections(
+                    [tr.imei for tr in item_cursor_list.data]
+                ) or []
+
+                for transport, is_active in zip(item_cursor_list.data, active_connections):
+                    if is_active:
+                        connections.append(transport.imei)
+
+                has_next = item_cursor_list.has_next
+                cursor = item_cursor_list.next_cursor
+
+            return ConnectionListDto(
+                data=connections,
+                next_cursor=cursor if has_next else None
+            )
+
+        except Exception as e:
+            self._handle_error(e)
@@ -0,0 +1,96 @@
+import asyncio
+from collections import OrderedDict
+import itertools
+import logging
+
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+
+
+logger = logging.getLogger("ConnectionEvents")
+
+
+# Канал событий соединений: {"type": "connect" | "disconnect" | "last_seen", "imei": ..., "ts": ...}
+CONNECTION_EVENTS_CHANNEL = "connections:events"
+
+
+class EventSubscription:
+    """
+    Ограниченная очередь событий одного клиента.
+
+    last_seen-события по одному IMEI схлопываются (в очереди остаётся
+    последнее), connect/disconnect не схлопываются. При переполнении
+    выбрасываются самые старые события, счётчик dropped растёт.
+    """
+    def __init__(self, maxsize: int, imeis: set[str] | None = None):
+        self._maxsize = maxsize
+        self._imeis = imeis
+        self._pending: OrderedDict = OrderedDict()
+        self._ready = asyncio.Event()
+        self._seq = itertools.count()
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, event: dict) -> None:
+        if self._imeis is not None and event.get("imei") not in self._imeis:
+            return
+        if event.get("type") == "last_seen":
+            key = ("last_seen", event.get("imei"))
+            if key in self._pending:
+                self.coalesced += 1
+        else:
+            key = ("event", next(self._seq))
+        self._pending[key] = event
+        while len(self._pending) > self._maxsize:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+        self._ready.set()
+
+    async def get(self, timeout: float | None = None) -> dict | None:
+        """Следующее событие или None, если за timeout ничего не пришло."""
+        if not self._pending:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        _, event = self._pending.popitem(last=False)
+        return event
+
+
+class ConnectionEventHub:
+    """
+    Одна подписка на Redis на воркер, раздаваемая любому числу клиентов.
+    """
+    def __init__(self, channel: str = CONNECTION_EVENTS_CHANNEL):
+        self._channel = channel
+        self._subscribers: set[EventSubscription] = set()
+        self._task: asyncio.Task | None = None
+
+    async def start(self, broker: RedisClient) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = await broker.subscribe(self._channel, self._on_message)
+
+    def subscribe(self, maxsize: int, imeis: set[str] | None = None) -> EventSubscription:
+        sub = EventSubscription(maxsize, imeis)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: EventSubscription) -> None:
+        self._subscribers.discard(sub)
+        if sub.dropped:
+            logger.info("Stream client closed, dropped=%s coalesced=%s", sub.dropped, sub.coalesced)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def _on_message(self, message) -> None:
+        if not isinstance(message, dict):
+            logger.warning("Malformed connection event: %r", message)
+            return
+        for sub in self._subscribers:
+            sub.put(message)
+
+
+connection_event_hub = ConnectionEventHub()
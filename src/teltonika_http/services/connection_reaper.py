@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime
+import logging
+import time
+
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.services.broker import BrokerService
+from src.teltonika_http.util.metrics import REAPER_REAPED, REAPER_RUN_SECONDS
+
+
+logger = logging.getLogger("ConnectionReaper")
+
+
+REAPER_LOCK = "lock:connection-reaper"
+
+
+class ConnectionReaper:
+    """
+    Фоновая очистка устаревших соединений по индексу connections:active
+    (score = last_seen) вместо SCAN всего keyspace.
+
+    Проход: для каждого шарда индекса выбираются пачки по batch_size
+    с last_seen <= now - stale_after и удаляются скриптом (хеш + запись
+    индекса, с повторной проверкой score). Темп — не больше max_per_second
+    удалений. Проход выполняет один воркер кластера: блокировка в Redis,
+    продлеваемая после каждой пачки — долгий проход не теряет её посередине.
+    """
+    def __init__(
+        self,
+        broker: RedisClient,
+        service: BrokerService,
+        stale_after: float = 300,
+        interval: float = 60,
+        batch_size: int = 500,
+        max_per_second: float = 5000,
+    ):
+        self._broker = broker
+        self._service = service
+        self.stale_after = stale_after
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_per_second = max_per_second
+        self.lock_ttl = max(interval, 30)
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.reaped_total = 0
+        self.last_run: dict | None = None
+
+    async def reap_once(self, now: float | None = None, lock_token: str | None = None) -> dict:
+        """
+        Один проход. С lock_token блокировка REAPER_LOCK продлевается после
+        каждой пачки; если она уже не наша, проход прерывается.
+        Возвращает статистику прохода.
+        """
+        started = time.perf_counter()
+        cutoff = (now if now is not None else datetime.timestamp(datetime.now())) - self.stale_after
+        reaped = 0
+        batches = 0
+        lock_lost = False
+        for index in self._service.index_keys():
+            while not lock_lost:
+                batch_started = time.perf_counter()
+                selected, removed = await self._service.reap_stale(index, cutoff, self.batch_size)
+                if not selected:
+                    break
+                batches += 1
+                reaped += len(removed)
+                # ts события — last_seen удалённого соединения
+                await self._service.publish_disconnects(removed)
+                if lock_token is not None and not await self._broker.extend_lock(
+                    REAPER_LOCK, lock_token, self.lock_ttl
+                ):
+                    logger.warning("Reaper lock lost, stopping the pass")
+                    lock_lost = True
+                    break
+                if selected < self.batch_size:
+                    break
+                # Ограничение темпа: пачка не быстрее batch_size / max_per_second
+                budget = selected / self.max_per_second
+                elapsed = time.perf_counter() - batch_started
+                if elapsed < budget:
+                    await asyncio.sleep(budget - elapsed)
+
+        duration = time.perf_counter() - started
+        self.runs += 1
+        self.reaped_total += reaped
+        self.last_run = {
+            "reaped": reaped,
+            "batches": batches,
+            "duration": duration,
+            "cutoff": cutoff,
+            "finished_at": datetime.timestamp(datetime.now()),
+        }
+        REAPER_REAPED.inc(reaped)
+        REAPER_RUN_SECONDS.observe(duration)
+        logger.info("Reaped %s stale connections in %.3fs (%s batches)", reaped, duration, batches)
+        return self.last_run
+
+    async def run_locked(self) -> dict | None:
+        """Проход под блокировкой; None — проход уже выполняет другой воркер."""
+        token = await self._broker.acquire_lock(REAPER_LOCK, ttl=self.lock_ttl)
+        if token is None:
+            return None
+        try:
+            return await self.reap_once(lock_token=token)
+        finally:
+            await self._broker.release_lock(REAPER_LOCK, token)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_locked()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Reaper pass failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "runs": self.runs,
+            "reaped_total": self.reaped_total,
+            "last_run": self.last_run,
+        }
@@ -0,0 +1,388 @@
+"""
+Фоновое обслуживание ключей Redis: проход SCAN по шаблону страницами
+(ScanPage) с операцией над каждой страницей.
+
+ - курсор и прогресс сохраняются в Redis после каждой страницы
+   (maintenance:job:{id}) — задачу можно продолжить после рестарта;
+ - темп ограничен бюджетом ops/sec;
+ - задержка Redis меряется PING'ом, при p99 выше потолка бюджет
+   уменьшается вдвое и плавно восстанавливается (AIMD);
+ - отмена и пауза — через статус в Redis, видны любому воркеру;
+   статус меняется только compare-and-set'ом (HSET_IF_FIELD_IN);
+ - во время паузы между страницами задача обновляет heartbeat.
+"""
+import asyncio
+from collections import deque
+from datetime import datetime
+from enum import Enum
+import json
+import logging
+import time
+import uuid
+
+from src.teltonika_http.infra.broker.codecs import get_codec
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.util.exceptions import AppError
+
+
+logger = logging.getLogger("MaintenanceEngine")
+
+
+JOB_PREFIX = "maintenance:job"
+# Служебные ключи самого движка и блокировки не обрабатываются
+PROTECTED_PREFIXES = ("maintenance:", "lock:")
+# Задача в статусе running без heartbeat дольше этого считается прерванной
+STALE_HEARTBEAT = 60.0
+# Как часто обновлять updated_at, пока задача ждёт бюджет ops/sec:
+# пауза между страницами может длиться дольше STALE_HEARTBEAT
+HEARTBEAT_INTERVAL = STALE_HEARTBEAT / 4
+
+
+class MaintenanceKind(str, Enum):
+    delete = "delete"
+    reencode = "reencode"
+    migrate_prefix = "migrate_prefix"
+    stats = "stats"
+
+
+class JobStatus(str, Enum):
+    running = "running"
+    pausing = "pausing"
+    paused = "paused"
+    cancelling = "cancelling"
+    cancelled = "cancelled"
+    interrupted = "interrupted"
+    failed = "failed"
+    done = "done"
+
+
+RESUMABLE = (JobStatus.paused, JobStatus.interrupted, JobStatus.failed)
+# Статусы задачи, которая выполняется (или должна) в каком-то воркере
+ACTIVE = (JobStatus.running, JobStatus.pausing, JobStatus.cancelling)
+
+
+class MaintenanceJobNotFoundException(AppError):
+    def __init__(
+            self,
+            code: str = "MAINTENANCE_JOB_NOT_FOUND",
+            message: str = "Maintenance job not found",
+            status_code: int = 404
+        ):
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+class MaintenanceJobStateException(AppError):
+    def __init__(
+            self,
+            code: str = "MAINTENANCE_JOB_STATE",
+            message: str = "Operation is not allowed in the current job state",
+            status_code: int = 409
+        ):
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+class LatencyGuard:
+    """
+    Скользящее окно задержек PING и бюджет ops/sec по AIMD:
+    p99 выше потолка — бюджет /2 (не ниже min_rate), иначе +10% до max_rate.
+    """
+    def __init__(self, ceiling_ms: float, max_rate: float, min_rate: float, window: int = 200):
+        self.ceiling_ms = ceiling_ms
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = max_rate
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, latency_ms: float) -> None:
+        self._samples.append(latency_ms)
+        if self.p99() > self.ceiling_ms:
+            self.rate = max(self.min_rate, self.rate / 2)
+        else:
+            self.rate = min(self.max_rate, self.rate * 1.1)
+
+    def p99(self) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    def over_ceiling(self) -> bool:
+        return self.p99() > self.ceiling_ms
+
+
+class MaintenanceEngine:
+    def __init__(
+        self,
+        broker: RedisClient,
+        ops_per_second: float = 2000,
+        min_ops_per_second: float = 100,
+        page_size: int = 500,
+        p99_ceiling_ms: float = 5.0,
+    ):
+        self._broker = broker
+        self.ops_per_second = ops_per_second
+        self.min_ops_per_second = min_ops_per_second
+        self.page_size = page_size
+        self.p99_ceiling_ms = p99_ceiling_ms
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"{JOB_PREFIX}:{job_id}"
+
+    async def get(self, job_id: str) -> dict:
+        raw = await self._broker.hgetall(self._key(job_id))
+        if not raw:
+            raise MaintenanceJobNotFoundException()
+        return self._decode_state(job_id, raw)
+
+    @staticmethod
+    def _decode_state(job_id: str, raw: dict) -> dict:
+        return {
+            "id": job_id,
+            "kind": raw["kind"],
+            "pattern": raw["pattern"],
+            "params": json.loads(raw.get("params") or "{}"),
+            "status": raw["status"],
+            "cursor": int(raw.get("cursor", 0)),
+            "processed": int(raw.get("processed", 0)),
+            "affected": int(raw.get("affected", 0)),
+            "ops_per_second": float(raw.get("ops_per_second", 0)),
+            "p99_ms": float(raw.get("p99_ms", 0)),
+            "started_at": float(raw["started_at"]),
+            "updated_at": float(raw.get("updated_at", raw["started_at"])),
+            "error": raw.get("error") or None,
+            "result": json.loads(raw.get("result") or "{}"),
+        }
+
+    async def start(
+        self,
+        kind: MaintenanceKind,
+        pattern: str,
+        params: dict | None = None,
+        ops_per_second: float | None = None,
+        page_size: int | None = None,
+    ) -> dict:
+        params = dict(params or {})
+        self._validate(kind, pattern, params)
+        job_id = uuid.uuid4().hex[:12]
+        now = datetime.timestamp(datetime.now())
+        await self._broker.hset(self._key(job_id), {
+            "kind": kind.value,
+            "pattern": pattern,
+            "params": json.dumps({
+                **params,
+                "ops_per_second": ops_per_second or self.ops_per_second,
+                "page_size": page_size or self.page_size,
+            }),
+            "status": JobStatus.running.value,
+            "cursor": 0,
+            "processed": 0,
+            "affected": 0,
+            "started_at": now,
+            "updated_at": now,
+            "result": "{}",
+        })
+        self._spawn(job_id)
+        return await self.get(job_id)
+
+    def _validate(self, kind: MaintenanceKind, pattern: str, params: dict) -> None:
+        if self._broker.cluster:
+            # Постраничный SCAN (scan_page) есть только у одиночного Redis
+            raise ValueError("maintenance jobs are not supported in cluster mode")
+        if kind == MaintenanceKind.reencode:
+            get_codec(params.get("from_codec", "json"))
+            get_codec(params.get("to_codec", "json"))
+        if kind == MaintenanceKind.migrate_prefix:
+            from_prefix, to_prefix = params.get("from_prefix"), params.get("to_prefix")
+            if not from_prefix or not to_prefix:
+                raise ValueError("migrate_prefix requires from_prefix and to_prefix")
+            if not pattern.startswith(from_prefix):
+                raise ValueError("pattern must start with from_prefix")
+            if to_prefix.startswith(from_prefix):
+                # переименованные ключи снова попадали бы под шаблон
+                raise ValueError("to_prefix must not start with from_prefix")
+
+    async def resume(self, job_id: str, ops_per_second: float | None = None) -> dict:
+        """Продолжить с сохранённого курсора; ops_per_second меняет бюджет задачи."""
+        state = await self.get(job_id)
+        status = JobStatus(state["status"])
+        stale = (
+            status == JobStatus.running
+            and job_id not in self._tasks
+            and datetime.timestamp(datetime.now()) - state["updated_at"] > STALE_HEARTBEAT
+        )
+        if status not in RESUMABLE and not stale:
+            raise MaintenanceJobStateException()
+        params = state["params"]
+        if ops_per_second:
+            params["ops_per_second"] = ops_per_second
+        # Два одновременных resume: задачу запустит только первый
+        if not await self._transition(
+            job_id, (status,), status=JobStatus.running.value, error="", params=json.dumps(params)
+        ):
+            raise MaintenanceJobStateException()
+        self._spawn(job_id)
+        return await self.get(job_id)
+
+    async def cancel(self, job_id: str) -> dict:
+        return await self._request(job_id, JobStatus.cancelling, JobStatus.cancelled)
+
+    async def pause(self, job_id: str) -> dict:
+        return await self._request(job_id, JobStatus.pausing, JobStatus.paused)
+
+    async def _request(self, job_id: str, pending: JobStatus, final: JobStatus) -> dict:
+        """Задача, выполняющаяся в любом воркере, увидит статус на следующей странице."""
+        await self.get(job_id)
+        # Без CAS задача, завершившаяся между чтением статуса и записью,
+        # осталась бы навсегда в pausing/cancelling
+        if await self._transition(job_id, (JobStatus.running,), status=pending.value):
+            return await self.get(job_id)
+        if final == JobStatus.cancelled and await self._transition(job_id, RESUMABLE, status=final.value):
+            return await self.get(job_id)
+        raise MaintenanceJobStateException()
+
+    async def shutdown(self) -> None:
+        """Остановить задачи воркера; они остаются продолжаемыми (interrupted)."""
+        for job_id, task in list(self._tasks.items()):
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            try:
+                await self._transition(job_id, ACTIVE, status=JobStatus.interrupted.value)
+            except Exception:
+                pass
+        self._tasks.clear()
+
+    def _spawn(self, job_id: str) -> None:
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _set(self, job_id: str, **fields) -> None:
+        await self._broker.hset(self._key(job_id), {
+            **fields, "updated_at": datetime.timestamp(datetime.now())
+        })
+
+    async def _transition(self, job_id: str, expected: tuple[JobStatus, ...], **fields) -> bool:
+        """Записать поля, только если статус всё ещё один из expected."""
+        return await self._broker.hset_if(
+            self._key(job_id), "status", [s.value for s in expected],
+            {**fields, "updated_at": datetime.timestamp(datetime.now())},
+        )
+
+    async def _sleep(self, job_id: str, delay: float) -> None:
+        """Пауза по бюджету ops/sec с heartbeat: живую задачу не сочтут прерванной."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + delay
+        while (left := deadline - loop.time()) > HEARTBEAT_INTERVAL:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await self._set(job_id)
+        await asyncio.sleep(max(left, 0))
+
+    async def _run(self, job_id: str) -> None:
+        state = await self.get(job_id)
+        params = state["params"]
+        kind = MaintenanceKind(state["kind"])
+        guard = LatencyGuard(
+            self.p99_ceiling_ms, params["ops_per_second"], self.min_ops_per_second
+        )
+        cursor = state["cursor"]
+        processed, affected, result = state["processed"], state["affected"], state["result"]
+        logger.info("Maintenance job %s (%s %s) running from cursor %s", job_id, kind.value, state["pattern"], cursor)
+        try:
+            while True:
+                status = JobStatus(await self._broker.hget(self._key(job_id), "status"))
+                if status == JobStatus.cancelling:
+                    await self._transition(job_id, (status,), status=JobStatus.cancelled.value)
+                    return
+                if status == JobStatus.pausing:
+                    await self._transition(job_id, (status,), status=JobStatus.paused.value)
+                    return
+                if status != JobStatus.running:
+                    # Задачу остановили (shutdown другого процесса) или подхватил другой воркер
+                    logger.info("Maintenance job %s stopped: status %s", job_id, status.value)
+                    return
+
+                page_started = time.perf_counter()
+                page = await self._broker.scan_page(cursor, match=state["pattern"], count=params["page_size"])
+                keys = [k for k in page.keys if not k.startswith(PROTECTED_PREFIXES)]
+                affected += await self._apply(kind, keys, params, result)
+                processed += page.returned
+                cursor = page.cursor
+
+                # Задержка Redis под нашей нагрузкой
+                ping_started = time.perf_counter()
+                await self._broker.ping()
+                guard.record((time.perf_counter() - ping_started) * 1000)
+
+                await self._set(
+                    job_id,
+                    cursor=cursor,
+                    processed=processed,
+                    affected=affected,
+                    result=json.dumps(result),
+                    ops_per_second=round(guard.rate, 1),
+                    p99_ms=round(guard.p99(), 3),
+                )
+                if not page.has_more:
+                    # Запрошенные пауза/отмена опоздали: задача уже завершена
+                    await self._transition(job_id, ACTIVE, status=JobStatus.done.value)
+                    logger.info("Maintenance job %s done: processed=%s affected=%s", job_id, processed, affected)
+                    return
+
+                # Бюджет ops/sec: страница из n ключей занимает не меньше n / rate
+                budget = max(page.returned, 1) / guard.rate
+                elapsed = time.perf_counter() - page_started
+                await self._sleep(job_id, budget - elapsed)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Maintenance job %s failed", job_id)
+            await self._transition(job_id, ACTIVE, status=JobStatus.failed.value, error=str(e))
+
+    async def _apply(self, kind: MaintenanceKind, keys: list[str], params: dict, result: dict) -> int:
+        if not keys:
+            return 0
+        if kind == MaintenanceKind.delete:
+            return await self._broker.unlink_by_type(keys, params.get("key_type", "hash"))
+
+        if kind == MaintenanceKind.migrate_prefix:
+            from_prefix, to_prefix = params["from_prefix"], params["to_prefix"]
+            return await self._broker.renamenx_many([
+                (key, to_prefix + key[len(from_prefix):]) for key in keys if key.startswith(from_prefix)
+            ])
+
+        if kind == MaintenanceKind.reencode:
+            source = get_codec(params.get("from_codec", "json"))
+            target = get_codec(params.get("to_codec", "json"))
+            types = await self._broker.types(keys)
+            strings = [k for k, t in zip(keys, types) if t == "string"]
+            items = []
+            for key, raw in zip(strings, await self._broker.get_raw_many(strings)):
+                if raw is None:
+                    continue
+                try:
+                    encoded = target.encode(source.decode(raw))
+                except Exception:
+                    # уже перекодирован (повтор после resume) или чужой формат
+                    result["skipped"] = result.get("skipped", 0) + 1
+                    continue
+                if encoded != raw:
+                    items.append((key, raw, encoded))
+            return await self._broker.replace_if_equal(items)
+
+        # stats: число ключей по типам и ключей без TTL
+        types = await self._broker.types(keys)
+        ttls = await self._broker.ttls(keys)
+        by_type = result.setdefault("types", {})
+        for key_type in types:
+            by_type[key_type] = by_type.get(key_type, 0) + 1
+        result["persistent"] = result.get("persistent", 0) + sum(1 for ttl in ttls if ttl == -1)
+        return 0
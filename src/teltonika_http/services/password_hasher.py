@@ -0,0 +1,117 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+from typing import Any, Callable
+
+import bcrypt
+
+from src.teltonika_http.config import settings
+from src.teltonika_http.util.exceptions import AppError
+
+
+logger = logging.getLogger("PasswordHasher")
+
+
+class HasherBusyException(AppError):
+    def __init__(
+            self, 
+            code: str = "SERVICE_BUSY", 
+            message: str = "Too many authentication requests, try again later", 
+            status_code: int = 503
+        ):
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt в отдельном ограниченном пуле потоков, чтобы не блокировать
+    event loop (bcrypt отпускает GIL на время хеширования).
+
+    Одновременно выполняется не больше max_workers операций, ещё max_queue
+    ждут своей очереди не дольше queue_timeout секунд. Всё сверх этого
+    сразу получает HasherBusyException (503).
+
+    Пул потоков и семафор создаются в start() (lifespan приложения) или при
+    первом вызове run(): после shutdown() объект можно запустить снова,
+    в том числе в другом event loop.
+    """
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, queue_timeout: float = 2.0):
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._pending = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="bcrypt")
+            self._slots = asyncio.Semaphore(self._max_workers)
+            self._pending = 0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        self.start()
+        if self._pending >= self._max_workers + self._max_queue:
+            self.rejected += 1
+            logger.warning("Password hasher queue is full, rejecting request")
+            raise HasherBusyException()
+
+        self._pending += 1
+        try:
+            slots, executor = self._slots, self._executor
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout=self._queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                logger.warning("Password hasher queue wait exceeded %ss", self._queue_timeout)
+                raise HasherBusyException()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, fn, *args)
+            finally:
+                slots.release()
+        finally:
+            self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """
+    Подобрать cost bcrypt, при котором одно хеширование занимает не больше target_ms
+    на этой машине. Каждый +1 к cost удваивает время, поэтому достаточно одного замера.
+    """
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=min_rounds))
+    base_ms = (time.perf_counter() - started) * 1000
+
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE,
+    queue_timeout=settings.PASSWORD_HASH_TIMEOUT,
+)
+
+
+if __name__ == "__main__":
+    import sys
+
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else 250.0
+    print(f"BCRYPT_ROUNDS={calibrate_rounds(target)}  # target {target:.0f} ms")
@@ -0,0 +1,128 @@
+import logging
+import math
+import time
+
+from src.teltonika_http.config import settings
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.infra.broker.scripts import register_script
+from src.teltonika_http.util.cache import MISSING, TTLCache
+from src.teltonika_http.util.exceptions import AppError
+
+
+logger = logging.getLogger("RateLimiter")
+
+
+# Атомарный token bucket. Время берётся из Redis (TIME), а не с узла,
+# чтобы воркеры на разных машинах с расхождением часов считали одинаково.
+# KEYS[1] — ключ корзины; ARGV: ёмкость, пополнение в секунду, стоимость запроса.
+# Возвращает {1|0, retry_after}; retry_after строкой — Lua-числа режутся до целых.
+TOKEN_BUCKET = register_script("token_bucket", """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+""")
+
+
+class RateLimitExceededException(AppError):
+    def __init__(
+            self,
+            retry_after: float = 1,
+            code: str = "RATE_LIMITED",
+            message: str = "Too many requests, try again later",
+            status_code: int = 429
+        ):
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+        self.headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+class TokenBucketLimiter:
+    """
+    Распределённый token bucket: состояние в Redis, общее для всех воркеров
+    и узлов. Ключ, получивший отказ, помнится локально до момента
+    пополнения (не дольше local_block) — повторные попытки отклоняются без
+    похода в Redis. Если Redis недоступен, запрос пропускается (fail-open).
+    """
+    def __init__(
+        self,
+        prefix: str,
+        capacity: float,
+        refill_rate: float,
+        local_block: float = 5.0,
+        local_size: int = 10000,
+    ):
+        self.prefix = prefix
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.local_block = local_block
+        self._blocked = TTLCache(maxsize=local_size, ttl=local_block)
+
+    async def hit(self, broker: RedisClient, key: str, cost: float = 1) -> float:
+        """0 — запрос разрешён, иначе через сколько секунд повторить."""
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not MISSING:
+            return blocked_until - time.monotonic()
+
+        try:
+            allowed, retry_after = await broker.run_script(
+                TOKEN_BUCKET,
+                keys=[f"{self.prefix}:{key}"],
+                args=[self.capacity, self.refill_rate, cost],
+            )
+        except Exception as e:
+            logger.warning("Rate limiter unavailable, allowing request: %s", e)
+            return 0
+
+        if int(allowed):
+            return 0
+        retry_after = float(retry_after)
+        if self.local_block > 0:
+            ttl = min(retry_after, self.local_block)
+            self._blocked.set(key, time.monotonic() + ttl, ttl=ttl)
+        return retry_after
+
+
+user_rate_limiter = TokenBucketLimiter(
+    "ratelimit:user",
+    settings.RATE_LIMIT_USER_CAPACITY,
+    settings.RATE_LIMIT_USER_REFILL,
+    local_block=settings.RATE_LIMIT_LOCAL_BLOCK,
+)
+ip_rate_limiter = TokenBucketLimiter(
+    "ratelimit:ip",
+    settings.RATE_LIMIT_IP_CAPACITY,
+    settings.RATE_LIMIT_IP_REFILL,
+    local_block=settings.RATE_LIMIT_LOCAL_BLOCK,
+)
+
+
+async def enforce_auth_limits(broker: RedisClient, ip: str, username: str | None = None) -> None:
+    """Лимит по IP, затем по имени пользователя. Отказ по IP не тратит токен пользователя."""
+    retry_after = await ip_rate_limiter.hit(broker, ip)
+    if retry_after > 0:
+        logger.warning("Rate limit exceeded for ip=%s", ip)
+        raise RateLimitExceededException(retry_after)
+
+    if username:
+        retry_after = await user_rate_limiter.hit(broker, username.strip().lower()[:128])
+        if retry_after > 0:
+            logger.warning("Rate limit exceeded for username=%s", username)
+            raise RateLimitExceededException(retry_after)
@@ -1,27 +1,165 @@
+from enum import Enum
+
+from pydantic import ValidationError
+
 from .base import BaseService
-from ..infra.db.queries.transport_orm import TransportOrm
+from ..infra.db.queries.transport_orm import TransportOrm, WITH_SENSORS
 from ..infra.db.exceptions import ItemNotFoundException
-from src.teltonika_http.util.dtos import TransportDto, TransportListDto
+from ..infra.db.queries.count_provider import CountStrategy
+from .transport_cache import transport_cache, cache_missing, publish_transport_invalidation
+from .transport_search import transport_name_index
+from src.teltonika_http.util.cache import MISSING
+from src.teltonika_http.util.dtos import (
+    TransportDto, TransportListDto, TransportListCursorDto, TransportLookupDto, TransportLookupItemDto,
+    ConnectionDto, TransportWithSensorsDto, TransportSearchDto, TransportSearchItemDto, TransportAutocompleteDto
+)
+
+
+class TransportInclude(str, Enum):
+    """Связи, которые можно запросить параметром ?include=."""
+    sensors = "sensors"
 
 
 class TransportService(BaseService):
 
-    def __init__(self, db_session):
-        super().__init__(db_session, "TransportService")
+    def __init__(self, db_session, broker=None):
+        super().__init__(db_session, "TransportService", broker=broker)
         self.db_orm = TransportOrm
 
-    async def get_details(self, imei: str):
-        item = self.db_orm().get_first(self.db, imei=imei)
+    async def get_details(self, imei: str, include_sensors: bool = False):
+        if include_sensors:
+            return await self.get_details_with_sensors(imei)
+
+        cached = transport_cache.get(imei)
+        if cached is None:
+            raise ItemNotFoundException
+        if cached is not MISSING:
+            return cached
+
+        item = await self.db_orm().get_first(self.db, imei=imei)
         if not item:
+            cache_missing(imei)
             raise ItemNotFoundException
-        return TransportDto.model_validate(item, from_attributes=True)
+        transport = TransportDto.model_validate(item, from_attributes=True)
+        transport_cache.set(imei, transport)
+        return transport
     
+    async def get_details_with_sensors(self, imei: str) -> TransportWithSensorsDto:
+        """
+        Транспорт с датчиками. Мимо кеша воркера: датчики меняются
+        сторонним процессом, инвалидации для них нет.
+        """
+        item = await self.db_orm().get_first(self.db, options=WITH_SENSORS, imei=imei)
+        if not item:
+            raise ItemNotFoundException
+        return TransportWithSensorsDto.model_validate(item, from_attributes=True)
+
     async def create(self, transport: TransportDto):
         self.logger.info(transport.model_dump())
-        self.db_orm().create(self.db, **transport.model_dump())
+        await self.db_orm().create(self.db, **transport.model_dump())
+        if self.broker is not None:
+            await self.broker.bump_table_version(self.db_orm().model.__tablename__)
+            # В том числе снимает negative-записи этого IMEI во всех воркерах
+            await publish_transport_invalidation(self.broker, transport.imei)
+        else:
+            transport_cache.invalidate(transport.imei)
 
-    async def get_all(self, page_size: int, page_num: int) -> TransportListDto:
+    async def get_all(
+        self,
+        page_size: int,
+        page_num: int,
+        count: CountStrategy = CountStrategy.exact,
+        include_sensors: bool = False,
+    ) -> TransportListDto:
         self.logger.info("Getting transport list")
-        
-        return self.db_orm().all_paginate(self.db, page_size, page_num)
-        
\ No newline at end of file
+
+        page = await self.db_orm().all_paginate(
+            self.db, page_size, page_num, count_strategy=count, **self._sensors_loading(include_sensors)
+        )
+        return TransportListDto(
+            data=page.data,
+            total_pages=page.total_pages,
+            total_elements=page.total_elements,
+            has_hext=page.has_next
+        )
+
+    async def get_all_cursor(
+        self, page_size: int, cursor: str | None, include_sensors: bool = False
+    ) -> TransportListCursorDto:
+        self.logger.info("Getting transport list by cursor")
+
+        page = await self.db_orm().all_keyset(
+            self.db, page_size, cursor, **self._sensors_loading(include_sensors)
+        )
+        return TransportListCursorDto(
+            data=page.data,
+            next_cursor=page.next_cursor,
+            has_next=page.has_next
+        )
+
+    async def search(self, q: str, limit: int) -> TransportSearchDto:
+        rows = await self.db_orm().search(self.db, q, limit)
+        return TransportSearchDto(data=[
+            TransportSearchItemDto(imei=imei, name=name, similarity=score) for imei, name, score in rows
+        ])
+
+    async def autocomplete(self, prefix: str, limit: int) -> TransportAutocompleteDto:
+        """Из индекса воркера; пока он не загружен — запросом в БД."""
+        if transport_name_index.ready:
+            rows = transport_name_index.search(prefix, limit)
+        else:
+            rows = await self.db_orm().prefix_search(self.db, prefix, limit)
+        return TransportAutocompleteDto(data=[TransportDto(imei=imei, name=name) for imei, name in rows])
+
+    @staticmethod
+    def _sensors_loading(include_sensors: bool) -> dict:
+        if not include_sensors:
+            return {}
+        return {"options": WITH_SENSORS, "dto": TransportWithSensorsDto}
+
+    async def lookup(self, imeis: list[str]) -> TransportLookupDto:
+        """
+        Записи транспорта и детали соединения сразу для многих IMEI:
+        один запрос в БД (только для IMEI, которых нет в кеше)
+        и один pipeline HGETALL в Redis.
+        """
+        imeis = list(dict.fromkeys(imeis))
+        self.logger.info("Looking up %s transports", len(imeis))
+
+        found = {}
+        uncached = []
+        for imei in imeis:
+            cached = transport_cache.get(imei)
+            if cached is MISSING:
+                uncached.append(imei)
+            elif cached is not None:
+                found[imei] = cached
+
+        if uncached:
+            items = await self.db_orm().get_many(self.db, uncached)
+            for item in items:
+                found[item.imei] = TransportDto.model_validate(item, from_attributes=True)
+                transport_cache.set(item.imei, found[item.imei])
+            for imei in uncached:
+                if imei not in found:
+                    cache_missing(imei)
+
+        found_imeis = [imei for imei in imeis if imei in found]
+
+        details = await self.broker.get_connections_details(found_imeis)
+
+        data = []
+        for imei, raw in zip(found_imeis, details):
+            connection = None
+            if raw:
+                try:
+                    connection = ConnectionDto.model_validate(raw)
+                except ValidationError:
+                    # Хеш соединения записан не полностью
+                    self.logger.debug("Incomplete connection hash for %s", imei)
+            data.append(TransportLookupItemDto(transport=found[imei], connection=connection))
+
+        return TransportLookupDto(
+            data=data,
+            missing=[imei for imei in imeis if imei not in found]
+        )
@@ -0,0 +1,52 @@
+import logging
+from typing import Any
+
+from src.teltonika_http.config import settings
+from src.teltonika_http.util.cache import TTLCache
+from src.teltonika_http.services.transport_search import transport_name_index
+
+
+logger = logging.getLogger("TransportCache")
+
+
+# Канал, по которому воркеры узнают об изменении транспорта
+TRANSPORT_INVALIDATION_CHANNEL = "transports:invalidate"
+
+# imei -> TransportDto, либо None для неизвестного IMEI (negative-запись).
+# Кеш свой в каждом воркере gunicorn
+transport_cache = TTLCache(maxsize=settings.TRANSPORT_CACHE_SIZE, ttl=settings.TRANSPORT_CACHE_TTL)
+
+
+def cache_missing(imei: str) -> None:
+    """Запомнить, что IMEI нет в БД, на более короткий срок, чем обычные записи."""
+    transport_cache.set(imei, None, ttl=settings.TRANSPORT_CACHE_NEGATIVE_TTL)
+
+
+async def publish_transport_invalidation(broker: Any, imei: str | None = None) -> None:
+    """
+    Сбросить запись локально и разослать сброс остальным воркерам.
+    imei=None — сбросить кеш целиком (например, после массового импорта).
+    broker — RedisClient или BrokerService.
+    """
+    if imei is None:
+        transport_cache.clear()
+    else:
+        transport_cache.invalidate(imei)
+    # Сброс целиком — массовое изменение: индекс имён перезагружается полностью
+    transport_name_index.request_refresh(full=imei is None)
+    await broker.publish(TRANSPORT_INVALIDATION_CHANNEL, {"imei": imei})
+
+
+async def on_transport_invalidated(message) -> None:
+    """Обработчик сообщений из TRANSPORT_INVALIDATION_CHANNEL."""
+    if not isinstance(message, dict) or "imei" not in message:
+        logger.warning("Malformed transport invalidation message: %r", message)
+        return
+    if message["imei"] is None:
+        transport_cache.clear()
+        logger.debug("Transport cache cleared")
+    else:
+        transport_cache.invalidate(str(message["imei"]))
+        logger.debug("Transport %s dropped from cache", message['imei'])
+    # Новые имена попадут в индекс автодополнения без ожидания интервала
+    transport_name_index.request_refresh(full=message["imei"] is None)
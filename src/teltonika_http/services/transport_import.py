@@ -0,0 +1,153 @@
+import codecs
+import csv
+import enum
+import json
+from typing import AsyncIterator
+
+from fastapi import UploadFile
+
+from .base import BaseService
+from .transport_cache import publish_transport_invalidation
+from ..infra.db.queries.transport_orm import TransportOrm
+from src.teltonika_http.config import settings
+from src.teltonika_http.util.dtos import TransportImportConflictDto, TransportImportReportDto
+
+
+IMEI_MAX_LENGTH = 20
+NAME_MAX_LENGTH = 150
+
+
+class ImportFormat(str, enum.Enum):
+    csv = "csv"        # imei,name; строка заголовка необязательна
+    ndjson = "ndjson"  # {"imei": "...", "name": "..."} на строку
+
+
+async def aiter_upload_lines(upload: UploadFile, chunk_size: int = 64 * 1024) -> AsyncIterator[str]:
+    """Построчное чтение загруженного файла без загрузки его целиком в память."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    while chunk := await upload.read(chunk_size):
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def aiter_file_lines(path: str) -> AsyncIterator[str]:
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            yield line
+
+
+class TransportImportService(BaseService):
+
+    def __init__(self, db_session, broker=None, batch_size: int = None, max_conflicts: int = None):
+        super().__init__(db_session, "TransportImportService", broker=broker)
+        self.db_orm = TransportOrm
+        self._batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self._max_conflicts = max_conflicts or settings.IMPORT_MAX_CONFLICTS
+        self._total_rows = 0
+        self._invalid_total = 0
+        self._invalid: list[TransportImportConflictDto] = []
+
+    async def import_lines(self, lines: AsyncIterator[str], fmt: ImportFormat) -> TransportImportReportDto:
+        self.logger.info("Bulk transport import started, format=%s", fmt.value)
+
+        inserted, conflicts_total, conflicts = await self.db_orm().bulk_import(
+            self.db, self._batches(lines, fmt), max_conflicts=self._max_conflicts
+        )
+
+        conflicts = sorted(self._invalid + conflicts, key=lambda c: c.line)[:self._max_conflicts]
+        report = TransportImportReportDto(
+            total_rows=self._total_rows,
+            inserted=inserted,
+            conflicts_total=conflicts_total + self._invalid_total,
+            conflicts=conflicts,
+        )
+        self.logger.info(
+            "Bulk transport import finished: rows=%s inserted=%s conflicts=%s",
+            report.total_rows, report.inserted, report.conflicts_total,
+        )
+        if report.inserted and self.broker is not None:
+            await self.broker.bump_table_version(self.db_orm().model.__tablename__)
+            # Новые IMEI могли быть закешированы воркерами как отсутствующие
+            await publish_transport_invalidation(self.broker)
+        return report
+
+    async def _batches(self, lines: AsyncIterator[str], fmt: ImportFormat) -> AsyncIterator[list[tuple[int, str, str]]]:
+        batch = []
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            line = line.strip()
+            if not line:
+                continue
+            row = self._parse(line, fmt)
+            if row is None:
+                # Заголовок CSV
+                if fmt == ImportFormat.csv and line_no == 1 and line.lower().startswith("imei"):
+                    continue
+                self._reject(line_no)
+                continue
+            self._total_rows += 1
+            batch.append((line_no, *row))
+            if len(batch) >= self._batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _reject(self, line_no: int):
+        self._total_rows += 1
+        self._invalid_total += 1
+        if len(self._invalid) < self._max_conflicts:
+            self._invalid.append(TransportImportConflictDto(line=line_no, imei=None, reason="invalid_row"))
+
+    @staticmethod
+    def _parse(line: str, fmt: ImportFormat) -> tuple[str, str] | None:
+        try:
+            if fmt == ImportFormat.ndjson:
+                obj = json.loads(line)
+                imei, name = str(obj["imei"]), str(obj["name"])
+            else:
+                imei, name = next(csv.reader([line]))
+        except (ValueError, KeyError, TypeError):
+            return None
+        imei, name = imei.strip(), name.strip()
+        if not imei.isdigit() or len(imei) > IMEI_MAX_LENGTH or not name or len(name) > NAME_MAX_LENGTH:
+            return None
+        return imei, name
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from src.teltonika_http.infra.db.db import session
+    from src.teltonika_http.services.broker import BrokerService
+    from src.teltonika_http.util.boot import create_broker
+
+    parser = argparse.ArgumentParser(description="Bulk import transports from CSV/NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=[f.value for f in ImportFormat], default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    fmt = ImportFormat(args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"))
+
+    async def main() -> TransportImportReportDto:
+        # Версия таблицы и сброс кешей воркеров — как при импорте через API
+        broker = create_broker(client_cache=False)
+        try:
+            service = TransportImportService(
+                session, BrokerService(broker, index_shards=settings.REDIS_INDEX_SHARDS), batch_size=args.batch_size
+            )
+            return await service.import_lines(aiter_file_lines(args.path), fmt)
+        finally:
+            await broker.close()
+
+    report = asyncio.run(main())
+    print(report.model_dump_json(indent=2))
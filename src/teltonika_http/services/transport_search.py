@@ -0,0 +1,207 @@
+import asyncio
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import Callable, Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.teltonika_http.config import settings
+from src.teltonika_http.infra.db.queries.transport_orm import TransportOrm
+
+
+logger = logging.getLogger("TransportNameIndex")
+
+
+# Записи, закоммиченные позже, но с более ранним now(), не должны выпасть
+# из инкрементального обновления: окно перекрытия по времени изменения
+WATERMARK_OVERLAP = timedelta(seconds=5)
+# Пачка больше этого вливается пересортировкой, а не вставками по одной
+MERGE_THRESHOLD = 1000
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+class TransportNameIndex:
+    """
+    Отсортированный индекс имён транспорта в памяти воркера для автодополнения
+    по префиксу: bisect по списку (нормализованное имя, imei), без запросов в БД.
+
+    Обновляется инкрементально — записи с coalesce(updated_at, created_at)
+    не раньше водяного знака — раз в refresh_interval или сразу после
+    сообщения об изменении транспорта. Удалённые записи исчезают при полной
+    перезагрузке раз в full_reload_interval или по request_refresh(full=True)
+    (массовый импорт: его строки получают now() начала долгой транзакции и
+    могут оказаться старше водяного знака). Пока индекс не загружен,
+    ready=False и автодополнение идёт в БД.
+
+    Вне event loop (asyncio.to_thread) списки индекса не изменяются на
+    месте: строятся новые и подменяются присваиванием — search() в loop
+    всегда видит целый список.
+    """
+    def __init__(self, refresh_interval: float = 5.0, full_reload_interval: float = 3600.0):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self._keys: list[tuple[str, str]] = []
+        self._names: dict[str, str] = {}
+        self._watermark: datetime | None = None
+        self._loaded_at = 0.0
+        self._refresh_requested = asyncio.Event()
+        self._full_reload_requested = False
+        self._task: asyncio.Task | None = None
+        self.ready = False
+        self.refreshes = 0
+        self.last_refresh_duration = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def search(self, prefix: str, limit: int = 10) -> list[tuple[str, str]]:
+        """(imei, name) с именем, начинающимся с prefix, в порядке имени."""
+        prefix = normalize(prefix)
+        result = []
+        i = bisect_left(self._keys, (prefix,))
+        while i < len(self._keys) and len(result) < limit:
+            key, imei = self._keys[i]
+            if not key.startswith(prefix):
+                break
+            result.append((imei, self._names[imei]))
+            i += 1
+        return result
+
+    def load(self, rows: Iterable[tuple[str, str, datetime | None]]) -> None:
+        """Полная замена содержимого индекса."""
+        names = {}
+        watermark = None
+        for imei, name, changed_at in rows:
+            names[imei] = name
+            if changed_at is not None and (watermark is None or changed_at > watermark):
+                watermark = changed_at
+        # Строки приходят упорядоченными по имени: timsort здесь почти линеен
+        keys = [(normalize(name), imei) for imei, name in names.items()]
+        keys.sort()
+        # Сначала имена: search() не должен встретить imei без имени
+        self._names = names
+        self._keys = keys
+        self._watermark = watermark
+        self._loaded_at = time.monotonic()
+        self.ready = True
+
+    def upsert(self, rows: Iterable[tuple[str, str, datetime | None]], rebuild: bool | None = None) -> int:
+        """
+        Добавить новые и переименованные записи. Возвращает число изменённых.
+        rebuild=True — собрать новые списки вместо изменения текущих (обязательно
+        при вызове вне event loop); None — по размеру пачки (MERGE_THRESHOLD).
+        """
+        changed = {}
+        for imei, name, changed_at in rows:
+            if changed_at is not None and (self._watermark is None or changed_at > self._watermark):
+                self._watermark = changed_at
+            if self._names.get(imei) != name:
+                changed[imei] = name
+        if not changed:
+            return 0
+
+        if rebuild is None:
+            rebuild = len(changed) > MERGE_THRESHOLD
+        if rebuild:
+            # Старые ключи отфильтровываются за один проход, новые вливаются
+            # сортировкой двух уже упорядоченных серий
+            keys = [k for k in self._keys if k[1] not in changed]
+            keys.extend(sorted((normalize(name), imei) for imei, name in changed.items()))
+            keys.sort()
+            names = {**self._names, **changed}
+            # Как в load(): сначала имена
+            self._names = names
+            self._keys = keys
+            return len(changed)
+
+        for imei, name in changed.items():
+            old = self._names.get(imei)
+            self._names[imei] = name
+            if old is not None:
+                i = bisect_left(self._keys, (normalize(old), imei))
+                if i < len(self._keys) and self._keys[i][1] == imei:
+                    del self._keys[i]
+            insort(self._keys, (normalize(name), imei))
+        return len(changed)
+
+    def request_refresh(self, full: bool = False) -> None:
+        """Обновить индекс, не дожидаясь refresh_interval (транспорт изменился)."""
+        if full:
+            self._full_reload_requested = True
+        self._refresh_requested.set()
+
+    async def refresh(self, session_factory: Callable[[], AsyncSession]) -> None:
+        started = time.perf_counter()
+        orm = TransportOrm()
+        full = (
+            not self.ready
+            or self._watermark is None
+            or self._full_reload_requested
+            or time.monotonic() - self._loaded_at >= self.full_reload_interval
+        )
+        if full:
+            # Запрос, пришедший во время загрузки, вызовет ещё одну
+            self._full_reload_requested = False
+            rows = await orm.names_changed_since(session_factory, None)
+            # Сотни тысяч строк разбираются в потоке: event loop продолжает
+            # обслуживать запросы, получая GIL каждые sys.getswitchinterval()
+            await asyncio.to_thread(self.load, rows)
+        else:
+            rows = await orm.names_changed_since(session_factory, self._watermark - WATERMARK_OVERLAP)
+            if len(rows) > MERGE_THRESHOLD:
+                # В потоке — только с пересборкой: текущий список читает search()
+                await asyncio.to_thread(self.upsert, rows, True)
+            else:
+                self.upsert(rows)
+        self.refreshes += 1
+        self.last_refresh_duration = time.perf_counter() - started
+        if full:
+            logger.info("Transport name index loaded: %s names in %.3fs", len(self), self.last_refresh_duration)
+
+    async def _run(self, session_factory: Callable[[], AsyncSession]) -> None:
+        while True:
+            self._refresh_requested.clear()
+            try:
+                await self.refresh(session_factory)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Transport name index refresh failed: %s", e)
+            try:
+                await asyncio.wait_for(self._refresh_requested.wait(), self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "size": len(self),
+            "refreshes": self.refreshes,
+            "last_refresh_duration": self.last_refresh_duration,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
+
+
+# Индекс свой в каждом воркере gunicorn
+transport_name_index = TransportNameIndex(
+    refresh_interval=settings.AUTOCOMPLETE_REFRESH_INTERVAL,
+    full_reload_interval=settings.AUTOCOMPLETE_FULL_RELOAD_INTERVAL,
+)
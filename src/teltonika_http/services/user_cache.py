@@ -0,0 +1,32 @@
+import logging
+
+from src.teltonika_http.config import settings
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.util.cache import TTLCache
+
+
+logger = logging.getLogger("UserCache")
+
+
+# Канал, по которому воркеры узнают об изменении пользователя
+USER_INVALIDATION_CHANNEL = "users:invalidate"
+
+# user_id -> (email, is_active). Кеш свой в каждом воркере gunicorn
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+async def publish_user_invalidation(broker: RedisClient, user_id: int) -> None:
+    """Сбросить запись локально и разослать сброс остальным воркерам."""
+    user_cache.invalidate(user_id)
+    await broker.publish(USER_INVALIDATION_CHANNEL, {"id": user_id})
+
+
+async def on_user_invalidated(message) -> None:
+    """Обработчик сообщений из USER_INVALIDATION_CHANNEL."""
+    try:
+        user_id = int(message["id"])
+    except (TypeError, KeyError, ValueError):
+        logger.warning("Malformed user invalidation message: %r", message)
+        return
+    user_cache.invalidate(user_id)
+    logger.debug("User %s dropped from cache", user_id)
@@ -0,0 +1,201 @@
+"""
+Admission control: ограничение одновременных запросов по группам маршрутов.
+
+Каждая группа (auth, transports, connections) получает свой лимит
+параллельности и ограниченную очередь ожидания. Запрос отклоняется сразу
+(503 + Retry-After), если очередь полна или ожидаемое время ожидания
+больше max_wait; иначе ждёт слот не дольше max_wait.
+Лёгкие запросы (by-imei) обслуживаются из очереди первыми.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from enum import IntEnum
+
+from src.teltonika_http.config import settings
+from src.teltonika_http.util.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED
+
+
+class Priority(IntEnum):
+    high = 0
+    low = 1
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Семафор с двумя очередями приоритетов и оценкой ожидания по
+    скользящему среднему времени обслуживания.
+    """
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._active = 0
+        self._waiters = {p: deque() for p in Priority}
+        # EWMA времени обслуживания, секунды
+        self._service_time = 0.05
+        self.rejected: dict[str, int] = {"queue_full": 0, "deadline": 0, "timeout": 0}
+        self._in_flight_metric = ADMISSION_IN_FLIGHT.labels(name)
+        self._queue_metric = ADMISSION_QUEUE_DEPTH.labels(name)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    def estimated_wait(self, ahead: int) -> float:
+        return (ahead + 1) * self._service_time / self.concurrency
+
+    def _reject(self, reason: str, ahead: int):
+        self.rejected[reason] += 1
+        ADMISSION_REJECTED.labels(self.name, reason).inc()
+        raise AdmissionRejected(reason, self.estimated_wait(ahead))
+
+    async def acquire(self, priority: Priority = Priority.low) -> None:
+        if self._active < self.concurrency and not self.queue_depth:
+            self._active += 1
+            self._in_flight_metric.inc()
+            return
+
+        # Впереди окажутся все high и, для low, все low
+        ahead = len(self._waiters[Priority.high])
+        if priority == Priority.low:
+            ahead += len(self._waiters[Priority.low])
+        if self.queue_depth >= self.max_queue:
+            self._reject("queue_full", ahead)
+        if self.estimated_wait(ahead) > self.max_wait:
+            self._reject("deadline", ahead)
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._waiters[priority]
+        queue.append(waiter)
+        self._queue_metric.inc()
+        try:
+            async with asyncio.timeout(self.max_wait):
+                await waiter
+        except TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+            elif not waiter.cancelled():
+                # слот передан одновременно с таймаутом — пользуемся им
+                return
+            self._reject("timeout", ahead)
+        except asyncio.CancelledError:
+            # клиент ушёл: если слот уже передан — возвращаем его
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            raise
+        finally:
+            if waiter in queue:
+                queue.remove(waiter)
+                self._queue_metric.dec()
+
+    def release(self, elapsed: float | None) -> None:
+        if elapsed is not None:
+            self._service_time += 0.1 * (elapsed - self._service_time)
+        for queue in self._waiters.values():
+            while queue:
+                waiter = queue.popleft()
+                self._queue_metric.dec()
+                if not waiter.done():
+                    # слот переходит к ожидающему, _active не меняется
+                    waiter.set_result(None)
+                    return
+        self._active -= 1
+        self._in_flight_metric.dec()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "concurrency": self.concurrency,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "service_time": self._service_time,
+            "rejected": dict(self.rejected),
+        }
+
+
+# Первый сегмент пути -> группа
+ROUTE_GROUPS = {
+    "token": "auth",
+    "refresh": "auth",
+    "transports": "transports",
+    "connections": "connections",
+}
+# Долгоживущие запросы не занимают слоты
+EXCLUDED_PATHS = ("/connections/stream",)
+HIGH_PRIORITY_MARKERS = ("/by-imei/",)
+
+
+def parse_admission_limits(value: str) -> dict[str, AdmissionLimiter]:
+    """ "transports=32:256:1,auth=8:64:2" -> {группа: AdmissionLimiter(concurrency, queue, max_wait)} """
+    limiters = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, spec = item.partition("=")
+        concurrency, max_queue, max_wait = spec.split(":")
+        name = name.strip()
+        limiters[name] = AdmissionLimiter(name, int(concurrency), int(max_queue), float(max_wait))
+    return limiters
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, limiters: dict[str, AdmissionLimiter]):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        segment = path.split("/", 2)[1] if path.count("/") else ""
+        limiter = self.limiters.get(ROUTE_GROUPS.get(segment))
+        if limiter is None or path.startswith(EXCLUDED_PATHS):
+            return await self.app(scope, receive, send)
+
+        priority = Priority.high if any(m in path for m in HIGH_PRIORITY_MARKERS) else Priority.low
+        try:
+            await limiter.acquire(priority)
+        except AdmissionRejected as exc:
+            return await self._overloaded(send, limiter.name, exc)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+    @staticmethod
+    async def _overloaded(send, group: str, exc: AdmissionRejected):
+        body = json.dumps({
+            "error": "OVERLOADED",
+            "message": f"Too many concurrent requests to {group}",
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(exc.retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+admission_limiters = parse_admission_limits(settings.ADMISSION_LIMITS)
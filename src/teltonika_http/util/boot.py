@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 import logging
 
@@ -6,28 +7,30 @@ from fastapi.responses import JSONResponse
 
 from src.teltonika_http.config import settings
 from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.infra.broker.client_cache import ClientSideCache
+from src.teltonika_http.infra.broker.codecs import parse_prefix_codecs
 from src.teltonika_http.infra.db.exceptions import AppError
+from src.teltonika_http.services.user_cache import USER_INVALIDATION_CHANNEL, on_user_invalidated, user_cache
+from src.teltonika_http.services.password_hasher import password_hasher
+from src.teltonika_http.services.connection_events import connection_event_hub
+from src.teltonika_http.services.connection_reaper import ConnectionReaper
+from src.teltonika_http.services.maintenance import MaintenanceEngine
+from src.teltonika_http.services.transport_search import transport_name_index
+from src.teltonika_http.services.broker import BrokerService
+from src.teltonika_http.services.transport_cache import (
+    TRANSPORT_INVALIDATION_CHANNEL, on_transport_invalidated, transport_cache
+)
+from src.teltonika_http.infra.db.db import engine, session
+from src.teltonika_http.util.metrics import MetricsMiddleware, run_pool_sampler
+from src.teltonika_http.util.admission import AdmissionMiddleware, admission_limiters
+from src.teltonika_http.util.middlewares import (
+    AccessLogMiddleware, ErrorMiddleware, RequestIdMiddleware, TimingMiddleware
+)
 
 
 logger = logging.getLogger()
 
 
-async def error_middleware(request: Request, call_next):
-    try:
-        return await call_next(request)
-    except Exception as exc:
-        # логирование
-        logger.exception("Unhandled error", exc_info=exc)
-
-        return JSONResponse(
-            status_code=500,
-            content={
-                "error": "INTERNAL_ERROR",
-                "message": "Internal server error"
-            }
-        )
-    
-
 async def app_error_handler(request: Request, exc: AppError):
     return JSONResponse(
         status_code=exc.status_code,
@@ -35,7 +38,8 @@ async def app_error_handler(request: Request, exc: AppError):
             "error": exc.code,
             "message": exc.message,
             "path": request.url.path
-        }
+        },
+        headers=getattr(exc, "headers", None),
     )
     
 
@@ -51,7 +55,14 @@ async def value_error_handler(request: Request, exc: ValueError):
 
 
 def register_middlewares(app: FastAPI):
-    app.middleware("http")(error_middleware)
+    # add_middleware оборачивает снаружи: добавленный последним — внешний
+    app.add_middleware(ErrorMiddleware)
+    app.add_middleware(AdmissionMiddleware, limiters=admission_limiters)
+    app.add_middleware(TimingMiddleware)
+    app.add_middleware(AccessLogMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    # Метрики меряют запрос целиком
+    app.add_middleware(MetricsMiddleware)
 
 
 def register_exception_handlers(app: FastAPI):
@@ -59,16 +70,78 @@ def register_exception_handlers(app: FastAPI):
     app.exception_handler(AppError)(app_error_handler)
 
 
+def create_broker(client_cache: bool = True) -> RedisClient:
+    """RedisClient по настройкам приложения (lifespan и CLI-скрипты)."""
+    return RedisClient(
+        settings.redis_url,
+        decode_responses=settings.REDIS_DECODE_RESPONSES,
+        codec=settings.REDIS_CODEC,
+        prefix_codecs=parse_prefix_codecs(settings.REDIS_PREFIX_CODECS),
+        cluster=settings.REDIS_CLUSTER,
+        read_from_replicas=settings.REDIS_READ_FROM_REPLICAS,
+        replica_url=settings.REDIS_REPLICA_URL if not settings.REDIS_CLUSTER else None,
+        client_cache=ClientSideCache(
+            maxsize=settings.REDIS_CLIENT_CACHE_SIZE,
+            ttl=settings.REDIS_CLIENT_CACHE_TTL,
+            prefixes=tuple(p.strip() for p in settings.REDIS_CLIENT_CACHE_PREFIXES.split(",") if p.strip()),
+        ) if client_cache and settings.REDIS_CLIENT_CACHE else None,
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # инициализация один раз при старте
-    app.state.broker = RedisClient(settings.redis_url, decode_responses=True)
+    app.state.broker = create_broker()
+    sampler = None
+    app.state.reaper = None
+    app.state.maintenance = MaintenanceEngine(
+        app.state.broker,
+        ops_per_second=settings.MAINTENANCE_OPS_PER_SECOND,
+        min_ops_per_second=settings.MAINTENANCE_MIN_OPS_PER_SECOND,
+        page_size=settings.MAINTENANCE_PAGE_SIZE,
+        p99_ceiling_ms=settings.MAINTENANCE_P99_CEILING_MS,
+    )
     try:
+        # свежий пул bcrypt на каждый запуск приложения (и семафор этого event loop)
+        password_hasher.start()
         # можно сделать ping/ensure_connected здесь
         await app.state.broker.connect()
         await app.state.broker.ping()
+        await app.state.broker.subscribe(USER_INVALIDATION_CHANNEL, on_user_invalidated)
+        await app.state.broker.subscribe(TRANSPORT_INVALIDATION_CHANNEL, on_transport_invalidated)
+        await connection_event_hub.start(app.state.broker)
+        sampler = asyncio.create_task(run_pool_sampler(
+            engine,
+            app.state.broker,
+            {
+                "users": user_cache,
+                "transports": transport_cache,
+                **({"redis": app.state.broker.client_cache} if app.state.broker.client_cache else {}),
+            },
+            settings.METRICS_SAMPLE_INTERVAL,
+        ))
+        if settings.AUTOCOMPLETE_ENABLED:
+            transport_name_index.start(session)
+        if settings.REAPER_ENABLED:
+            app.state.reaper = ConnectionReaper(
+                app.state.broker,
+                BrokerService(app.state.broker, index_shards=settings.REDIS_INDEX_SHARDS),
+                stale_after=settings.REAPER_STALE_AFTER,
+                interval=settings.REAPER_INTERVAL,
+                batch_size=settings.REAPER_BATCH_SIZE,
+                max_per_second=settings.REAPER_MAX_PER_SECOND,
+            )
+            app.state.reaper.start()
         yield
     finally:
+        if sampler is not None:
+            sampler.cancel()
+        await transport_name_index.stop()
+        if app.state.reaper is not None:
+            await app.state.reaper.stop()
+        # незавершённые задачи останутся в статусе interrupted и продолжатся через resume
+        await app.state.maintenance.shutdown()
         # корректное закрытие при завершении
         await app.state.broker.shutdown()
+        password_hasher.shutdown()
 
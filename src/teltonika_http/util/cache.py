@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import time
+from typing import Any, Hashable
+
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру LRU-кеш с TTL на запись, локальный для воркера.
+
+    Не потокобезопасен: рассчитан на использование из одного event loop.
+    Значение None кешируется как обычное (удобно для negative-записей),
+    отсутствие записи обозначается MISSING.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Как get(), но не меняет порядок LRU и счётчики hits/misses."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        self._data[key] = (time.monotonic() + (self._ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self._maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
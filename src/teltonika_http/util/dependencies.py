@@ -3,7 +3,10 @@ from typing import Annotated
 from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
 
-from src.teltonika_http.infra.db.db import sessionmaker, session
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.teltonika_http.config import settings
+from src.teltonika_http.infra.db.db import session
 from src.teltonika_http.infra.broker.redis_client import RedisClient
 from src.teltonika_http.services.broker import BrokerService
 
@@ -12,7 +15,7 @@ def __get_db():
     return session
 
 
-db_dep = Annotated[sessionmaker, Depends(__get_db)]
+db_dep = Annotated[async_sessionmaker, Depends(__get_db)]
 
 
 token_form_dep = Annotated[OAuth2PasswordRequestForm, Depends()]
@@ -29,7 +32,11 @@ broker_dep = Annotated[RedisClient, Depends(get_broker)]
 
 
 async def get_broker_service(broker: broker_dep):
-    return BrokerService(broker)
+    return BrokerService(
+        broker,
+        index_shards=settings.REDIS_INDEX_SHARDS,
+        connection_ttl=settings.CONNECTION_TTL or None,
+    )
 
 
 broker_service_dep = Annotated[BrokerService, Depends(get_broker_service)]
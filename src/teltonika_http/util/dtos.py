@@ -1,5 +1,9 @@
 from pydantic import BaseModel, Field
 
+from src.teltonika_http.config import settings
+from src.teltonika_http.infra.db.models import SensorNumber, SensorStatus
+from src.teltonika_http.services.maintenance import MaintenanceKind
+
 
 class UserDto(BaseModel):
     username: str
@@ -24,6 +28,12 @@ class AdminCreateUserDto(BaseModel):
     email: str = Field(..., description="Email address of the new user")
 
 
+class AdminSetUserActiveDto(BaseModel):
+    admin_token: str = Field(..., description="Admin token for authentication")
+    user_id: int = Field(..., description="Id of the user to change")
+    is_active: bool = Field(..., description="New active state of the user")
+
+
 class TokenPairDto(BaseModel):
     access_token: str
     refresh_token: str
@@ -31,17 +41,76 @@ class TokenPairDto(BaseModel):
 
 
 class TransportListDto(BaseModel):
-    data: list["TransportDto"]
+    data: list["TransportWithSensorsDto | TransportDto"]
     total_pages: int
     total_elements: int
     has_hext: bool
 
 
+class TransportListCursorDto(BaseModel):
+    data: list["TransportWithSensorsDto | TransportDto"]
+    next_cursor: str | None
+    has_next: bool
+
+
 class TransportDto(BaseModel):
     imei: str
     name: str
 
 
+class SensorDto(BaseModel):
+    id: int
+    name: str
+    virtual_device_name: str
+    address: str | None
+    pin: str | None
+    sensor_num: SensorNumber
+    status: SensorStatus
+
+
+class TransportWithSensorsDto(TransportDto):
+    sensors: list[SensorDto]
+
+
+class TransportSearchItemDto(TransportDto):
+    similarity: float
+
+
+class TransportSearchDto(BaseModel):
+    data: list[TransportSearchItemDto]
+
+
+class TransportAutocompleteDto(BaseModel):
+    data: list[TransportDto]
+
+
+class TransportLookupRequestDto(BaseModel):
+    imeis: list[str] = Field(..., min_length=1, max_length=settings.LOOKUP_MAX_IMEIS)
+
+
+class TransportLookupItemDto(BaseModel):
+    transport: TransportDto
+    connection: "ConnectionDto | None"
+
+
+class TransportLookupDto(BaseModel):
+    data: list[TransportLookupItemDto]
+    missing: list[str]
+
+
+class TransportImportConflictDto(BaseModel):
+    line: int
+    imei: str | None
+    reason: str
+
+
+class TransportImportReportDto(BaseModel):
+    total_rows: int
+    inserted: int
+    conflicts_total: int
+    conflicts: list[TransportImportConflictDto]
+
+
 class ConnectionDto(BaseModel):
     imei: str
     ip: str
@@ -52,18 +121,52 @@ class ConnectionDto(BaseModel):
 
 class ConnectionListDto(BaseModel):
     data: list[str]
-    offset: int
+    offset: int | None = None
+    next_cursor: str | None = None
+    total_elements: int | None = None
 
 
 class ItemListOffsetDto(BaseModel):
     data: list[BaseModel]
-    total_elements: int
+    total_elements: int | None
     offset: int
     has_next: bool
 
 
+class ItemListCursorDto(BaseModel):
+    data: list[BaseModel]
+    next_cursor: str | None
+    has_next: bool
+
+
 class ItemListPageDto(BaseModel):
     data: list[BaseModel]
     total_elements: int
     total_pages: int
     has_next: bool
+
+
+class MaintenanceJobCreateDto(BaseModel):
+    kind: MaintenanceKind
+    pattern: str = Field(..., min_length=1)
+    # delete: key_type; reencode: from_codec, to_codec; migrate_prefix: from_prefix, to_prefix
+    params: dict[str, str] = Field(default_factory=dict)
+    ops_per_second: float | None = Field(None, gt=0)
+    page_size: int | None = Field(None, gt=0, le=10000)
+
+
+class MaintenanceJobDto(BaseModel):
+    id: str
+    kind: MaintenanceKind
+    pattern: str
+    params: dict
+    status: str
+    cursor: int
+    processed: int
+    affected: int
+    ops_per_second: float
+    p99_ms: float
+    started_at: float
+    updated_at: float
+    error: str | None
+    result: dict
@@ -0,0 +1,43 @@
+import hashlib
+
+from fastapi import Response
+from starlette import status
+
+
+def make_etag(*parts) -> str:
+    """Сильный ETag из произвольных частей (версия данных, параметры запроса)."""
+    raw = "|".join(str(p) for p in parts).encode("utf-8")
+    return '"' + hashlib.blake2b(raw, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str, allow_wildcard: bool = True) -> bool:
+    """
+    Проверка заголовка If-None-Match (список через запятую, W/-префикс, *).
+    "*" совпадает с любым существующим ресурсом: allow_wildcard=False, пока
+    существование ресурса не проверено.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            if allow_wildcard:
+                return True
+            continue
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
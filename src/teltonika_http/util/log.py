@@ -0,0 +1,123 @@
+"""
+Конвейер логирования: запись в файл уходит в поток QueueListener,
+в event loop остаётся только подстановка %-аргументов и put в очередь.
+
+Фильтры для горячих логгеров:
+ - RateLimitFilter — не больше rate записей в секунду (token bucket);
+ - SampleFilter — пропускает долю записей ниже WARNING.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+
+from src.teltonika_http.util.middlewares import request_id_var
+
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(filename)s - %(lineno)s - %(request_id)s - %(message)s"
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare форматирует запись целиком (asctime, формат строки)
+    в вызывающем потоке. Здесь в вызывающем потоке только getMessage() —
+    аргументы могут измениться после возврата — и текст исключения,
+    остальное форматирование делает обработчик в потоке listener.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exc_formatter.formatException(record.exc_info)
+            # traceback держит кадры стека — в другой поток не передаём
+            record.exc_info = None
+        return record
+
+
+_exc_formatter = logging.Formatter()
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись — для сборщиков логов."""
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "file": record.filename,
+            "line": record.lineno,
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket на логгер: не больше rate записей/с со всплеском burst.
+    WARNING и выше проходят всегда. Отброшенные считаются в dropped.
+    """
+    def __init__(self, rate: float, burst: float | None = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.dropped += 1
+            return False
+
+
+class SampleFilter(logging.Filter):
+    """Пропускает долю ratio записей ниже WARNING."""
+    def __init__(self, ratio: float):
+        super().__init__()
+        self.ratio = ratio
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.ratio
+
+
+def parse_logger_values(value: str) -> dict[str, float]:
+    """ "access=0.1,AuthService=50" -> {"access": 0.1, "AuthService": 50.0} """
+    result = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, number = item.partition("=")
+        result[name.strip()] = float(number)
+    return result
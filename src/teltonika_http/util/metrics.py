@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+
+
+logger = logging.getLogger("Metrics")
+
+
+# Под gunicorn каждый воркер пишет значения в mmap-файлы в этом каталоге,
+# а /metrics любого воркера собирает их все (см. gunicorn.conf.py)
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+# Группы маршрутов — первый сегмент пути. Ограниченный набор значений меток
+ROUTE_GROUPS = ("admin", "connections", "metrics", "token", "refresh", "transports", "users")
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests in flight", ["group"], multiprocess_mode="livesum"
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "SQLAlchemy connections checked out", multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "SQLAlchemy overflow connections in use", multiprocess_mode="livesum"
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "SQLAlchemy pool size", multiprocess_mode="livesum"
+)
+REDIS_POOL_IN_USE = Gauge(
+    "redis_pool_in_use", "Redis connections in use", multiprocess_mode="livesum"
+)
+REDIS_POOL_AVAILABLE = Gauge(
+    "redis_pool_available", "Idle Redis connections in the pool", multiprocess_mode="livesum"
+)
+CACHE_SIZE = Gauge(
+    "local_cache_size", "Entries in per-worker caches", ["cache"], multiprocess_mode="livesum"
+)
+CACHE_HITS = Gauge(
+    "local_cache_hits", "Per-worker cache hits since start", ["cache"], multiprocess_mode="livesum"
+)
+CACHE_MISSES = Gauge(
+    "local_cache_misses", "Per-worker cache misses since start", ["cache"], multiprocess_mode="livesum"
+)
+CACHE_EVICTIONS = Gauge(
+    "local_cache_evictions", "Per-worker cache evictions since start", ["cache"], multiprocess_mode="livesum"
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight", "Requests holding an admission slot", ["group"], multiprocess_mode="livesum"
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot", ["group"], multiprocess_mode="livesum"
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests shed by admission control", ["group", "reason"]
+)
+
+REAPER_REAPED = Counter(
+    "connection_reaper_reaped_total", "Stale connections removed by the reaper"
+)
+REAPER_RUN_SECONDS = Histogram(
+    "connection_reaper_run_seconds", "Duration of a reaper pass", buckets=(.01, .05, .1, .5, 1, 5, 10, 30, 60)
+)
+
+
+def route_group(path: str) -> str:
+    segment = path.split("/", 2)[1] if path.count("/") else ""
+    return segment if segment in ROUTE_GROUPS else "other"
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: число запросов и латентность по шаблону маршрута
+    (/transports/by-imei/{imei}, а не конкретный путь), запросы в работе
+    по группам маршрутов.
+
+    Дочерние метрики с метками кешируются, чтобы не платить за labels()
+    на каждый запрос.
+    """
+    def __init__(self, app):
+        self.app = app
+        self._in_progress = {group: HTTP_IN_PROGRESS.labels(group) for group in (*ROUTE_GROUPS, "other")}
+        self._latency: dict[tuple, object] = {}
+        self._requests: dict[tuple, object] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = self._in_progress[route_group(scope["path"])]
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            # Router кладёт найденный маршрут в тот же scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            key = (scope["method"], template)
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = HTTP_LATENCY.labels(*key)
+            latency.observe(elapsed)
+            key = (scope["method"], template, status_code)
+            requests = self._requests.get(key)
+            if requests is None:
+                requests = self._requests[key] = HTTP_REQUESTS.labels(*key)
+            requests.inc()
+
+
+def sample_pools(engine, redis_client, caches: dict) -> None:
+    """Снять состояние пулов соединений и локальных кешей этого воркера."""
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+        DB_POOL_SIZE.set(pool.size())
+
+    if redis_client is not None:
+        stats = redis_client.pool_stats()
+        REDIS_POOL_IN_USE.set(stats["in_use"])
+        REDIS_POOL_AVAILABLE.set(stats["available"])
+
+    for name, cache in caches.items():
+        stats = cache.stats()
+        CACHE_SIZE.labels(name).set(stats["size"])
+        CACHE_HITS.labels(name).set(stats["hits"])
+        CACHE_MISSES.labels(name).set(stats["misses"])
+        CACHE_EVICTIONS.labels(name).set(stats["evictions"])
+
+
+async def run_pool_sampler(engine, redis_client, caches: dict, interval: float) -> None:
+    """Фоновая задача воркера: пулы опрашиваются раз в interval, а не на каждый запрос."""
+    while True:
+        try:
+            sample_pools(engine, redis_client, caches)
+        except Exception as e:
+            logger.warning("Failed to sample pool metrics: %s", e)
+        await asyncio.sleep(interval)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,166 @@
+"""
+Middleware на чистом ASGI.
+
+В отличие от @app.middleware("http") (BaseHTTPMiddleware) здесь нет
+отдельной задачи и memory-stream на каждый запрос, а потоковые ответы
+(SSE /connections/stream) проходят без буферизации.
+
+Порядок (снаружи внутрь): RequestId -> AccessLog -> Timing -> Error.
+"""
+import json
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+
+
+logger = logging.getLogger()
+access_logger = logging.getLogger("access")
+
+REQUEST_ID_HEADER = b"x-request-id"
+PROCESS_TIME_HEADER = b"x-process-time"
+MAX_REQUEST_ID_LENGTH = 128
+
+# Идентификатор текущего запроса — доступен в логах и сервисах без передачи аргументом
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+def get_request_id() -> str | None:
+    return request_id_var.get()
+
+
+def _append_header(message: dict, name: bytes, value: bytes) -> None:
+    # Список заголовков ответа не меняем на месте: он может принадлежать Response
+    message["headers"] = [*message.get("headers", ()), (name, value)]
+
+
+class RequestIdMiddleware:
+    """
+    Берёт X-Request-ID из запроса (или генерирует), кладёт его в
+    request_id_var и scope["state"] и возвращает в ответе.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                if 0 < len(value) <= MAX_REQUEST_ID_LENGTH:
+                    request_id = value.decode("latin-1")
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+
+        scope.setdefault("state", {})["request_id"] = request_id
+        raw = request_id.encode("latin-1")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                _append_header(message, REQUEST_ID_HEADER, raw)
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+
+class TimingMiddleware:
+    """Время обработки до начала ответа — заголовок X-Process-Time (секунды)."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                _append_header(message, PROCESS_TIME_HEADER, f"{elapsed:.6f}".encode())
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class AccessLogMiddleware:
+    """Одна строка лога на запрос: метод, путь, статус, длительность, request id."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if access_logger.isEnabledFor(logging.INFO):
+                access_logger.info(
+                    "%s %s %s %.1fms rid=%s",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    (time.perf_counter() - started) * 1000,
+                    request_id_var.get(),
+                )
+
+
+class ErrorMiddleware:
+    """
+    Необработанное исключение -> JSON 500 в формате AppError.
+    Если ответ уже начат (стриминг), отправить 500 нельзя — только логируем
+    и пробрасываем дальше, сервер закроет соединение.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            # логирование
+            logger.exception("Unhandled error", exc_info=exc)
+            if response_started:
+                raise
+
+            body = json.dumps({
+                "error": "INTERNAL_ERROR",
+                "message": "Internal server error"
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
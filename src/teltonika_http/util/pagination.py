@@ -0,0 +1,16 @@
+import base64
+import binascii
+
+
+def encode_cursor(last_key: str) -> str:
+    """Упаковать ключ последней записи страницы в непрозрачный курсор."""
+    return base64.urlsafe_b64encode(last_key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """Распаковать курсор, выданный encode_cursor. Некорректный курсор -> ValueError (400)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("cursor is malformed")
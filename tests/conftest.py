@@ -8,6 +8,22 @@ import jwt
 from fastapi.security import OAuth2PasswordRequestForm
 
 from src.teltonika_http.infra.db.models import UserModel
+from src.teltonika_http.services.user_cache import user_cache
+from src.teltonika_http.services.transport_cache import transport_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_transport_cache():
+    transport_cache.clear()
+    yield
+    transport_cache.clear()
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,40 @@
+#!/usr/bin/env bash
+# Локальный Redis Cluster из 6 процессов redis-server: 3 primary + 3 реплики.
+#
+#   tests/integration/redis_cluster.sh start
+#   REDIS_CLUSTER_URL=redis://127.0.0.1:7000/0 python -m pytest tests/integration
+#   tests/integration/redis_cluster.sh stop
+set -euo pipefail
+
+PORTS=(7000 7001 7002 7003 7004 7005)
+DIR="${REDIS_CLUSTER_DIR:-/tmp/teltonika-redis-cluster}"
+
+start() {
+    mkdir -p "$DIR"
+    for port in "${PORTS[@]}"; do
+        mkdir -p "$DIR/$port"
+        redis-server --port "$port" --cluster-enabled yes \
+            --cluster-config-file "$DIR/$port/nodes.conf" --dir "$DIR/$port" \
+            --appendonly no --save "" --daemonize yes \
+            --logfile "$DIR/$port/redis.log" --pidfile "$DIR/$port/redis.pid"
+    done
+    for port in "${PORTS[@]}"; do
+        until redis-cli -p "$port" ping >/dev/null 2>&1; do sleep 0.1; done
+    done
+    redis-cli --cluster create $(printf "127.0.0.1:%s " "${PORTS[@]}") \
+        --cluster-replicas 1 --cluster-yes
+    until redis-cli -p 7000 cluster info | grep -q "cluster_state:ok"; do sleep 0.2; done
+}
+
+stop() {
+    for port in "${PORTS[@]}"; do
+        redis-cli -p "$port" shutdown nosave >/dev/null 2>&1 || true
+    done
+    rm -rf "$DIR"
+}
+
+case "${1:-}" in
+    start) start ;;
+    stop) stop ;;
+    *) echo "usage: $0 start|stop" >&2; exit 1 ;;
+esac
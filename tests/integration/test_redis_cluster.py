@@ -0,0 +1,97 @@
+"""
+Проверки RedisClient против настоящего Redis Cluster
+(см. tests/integration/redis_cluster.sh). Без REDIS_CLUSTER_URL пропускаются.
+"""
+import asyncio
+import os
+
+import pytest
+
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.services.broker import BrokerService
+
+
+CLUSTER_URL = os.environ.get("REDIS_CLUSTER_URL")
+
+pytestmark = pytest.mark.skipif(not CLUSTER_URL, reason="REDIS_CLUSTER_URL is not set")
+
+
+@pytest.fixture
+async def client():
+    client = RedisClient(CLUSTER_URL, cluster=True)
+    await client.connect()
+    await client.delete_hashes_by_pattern("connection:*")
+    for index in BrokerService(client, index_shards=8).index_keys():
+        await client.delete(index)
+    yield client
+    await client.close()
+
+
+async def test_keys_exist_across_slots(client):
+    keys = [f"connection:{n}" for n in range(200)]
+    for key in keys[::2]:
+        await client.hset(key, {"ip": "127.0.0.1"})
+
+    assert await client.keys_exist(keys) == [n % 2 == 0 for n in range(200)]
+
+
+async def test_delete_hashes_grouped_by_slot(client):
+    for n in range(300):
+        await client.hset(f"connection:{n}", {"ip": "127.0.0.1"})
+    await client.set("connection:version", 1)
+
+    assert await client.delete_hashes_by_pattern("connection:*", batch_size=100) == 300
+    assert await client.get("connection:version") == 1
+    await client.delete("connection:version")
+
+
+async def test_sharded_index_with_hash_tags(client):
+    service = BrokerService(client, index_shards=8)
+    imeis = [f"35630704244{n:04}" for n in range(50)]
+    for imei in imeis:
+        await service.update_last_seen(imei)
+
+    assert await service.count_active() == 50
+    assert sorted(await service.get_active(page_size=50)) == sorted(imeis)
+    assert all(await service.get_connections(imeis))
+
+
+async def test_touch_without_common_slot_falls_back(client):
+    # Ключи без общего hash tag — запись pipeline'ом вместо скрипта
+    await client.touch_indexed_hash("connection:1", "last_seen", 10.0, "connections:active", "1")
+
+    assert await client.hget("connection:1", "last_seen") is not None
+    await client.delete("connection:1", "connections:active")
+
+
+async def test_reads_from_replicas(client):
+    await client.hset("connection:replica", {"ip": "127.0.0.1"})
+    reader = RedisClient(CLUSTER_URL, cluster=True, read_from_replicas=True)
+    await reader.connect()
+    try:
+        # реплика догоняет асинхронно
+        await asyncio.sleep(0.5)
+        assert await reader.hgetall("connection:replica") == {"ip": "127.0.0.1"}
+        assert await reader.keys_exist(["connection:replica", "connection:none"]) == [True, False]
+    finally:
+        await reader.close()
+        await client.delete("connection:replica")
+
+
+async def test_subscribe_receives_publish_from_any_node(client):
+    received = asyncio.Queue()
+
+    async def handler(message):
+        await received.put(message)
+
+    task = await client.subscribe("transports:invalidate", handler)
+    # SUBSCRIBE отправлен в фоне: дать ему выполниться до PUBLISH
+    await asyncio.sleep(0.2)
+    publisher = RedisClient(CLUSTER_URL, cluster=True)
+    await publisher.connect()
+    try:
+        await publisher.publish("transports:invalidate", {"imei": "1"})
+        assert await asyncio.wait_for(received.get(), 5) == {"imei": "1"}
+    finally:
+        await publisher.close()
+        task.cancel()
@@ -0,0 +1,73 @@
+"""
+TransportOrm.bulk_import против настоящего Postgres (COPY, временная таблица,
+одна транзакция). Без POSTGRES_TEST_URL (postgresql+asyncpg://...) пропускаются.
+
+    POSTGRES_TEST_URL=postgresql+asyncpg://postgres@localhost/teltonika_test \
+        python -m pytest tests/integration
+"""
+import os
+
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.teltonika_http.infra.db.exceptions import RepositoryError
+from src.teltonika_http.infra.db.models import Transport
+from src.teltonika_http.infra.db.queries.transport_orm import TransportOrm
+
+
+POSTGRES_URL = os.environ.get("POSTGRES_TEST_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="POSTGRES_TEST_URL is not set")
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: Transport.__table__.drop(c, checkfirst=True))
+        await conn.run_sync(lambda c: Transport.__table__.create(c))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as s:
+        s.add(Transport(imei="100", name="existing"))
+        await s.commit()
+    yield session_factory
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: Transport.__table__.drop(c, checkfirst=True))
+    await engine.dispose()
+
+
+async def batches(*items):
+    for batch in items:
+        yield batch
+
+
+async def count_transports(db) -> int:
+    async with db() as s:
+        return (await s.execute(select(func.count()).select_from(Transport))).scalar_one()
+
+
+async def test_bulk_import_copies_batches_and_reports_conflicts(db):
+    inserted, conflicts_total, conflicts = await TransportOrm().bulk_import(db, batches(
+        [(1, "101", "a"), (2, "100", "dup of existing"), (3, "101", "dup in file")],
+        [(4, "102", "b"), (5, "103", "c"), (6, "101", "dup from earlier batch"), (7, "100", "dup of existing")],
+    ))
+
+    assert inserted == 3
+    assert conflicts_total == 4
+    assert [(c.line, c.reason) for c in conflicts] == [
+        (2, "already_exists"), (3, "duplicate_in_file"), (6, "duplicate_in_file"), (7, "already_exists"),
+    ]
+    assert await count_transports(db) == 4
+
+
+async def test_bulk_import_is_one_transaction(db):
+    async def failing():
+        yield [(1, "201", "a")]
+        yield [(2, "202", "x" * 200)]  # длиннее varchar(150)
+
+    with pytest.raises(RepositoryError):
+        await TransportOrm().bulk_import(db, failing())
+
+    # Первая пачка не осталась в таблице
+    assert await count_transports(db) == 1
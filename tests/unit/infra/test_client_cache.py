@@ -0,0 +1,116 @@
+import pytest
+
+from src.teltonika_http.infra.broker.client_cache import ClientSideCache
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.util.cache import MISSING
+
+pytest.importorskip("lupa")
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def cache():
+    cache = ClientSideCache(maxsize=100, ttl=60, prefixes=("connection:",))
+    # tracking-соединения не поднимаются: инвалидации подаются вручную
+    cache.active = True
+    return cache
+
+
+@pytest.fixture
+def client(cache):
+    client = RedisClient(client_cache=cache)
+    client._redis = fakeredis.FakeAsyncRedis(decode_responses=False)
+    client._closed = False
+    return client
+
+
+################################################################
+# Test ClientSideCache
+################################################################
+
+def test_store_respects_invalidation_during_read(cache):
+    token = cache.begin("connection:1")
+    cache.invalidate([b"connection:1"])
+    cache.store("connection:1", "hgetall", {"ip": "old"}, token)
+
+    assert cache.get("connection:1", "hgetall") is MISSING
+
+
+def test_invalidate_none_flushes(cache):
+    token = cache.begin("connection:1")
+    cache.store("connection:1", "hgetall", {}, token)
+
+    cache.invalidate(None)
+
+    assert cache.get("connection:1", "hgetall") is MISSING
+    assert cache.stats()["flushes"] == 1
+
+
+def test_store_is_not_counted_as_lookup(cache):
+    assert cache.get("connection:1", "hgetall") is MISSING
+    token = cache.begin("connection:1")
+    cache.store("connection:1", "hgetall", {}, token)
+    cache.store("connection:1", "hget", "x", token)
+    assert cache.get("connection:1", "hgetall") == {}
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_covers_only_prefixes_when_active(cache):
+    assert cache.covers("connection:1")
+    assert not cache.covers("version:transports")
+    cache.active = False
+    assert not cache.covers("connection:1")
+
+
+################################################################
+# Test RedisClient with client-side cache
+################################################################
+
+async def test_hgetall_served_from_memory_until_invalidated(client, cache):
+    await client._redis.hset("connection:1", "ip", "1.1.1.1")
+    assert await client.hgetall("connection:1") == {"ip": "1.1.1.1"}
+
+    await client._redis.hset("connection:1", "ip", "2.2.2.2")
+    # без инвалидации — из кеша
+    assert await client.hgetall("connection:1") == {"ip": "1.1.1.1"}
+
+    cache.invalidate([b"connection:1"])
+    assert await client.hgetall("connection:1") == {"ip": "2.2.2.2"}
+
+
+async def test_hgetall_returns_copy(client):
+    await client._redis.hset("connection:1", "ip", "1.1.1.1")
+    (await client.hgetall("connection:1"))["ip"] = "changed"
+
+    assert await client.hgetall("connection:1") == {"ip": "1.1.1.1"}
+
+
+async def test_hget_and_keys_exist_cached(client, cache):
+    await client._redis.hset("connection:1", "last_seen", "10")
+
+    assert await client.hget("connection:1", "last_seen") == "10"
+    assert await client.keys_exist(["connection:1", "connection:2"]) == [True, False]
+
+    await client._redis.hset("connection:2", "last_seen", "11")
+    await client._redis.delete("connection:1")
+    assert await client.keys_exist(["connection:1", "connection:2"]) == [True, False]
+    assert await client.hget("connection:1", "last_seen") == "10"
+
+    cache.invalidate([b"connection:1", b"connection:2"])
+    assert await client.keys_exist(["connection:1", "connection:2"]) == [False, True]
+    assert await client.hget("connection:1", "last_seen") is None
+
+
+async def test_inactive_cache_goes_to_redis(client, cache):
+    cache.active = False
+    await client._redis.hset("connection:1", "ip", "1.1.1.1")
+    await client.hgetall("connection:1")
+    await client._redis.hset("connection:1", "ip", "2.2.2.2")
+
+    assert await client.hgetall("connection:1") == {"ip": "2.2.2.2"}
+
+
+def test_cache_disabled_in_cluster_mode(cache):
+    assert RedisClient(cluster=True, client_cache=cache).client_cache is None
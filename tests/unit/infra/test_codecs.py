@@ -0,0 +1,75 @@
+import importlib.util
+
+import pytest
+
+from src.teltonika_http.infra.broker.codecs import (
+    JsonCodec, OrjsonCodec, MsgpackCodec, get_codec, parse_prefix_codecs
+)
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+
+
+# orjson и msgpack — необязательный extra "codecs"
+requires_orjson = pytest.mark.skipif(importlib.util.find_spec("orjson") is None, reason="orjson is not installed")
+requires_msgpack = pytest.mark.skipif(importlib.util.find_spec("msgpack") is None, reason="msgpack is not installed")
+
+PAYLOAD = {"imei": "356307042441013", "last_seen": 1768212063.48, "tags": [1, 2]}
+
+
+################################################################
+# Test codecs
+################################################################
+
+@pytest.mark.parametrize("codec_cls", [
+    JsonCodec,
+    pytest.param(OrjsonCodec, marks=requires_orjson),
+    pytest.param(MsgpackCodec, marks=requires_msgpack),
+])
+def test_codec_roundtrip(codec_cls):
+    codec = codec_cls()
+    encoded = codec.encode(PAYLOAD)
+
+    assert isinstance(encoded, bytes)
+    assert codec.decode(encoded) == PAYLOAD
+
+
+def test_get_codec_unknown():
+    with pytest.raises(ValueError):
+        get_codec("pickle")
+
+
+def test_parse_prefix_codecs():
+    assert parse_prefix_codecs("events:=msgpack, cache:=orjson") == {"events:": "msgpack", "cache:": "orjson"}
+    assert parse_prefix_codecs("") == {}
+    with pytest.raises(ValueError):
+        parse_prefix_codecs("events:")
+
+################################################################
+
+
+################################################################
+# Test RedisClient codec selection
+################################################################
+
+@requires_orjson
+@requires_msgpack
+def test_prefix_codec_selected_by_longest_prefix():
+    client = RedisClient(codec="json", prefix_codecs={"events:": "msgpack", "events:raw:": "orjson"})
+
+    assert client._codec_for("events:1").name == "msgpack"
+    assert client._codec_for(b"events:raw:1").name == "orjson"
+    assert client._codec_for("connection:1").name == "json"
+    assert client._from_bytes(client._to_bytes(PAYLOAD, "events:1"), "events:1") == PAYLOAD
+
+
+@requires_msgpack
+def test_binary_codec_requires_binary_mode():
+    with pytest.raises(ValueError):
+        RedisClient(decode_responses=True, codec="msgpack")
+
+
+def test_decode_hash_in_binary_mode():
+    client = RedisClient(decode_responses=False)
+
+    assert client._decode_hash({b"ip": b"10.0.0.1", b"last_seen": b"1.5"}) == {"ip": "10.0.0.1", "last_seen": "1.5"}
+
+################################################################
@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import pytest
+
+from src.teltonika_http.infra.db.models import Transport
+from src.teltonika_http.infra.db.queries.count_provider import CountProvider, CountStrategy
+
+
+################################################################
+# Test CountProvider.count
+################################################################
+
+@pytest.mark.asyncio
+async def test_cached_count_hits_db_once():
+    provider = CountProvider(ttl=60)
+
+    with patch.object(CountProvider, "_exact", return_value=42) as mock_exact:
+        first = await provider.count("fake_db", Transport, CountStrategy.cached)
+        second = await provider.count("fake_db", Transport, CountStrategy.cached)
+
+    assert first == second == 42
+    mock_exact.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cached_count_invalidated():
+    provider = CountProvider(ttl=60)
+
+    with patch.object(CountProvider, "_exact", side_effect=[1, 2]) as mock_exact:
+        await provider.count("fake_db", Transport, CountStrategy.cached)
+        provider.invalidate(Transport)
+        result = await provider.count("fake_db", Transport, CountStrategy.cached)
+
+    assert result == 2
+    assert mock_exact.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_exact_count_is_never_cached():
+    provider = CountProvider(ttl=60)
+
+    with patch.object(CountProvider, "_exact", side_effect=[1, 2]):
+        await provider.count("fake_db", Transport, CountStrategy.exact)
+        result = await provider.count("fake_db", Transport, CountStrategy.exact)
+
+    assert result == 2
+
+
+@pytest.mark.asyncio
+async def test_estimated_count_uses_planner_estimate():
+    provider = CountProvider(ttl=60)
+
+    with patch.object(CountProvider, "_estimated", return_value=1000), \
+        patch.object(CountProvider, "_exact") as mock_exact:
+        result = await provider.count("fake_db", Transport, CountStrategy.estimated)
+
+    assert result == 1000
+    mock_exact.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_estimated_count_falls_back_without_statistics():
+    provider = CountProvider(ttl=60)
+
+    with patch.object(CountProvider, "_estimated", return_value=None), \
+        patch.object(CountProvider, "_exact", return_value=7):
+        result = await provider.count("fake_db", Transport, CountStrategy.estimated)
+
+    assert result == 7
+
+################################################################
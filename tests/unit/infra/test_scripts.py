@@ -0,0 +1,94 @@
+import pytest
+
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.infra.broker.scripts import LuaScript, register_script
+
+pytest.importorskip("lupa")
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def client():
+    client = RedisClient()
+    client._redis = fakeredis.FakeAsyncRedis(decode_responses=False)
+    client._closed = False
+    return client
+
+
+################################################################
+# Test registry
+################################################################
+
+def test_register_script_rejects_conflicting_source():
+    register_script("test_same", "return 1")
+    assert register_script("test_same", "return 1").sha == LuaScript("x", "return 1").sha
+
+    with pytest.raises(ValueError):
+        register_script("test_same", "return 2")
+
+
+async def test_run_script_reloads_on_noscript(client):
+    script = LuaScript("test_echo", "return ARGV[1]")
+
+    # скрипт не загружен — EVALSHA получит NOSCRIPT и загрузит его
+    assert await client.run_script(script, keys=[], args=["hi"]) == b"hi"
+    await client._redis.script_flush()
+    assert await client.run_script(script, keys=[], args=["again"]) == b"again"
+
+
+################################################################
+# Test built-in scripts
+################################################################
+
+async def test_keys_exist_bitmap(client):
+    await client._redis.set("a", 1)
+    await client._redis.hset("c", "f", 1)
+
+    assert await client.keys_exist(["a", "b", "c"]) == [True, False, True]
+    assert await client.keys_exist([]) == []
+
+
+async def test_delete_hashes_by_pattern_skips_other_types(client):
+    await client._redis.hset("connection:1", "ip", "1.1.1.1")
+    await client._redis.hset("connection:2", "ip", "1.1.1.2")
+    await client._redis.set("connection:version", 3)
+
+    assert await client.delete_hashes_by_pattern("connection:*", batch_size=2) == 2
+    assert await client._redis.exists("connection:version") == 1
+
+
+async def test_touch_indexed_hash(client):
+    pubsub = client._redis.pubsub()
+    await pubsub.subscribe("events")
+    await pubsub.get_message(timeout=1)
+
+    await client.touch_indexed_hash(
+        "connection:1", "last_seen", 1700000000.5, "connections:active", "1",
+        channel="events", message={"imei": "1"},
+    )
+
+    assert await client._redis.hget("connection:1", "last_seen") == b"1700000000.5"
+    assert await client._redis.zscore("connections:active", "1") == 1700000000.5
+    message = await pubsub.get_message(timeout=1)
+    assert client._from_bytes(message["data"], "events") == {"imei": "1"}
+    await pubsub.aclose()
+
+
+async def test_hset_if_field_in(client):
+    await client._redis.hset("job", mapping={"status": "running", "cursor": 0})
+
+    assert await client.hset_if("job", "status", ["running", "paused"], {"status": "pausing", "cursor": 5})
+    assert not await client.hset_if("job", "status", ["running"], {"status": "cancelling"})
+    assert await client._redis.hgetall("job") == {b"status": b"pausing", b"cursor": b"5"}
+
+
+async def test_version_counter_new_epoch_after_flush(client):
+    epoch, counter = await client.version_counter("table_version:t")
+    assert counter == 0
+    assert await client.version_counter("table_version:t", 1) == (epoch, 1)
+
+    await client._redis.flushall()
+
+    new_epoch, counter = await client.version_counter("table_version:t", 1)
+    assert counter == 1
+    assert new_epoch != epoch
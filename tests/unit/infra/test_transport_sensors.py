@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.teltonika_http.infra.db.models import Transport, Sensor, SensorNumber, SensorStatus
+from src.teltonika_http.infra.db.queries.count_provider import CountStrategy
+from src.teltonika_http.services.transport import TransportService
+from src.teltonika_http.util.dtos import TransportWithSensorsDto
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda c: Transport.metadata.create_all(c, tables=[Transport.__table__, Sensor.__table__])
+        )
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as s:
+        for n in range(30):
+            imei = f"{n:03}"
+            s.add(Transport(imei=imei, name=f"T{n}"))
+            for num in (SensorNumber.one, SensorNumber.two):
+                s.add(Sensor(
+                    name=f"S{n}-{num.value}",
+                    virtual_device_name="vd",
+                    transport_imei=imei,
+                    sensor_num=num,
+                    status=SensorStatus.attached,
+                ))
+        await s.commit()
+
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    session_factory.statements = statements
+    yield session_factory
+    await engine.dispose()
+
+
+################################################################
+# Test TransportService include_sensors
+################################################################
+
+@pytest.mark.parametrize("page_size", [1, 5, 25])
+async def test_cursor_page_query_count_is_constant(db, page_size):
+    page = await TransportService(db).get_all_cursor(page_size, None, include_sensors=True)
+
+    # Страница транспорта + один selectinload датчиков
+    assert len(db.statements) == 2
+    assert len(page.data) == page_size
+    assert all(isinstance(item, TransportWithSensorsDto) for item in page.data)
+    assert [s.sensor_num for s in page.data[0].sensors] == [SensorNumber.one, SensorNumber.two]
+
+
+@pytest.mark.parametrize("page_size", [1, 5, 25])
+async def test_offset_page_query_count_is_constant(db, page_size):
+    page = await TransportService(db).get_all(page_size, 1, CountStrategy.exact, include_sensors=True)
+
+    # COUNT(*) + страница + датчики
+    assert len(db.statements) == 3
+    assert len(page.data) == min(page_size, 30 - page_size)
+    assert all(len(item.sensors) == 2 for item in page.data)
+
+
+async def test_page_without_sensors_does_not_load_them(db):
+    page = await TransportService(db).get_all_cursor(5, None)
+
+    assert len(db.statements) == 1
+    assert "sensors" not in page.data[0].model_dump()
+
+
+async def test_details_with_sensors(db):
+    transport = await TransportService(db).get_details("007", include_sensors=True)
+
+    assert len(db.statements) == 2
+    assert transport.imei == "007"
+    assert {s.name for s in transport.sensors} == {"S7-1", "S7-2"}
@@ -11,9 +11,12 @@ from src.teltonika_http.services.auth import (
     AuthService, TokenExpiredException, NotValidatedException, REFRESH_TOKEN_EXPIRE_DAYS,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from src.teltonika_http.infra.db.exceptions import ItemNotFoundException
 from src.teltonika_http.infra.db.queries import UserOrm
 from src.teltonika_http.infra.db.models import UserModel
-from src.teltonika_http.util.dtos import CurrentUserDto
+from src.teltonika_http.routes import admin
+from src.teltonika_http.util.dtos import AdminSetUserActiveDto, CurrentUserDto
+from src.teltonika_http.services.user_cache import user_cache, on_user_invalidated
 
 ################################################################
 # Test AuthService.decode_token
@@ -255,7 +258,8 @@ def test_hash_password_generates_unique_hashes():
 # Test AuthService.authenticate_user
 ################################################################
 
-def test_authenticate_user_success():
+@pytest.mark.asyncio
+async def test_authenticate_user_success():
     username = "testuser"
     password = "secret"
 
@@ -266,7 +270,7 @@ def test_authenticate_user_success():
 
     with patch.object(UserOrm, "get_first", return_value=mock_user) as mock_get, \
          patch.object(AuthService, "verify_password", return_value=True) as mock_verify:
-        result = AuthService.authenticate_user(username, password, db="fake_db")
+        result = await AuthService.authenticate_user(username, password, db="fake_db")
 
         # chekc result
         assert result == mock_user
@@ -276,7 +280,8 @@ def test_authenticate_user_success():
         mock_verify.assert_called_once_with(password, mock_user.hashed_password)
 
 
-def test_authenticate_user_wrong_password():
+@pytest.mark.asyncio
+async def test_authenticate_user_wrong_password():
     username = "testuser"
     password = "wrong"
 
@@ -285,16 +290,17 @@ def test_authenticate_user_wrong_password():
 
     with patch.object(UserOrm, "get_first", return_value=mock_user), \
          patch.object(AuthService, "verify_password", return_value=False):
-        result = AuthService.authenticate_user(username, password, db="fake_db")
+        result = await AuthService.authenticate_user(username, password, db="fake_db")
         assert result is False
 
 
-def test_authenticate_user_user_not_found():
+@pytest.mark.asyncio
+async def test_authenticate_user_user_not_found():
     username = "missing"
     password = "any"
 
     with patch.object(UserOrm, "get_first", return_value=None):
-        result = AuthService.authenticate_user(username, password, db="fake_db")
+        result = await AuthService.authenticate_user(username, password, db="fake_db")
         assert result is False
 
 ################################################################
@@ -304,7 +310,8 @@ def test_authenticate_user_user_not_found():
 # Test AuthService.get_token
 ################################################################
 
-def test_get_token_success(form_data, fake_user):
+@pytest.mark.asyncio
+async def test_get_token_success(form_data, fake_user):
     db = object()
 
     toker_pair = ("access-token", "refresh-token")
@@ -312,7 +319,7 @@ def test_get_token_success(form_data, fake_user):
     with patch.object(AuthService, "authenticate_user", return_value=fake_user), \
         patch.object(AuthService, "_AuthService__create_token_pair", return_value=toker_pair):
 
-        result = AuthService.get_token(form_data, db)
+        result = await AuthService.get_token(form_data, db)
 
         assert result == {
             "access_token": "access-token",
@@ -321,12 +328,13 @@ def test_get_token_success(form_data, fake_user):
         }
 
 
-def test_get_token_invalid_user(form_data):
+@pytest.mark.asyncio
+async def test_get_token_invalid_user(form_data):
     db = object()
 
     with patch.object(AuthService, "authenticate_user", return_value=False), \
         pytest.raises(NotValidatedException):
-        AuthService.get_token(form_data, db)
+        await AuthService.get_token(form_data, db)
 
 ################################################################
 
@@ -415,6 +423,60 @@ async def test_get_current_user_inactive_user(valid_token_decoded, inactive_user
     assert exc.value.detail == "User inactive"
     assert exc.value.status_code == 400
 
+
+@pytest.mark.asyncio
+async def test_get_current_user_cached(valid_token_decoded, valid_user):
+    db = object()
+    # Счётчики кеша общие для процесса: проверяется только прирост
+    hits_before = user_cache.hits
+
+    with patch.object(AuthService, "decode_token", return_value=valid_token_decoded), \
+        patch.object(UserOrm, "get_first", return_value=valid_user) as mock_get:
+        await AuthService.get_current_user("valid-token", db)
+        result = await AuthService.get_current_user("valid-token", db)
+
+    assert result.id == 1
+    mock_get.assert_called_once()
+    assert user_cache.hits - hits_before == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_cached_inactive(valid_token_decoded):
+    user_cache.set(1, ("test@example.com", False))
+
+    with patch.object(AuthService, "decode_token", return_value=valid_token_decoded), \
+        patch.object(UserOrm, "get_first") as mock_get:
+        with pytest.raises(HTTPException) as exc:
+            await AuthService.get_current_user("valid-token", object())
+
+    assert exc.value.status_code == 400
+    mock_get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_after_invalidation(valid_token_decoded, inactive_user):
+    user_cache.set(1, ("test@example.com", True))
+    await on_user_invalidated({"id": 1})
+
+    with patch.object(AuthService, "decode_token", return_value=valid_token_decoded), \
+        patch.object(UserOrm, "get_first", return_value=inactive_user):
+        with pytest.raises(HTTPException) as exc:
+            await AuthService.get_current_user("valid-token", object())
+
+    assert exc.value.detail == "User inactive"
+
+
+@pytest.mark.asyncio
+async def test_set_user_active_unknown_user():
+    body = AdminSetUserActiveDto(admin_token=settings.ADMIN_TOKEN, user_id=404, is_active=False)
+
+    with patch.object(UserOrm, "update", return_value=0), \
+        patch.object(admin, "publish_user_invalidation") as mock_publish:
+        with pytest.raises(ItemNotFoundException):
+            await admin.set_user_active(MagicMock(client=None), body, object(), object())
+
+    mock_publish.assert_not_called()
+
 ################################################################
 
 
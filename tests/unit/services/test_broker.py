@@ -0,0 +1,61 @@
+import pytest
+
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.services.broker import BrokerService
+
+pytest.importorskip("lupa")
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def client():
+    client = RedisClient()
+    client._redis = fakeredis.FakeAsyncRedis(decode_responses=False)
+    client._closed = False
+    return client
+
+
+################################################################
+# Test key layout
+################################################################
+
+def test_single_shard_keeps_plain_keys(client):
+    service = BrokerService(client)
+
+    assert service.connection_key("123") == "connection:123"
+    assert service.index_key("123") == "connections:active"
+    assert service.index_keys() == ["connections:active"]
+
+
+def test_sharded_keys_share_hash_tag(client):
+    service = BrokerService(client, index_shards=4)
+
+    key = service.connection_key("356307042441013")
+    index = service.index_key("356307042441013")
+    tag = key.split(":")[1]
+
+    assert tag.startswith("{c") and tag.endswith("}")
+    assert index == f"connections:active:{tag}"
+    assert len(service.index_keys()) == 4
+
+
+################################################################
+# Test sharded index
+################################################################
+
+async def test_sharded_index_merges_by_last_seen(client):
+    service = BrokerService(client, index_shards=4)
+    imeis = [f"35630704244{n:04}" for n in range(20)]
+    for n, imei in enumerate(imeis):
+        await client.touch_indexed_hash(
+            service.connection_key(imei), "last_seen", 1000 + n, service.index_key(imei), imei
+        )
+
+    assert await service.count_active() == 20
+    assert await service.count_active(seen_after=1015) == 5
+    assert await service.get_active(page_size=3) == imeis[::-1][:3]
+    assert await service.get_active(page_size=5, offset=5) == imeis[::-1][5:10]
+    assert await service.get_connections([imeis[0], "unknown"]) == [True, False]
+
+    await service.remove_connection(imeis[-1])
+    assert await service.get_active(page_size=1) == [imeis[-2]]
@@ -0,0 +1,84 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.teltonika_http.services.connection import ConnectionService
+from src.teltonika_http.infra.db.queries.transport_orm import TransportOrm
+from src.teltonika_http.util.dtos import ItemListCursorDto, TransportDto
+
+
+def cursor_page(imeis: list[str], next_cursor: str | None) -> ItemListCursorDto:
+    return ItemListCursorDto(
+        data=[TransportDto(imei=imei, name=imei) for imei in imeis],
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+    )
+
+
+################################################################
+# Test ConnectionService.get_all_cursor
+################################################################
+
+@pytest.mark.asyncio
+async def test_get_all_cursor_fills_page_across_db_pages():
+    broker = AsyncMock()
+    broker.get_connections.side_effect = [[True, False], [True]]
+    pages = [cursor_page(["1", "2"], "c2"), cursor_page(["3"], "c3")]
+
+    with patch.object(TransportOrm, "all_keyset", side_effect=pages) as mock_keyset:
+        result = await ConnectionService("fake_db", broker).get_all_cursor(2, None)
+
+    assert result.data == ["1", "3"]
+    assert result.next_cursor == "c3"
+    assert mock_keyset.call_args_list[0].args == ("fake_db", 2, None)
+    # second round asks only for the rest of the page, starting after the last scanned row
+    assert mock_keyset.call_args_list[1].args == ("fake_db", 1, "c2")
+
+
+@pytest.mark.asyncio
+async def test_get_all_cursor_last_page_has_no_cursor():
+    broker = AsyncMock()
+    broker.get_connections.return_value = [False, True]
+
+    with patch.object(TransportOrm, "all_keyset", return_value=cursor_page(["1", "2"], None)):
+        result = await ConnectionService("fake_db", broker).get_all_cursor(5, "c0")
+
+    assert result.data == ["2"]
+    assert result.next_cursor is None
+
+################################################################
+
+
+################################################################
+# Test ConnectionService.get_all_indexed
+################################################################
+
+@pytest.mark.asyncio
+async def test_get_all_indexed_reads_only_index():
+    broker = AsyncMock()
+    broker.get_active.return_value = ["3", "1"]
+    broker.count_active.return_value = 10
+
+    with patch.object(TransportOrm, "all_offset") as mock_offset:
+        result = await ConnectionService("fake_db", broker).get_all_indexed(2, 4)
+
+    assert result.data == ["3", "1"]
+    assert result.offset == 6
+    assert result.total_elements == 10
+    broker.get_active.assert_called_once_with(2, 4, None)
+    mock_offset.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_all_indexed_seen_within_sets_lower_bound():
+    broker = AsyncMock()
+    broker.get_active.return_value = []
+    broker.count_active.return_value = 0
+
+    await ConnectionService("fake_db", broker).get_all_indexed(5, 0, seen_within=10)
+
+    seen_after = broker.get_active.call_args.args[2]
+    assert seen_after is not None
+    broker.count_active.assert_called_once_with(seen_after)
+
+################################################################
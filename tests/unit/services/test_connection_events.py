@@ -0,0 +1,73 @@
+import pytest
+
+from src.teltonika_http.services.connection_events import ConnectionEventHub, EventSubscription
+
+
+def last_seen(imei: str, ts: float) -> dict:
+    return {"type": "last_seen", "imei": imei, "ts": ts}
+
+
+################################################################
+# Test EventSubscription
+################################################################
+
+@pytest.mark.asyncio
+async def test_last_seen_events_are_coalesced():
+    sub = EventSubscription(maxsize=10)
+
+    sub.put(last_seen("1", 1.0))
+    sub.put({"type": "disconnect", "imei": "2", "ts": 1.5})
+    sub.put(last_seen("1", 2.0))
+
+    assert await sub.get(timeout=0) == last_seen("1", 2.0)
+    assert (await sub.get(timeout=0))["type"] == "disconnect"
+    assert await sub.get(timeout=0) is None
+    assert sub.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_oldest_events_dropped_when_full():
+    sub = EventSubscription(maxsize=2)
+
+    for i in range(4):
+        sub.put(last_seen(str(i), float(i)))
+
+    assert sub.dropped == 2
+    assert (await sub.get(timeout=0))["imei"] == "2"
+    assert (await sub.get(timeout=0))["imei"] == "3"
+
+
+@pytest.mark.asyncio
+async def test_imei_filter():
+    sub = EventSubscription(maxsize=10, imeis={"1"})
+
+    sub.put(last_seen("2", 1.0))
+    sub.put(last_seen("1", 1.0))
+
+    assert (await sub.get(timeout=0))["imei"] == "1"
+    assert await sub.get(timeout=0) is None
+
+################################################################
+
+
+################################################################
+# Test ConnectionEventHub
+################################################################
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_to_all_subscribers():
+    hub = ConnectionEventHub()
+    first = hub.subscribe(10)
+    second = hub.subscribe(10)
+
+    await hub._on_message(last_seen("1", 1.0))
+    hub.unsubscribe(second)
+    await hub._on_message(last_seen("2", 1.0))
+
+    assert hub.subscribers == 1
+    assert (await first.get(timeout=0))["imei"] == "1"
+    assert (await first.get(timeout=0))["imei"] == "2"
+    assert (await second.get(timeout=0))["imei"] == "1"
+    assert await second.get(timeout=0) is None
+
+################################################################
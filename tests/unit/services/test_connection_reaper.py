@@ -0,0 +1,114 @@
+import pytest
+
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.services.broker import BrokerService
+from src.teltonika_http.services.connection_events import CONNECTION_EVENTS_CHANNEL
+from src.teltonika_http.services.connection_reaper import REAPER_LOCK, ConnectionReaper
+
+pytest.importorskip("lupa")
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def client():
+    client = RedisClient()
+    client._redis = fakeredis.FakeAsyncRedis(decode_responses=False)
+    client._closed = False
+    return client
+
+
+async def seed(client, service, last_seen: dict[str, float]):
+    for imei, ts in last_seen.items():
+        await client.touch_indexed_hash(
+            service.connection_key(imei), "last_seen", ts, service.index_key(imei), imei
+        )
+
+
+################################################################
+# Test ConnectionReaper
+################################################################
+
+@pytest.mark.parametrize("shards", [1, 4])
+async def test_reap_once_removes_only_stale(client, shards):
+    service = BrokerService(client, index_shards=shards)
+    stale = {f"1000{n:02}": 100.0 + n for n in range(25)}
+    fresh = {f"2000{n:02}": 900.0 + n for n in range(5)}
+    await seed(client, service, {**stale, **fresh})
+    reaper = ConnectionReaper(client, service, stale_after=300, batch_size=10, max_per_second=1e6)
+
+    result = await reaper.reap_once(now=1000)
+
+    assert result["reaped"] == 25
+    assert result["batches"] >= 3
+    assert await service.count_active() == 5
+    assert await service.get_connections(list(stale)) == [False] * 25
+    assert await service.get_connections(list(fresh)) == [True] * 5
+    assert reaper.stats()["reaped_total"] == 25
+
+
+async def test_reap_skips_connection_refreshed_after_selection(client):
+    service = BrokerService(client)
+    await seed(client, service, {"1": 100.0, "2": 100.0})
+    # "2" обновился между выборкой и удалением
+    await seed(client, service, {"2": 950.0})
+
+    reaped = await client.reap_indexed(
+        "connections:active", ["connection:1", "connection:2"], ["1", "2"], max_score=700
+    )
+
+    assert reaped == [("1", 100.0)]
+    assert await service.get_connections(["1", "2"]) == [False, True]
+
+
+async def test_run_locked_single_owner(client):
+    service = BrokerService(client)
+    reaper = ConnectionReaper(client, service)
+    token = await client.acquire_lock(REAPER_LOCK, ttl=10)
+
+    assert await reaper.run_locked() is None
+
+    await client.release_lock(REAPER_LOCK, token)
+    assert (await reaper.run_locked())["reaped"] == 0
+    assert await client._redis.exists(REAPER_LOCK) == 0
+
+
+async def test_disconnect_events_carry_last_seen(client):
+    service = BrokerService(client)
+    await seed(client, service, {"1": 100.0, "2": 150.0})
+    pubsub = client._redis.pubsub()
+    await pubsub.subscribe(CONNECTION_EVENTS_CHANNEL)
+    await pubsub.get_message(timeout=1)
+
+    await ConnectionReaper(client, service, stale_after=300, max_per_second=1e6).reap_once(now=1000)
+
+    events = []
+    while (message := await pubsub.get_message(timeout=0.1)) is not None:
+        events.append(client._from_bytes(message["data"], CONNECTION_EVENTS_CHANNEL))
+    assert sorted((e["imei"], e["ts"]) for e in events) == [("1", 100.0), ("2", 150.0)]
+    assert {e["type"] for e in events} == {"disconnect"}
+    await pubsub.aclose()
+
+
+async def test_pass_extends_lock_and_stops_when_lost(client):
+    service = BrokerService(client)
+    await seed(client, service, {f"{n:03}": 100.0 + n for n in range(30)})
+    reaper = ConnectionReaper(client, service, stale_after=300, batch_size=10, max_per_second=1e6)
+
+    token = await client.acquire_lock(REAPER_LOCK, ttl=1)
+    await reaper.reap_once(now=1000, lock_token=token)
+    assert await client._redis.pttl(REAPER_LOCK) > 1000
+
+    await seed(client, service, {f"{n:03}": 100.0 + n for n in range(30)})
+    # Блокировку перехватил другой воркер: проход останавливается после первой пачки
+    await client._redis.set(REAPER_LOCK, "other")
+    result = await reaper.reap_once(now=1000, lock_token=token)
+    assert result["batches"] == 1
+    assert await service.count_active() == 20
+
+
+async def test_update_last_seen_sets_ttl(client):
+    service = BrokerService(client, connection_ttl=120)
+
+    await service.update_last_seen("1")
+
+    assert 0 < await client._redis.ttl("connection:1") <= 120
@@ -0,0 +1,214 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.teltonika_http.infra.broker.redis_client import RedisClient
+from src.teltonika_http.services import maintenance
+from src.teltonika_http.services.maintenance import (
+    LatencyGuard,
+    MaintenanceEngine,
+    MaintenanceJobStateException,
+    MaintenanceKind,
+)
+
+pytest.importorskip("lupa")
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def client():
+    client = RedisClient()
+    client._redis = fakeredis.FakeAsyncRedis(decode_responses=False)
+    client._closed = False
+    return client
+
+
+@pytest.fixture
+async def engine(client):
+    engine = MaintenanceEngine(client, ops_per_second=1e6, page_size=7, p99_ceiling_ms=1000)
+    yield engine
+    await engine.shutdown()
+
+
+async def wait_status(engine, job_id, *statuses, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        job = await engine.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {job['status']}")
+
+
+################################################################
+# Test LatencyGuard
+################################################################
+
+def test_latency_guard_backs_off_and_recovers():
+    guard = LatencyGuard(ceiling_ms=5, max_rate=1000, min_rate=100, window=10)
+
+    for _ in range(10):
+        guard.record(50)
+    assert guard.over_ceiling()
+    assert guard.rate == 100
+
+    for _ in range(50):
+        guard.record(1)
+    assert not guard.over_ceiling()
+    assert guard.rate == 1000
+
+
+################################################################
+# Test MaintenanceEngine
+################################################################
+
+async def test_delete_only_matching_hashes(client, engine):
+    for n in range(20):
+        await client.hset(f"old:{n}", {"a": 1})
+    await client._redis.set("old:string", b"x")
+    await client.hset("keep:1", {"a": 1})
+
+    job = await engine.start(MaintenanceKind.delete, "old:*")
+    job = await wait_status(engine, job["id"], "done")
+
+    assert job["affected"] == 20
+    assert job["processed"] == 21
+    assert await client._redis.exists("old:string") == 1
+    assert await client._redis.exists("keep:1") == 1
+
+
+async def test_reencode_compare_and_swap(client, engine):
+    for n in range(5):
+        await client._redis.set(f"enc:{n}", json.dumps({"n": n}, indent=2).encode(), ex=100)
+    await client._redis.set("enc:broken", b"\xff not json")
+
+    job = await engine.start(MaintenanceKind.reencode, "enc:*", {"from_codec": "json", "to_codec": "json"})
+    job = await wait_status(engine, job["id"], "done")
+
+    assert job["affected"] == 5
+    assert job["result"]["skipped"] == 1
+    assert await client._redis.get("enc:0") == b'{"n": 0}'
+    assert await client._redis.ttl("enc:0") > 0
+    assert await client.replace_if_equal([("enc:1", b"stale", b"new")]) == 0
+
+
+async def test_migrate_prefix_keeps_existing_targets(client, engine):
+    for n in range(10):
+        await client.hset(f"v1:{n}", {"a": n})
+    await client.hset("v2:0", {"a": "taken"})
+
+    job = await engine.start(
+        MaintenanceKind.migrate_prefix, "v1:*", {"from_prefix": "v1:", "to_prefix": "v2:"}
+    )
+    job = await wait_status(engine, job["id"], "done")
+
+    assert job["affected"] == 9
+    assert await client.hgetall("v2:0") == {"a": "taken"}
+    assert await client.hgetall("v2:5") == {"a": "5"}
+    assert await client._redis.exists("v1:5") == 0
+
+
+async def test_migrate_prefix_rejects_overlapping_prefixes(engine):
+    with pytest.raises(ValueError):
+        await engine.start(
+            MaintenanceKind.migrate_prefix, "v1:*", {"from_prefix": "v1:", "to_prefix": "v1:new:"}
+        )
+
+
+async def test_start_rejected_in_cluster_mode(client, engine):
+    client._cluster = True
+
+    with pytest.raises(ValueError):
+        await engine.start(MaintenanceKind.stats, "*")
+    assert engine._tasks == {}
+
+
+async def test_stats_skips_own_state(client, engine):
+    await client.hset("s:hash", {"a": 1})
+    await client._redis.set("s:str", b"1", ex=100)
+    await client._redis.set("s:persist", b"1")
+
+    job = await engine.start(MaintenanceKind.stats, "*")
+    job = await wait_status(engine, job["id"], "done")
+
+    assert job["result"]["types"] == {"hash": 1, "string": 2}
+    assert job["result"]["persistent"] == 2
+
+
+async def test_pause_and_resume_from_cursor(client):
+    for n in range(100):
+        await client.hset(f"p:{n}", {"a": 1})
+    # 7 ключей на страницу при 20 ops/sec — задача точно не успеет завершиться
+    engine = MaintenanceEngine(client, ops_per_second=20, min_ops_per_second=20, page_size=7, p99_ceiling_ms=1000)
+    try:
+        job = await engine.start(MaintenanceKind.delete, "p:*")
+        await asyncio.sleep(0.05)
+        await engine.pause(job["id"])
+        paused = await wait_status(engine, job["id"], "paused")
+        assert 0 < paused["affected"] < 100
+        assert paused["cursor"] != 0
+
+        with pytest.raises(MaintenanceJobStateException):
+            await engine.pause(job["id"])
+
+        await engine.resume(job["id"], ops_per_second=1e6)
+        done = await wait_status(engine, job["id"], "done")
+        assert await client._redis.dbsize() == 1
+        assert done["processed"] >= 100
+    finally:
+        await engine.shutdown()
+
+
+async def test_shutdown_marks_job_interrupted_and_cancel(client):
+    for n in range(50):
+        await client.hset(f"i:{n}", {"a": 1})
+    engine = MaintenanceEngine(client, ops_per_second=10, min_ops_per_second=10, page_size=5, p99_ceiling_ms=1000)
+    job = await engine.start(MaintenanceKind.delete, "i:*")
+    await asyncio.sleep(0.05)
+    await engine.shutdown()
+
+    assert (await engine.get(job["id"]))["status"] == "interrupted"
+    cancelled = await engine.cancel(job["id"])
+    assert cancelled["status"] == "cancelled"
+    with pytest.raises(MaintenanceJobStateException):
+        await engine.resume(job["id"])
+
+
+async def test_pause_after_job_finished_keeps_done(client, engine):
+    job = await engine.start(MaintenanceKind.stats, "none:*")
+    await wait_status(engine, job["id"], "done")
+
+    # get() видит running, но задача успевает завершиться до записи статуса
+    real_get = engine.get
+
+    async def stale_get(job_id):
+        return {**await real_get(job_id), "status": "running"}
+
+    with patch.object(engine, "get", stale_get):
+        with pytest.raises(MaintenanceJobStateException):
+            await engine.pause(job["id"])
+
+    assert (await engine.get(job["id"]))["status"] == "done"
+
+
+async def test_heartbeat_during_throttle(client):
+    for n in range(20):
+        await client.hset(f"h:{n}", {"a": 1})
+    # Страница из 7 ключей при 1 op/sec — пауза в 7 секунд
+    engine = MaintenanceEngine(client, ops_per_second=1, min_ops_per_second=1, page_size=7, p99_ceiling_ms=1000)
+    try:
+        with patch.object(maintenance, "HEARTBEAT_INTERVAL", 0.05):
+            job = await engine.start(MaintenanceKind.stats, "h:*")
+            await asyncio.sleep(0.1)
+            first = (await engine.get(job["id"]))["updated_at"]
+            await asyncio.sleep(0.2)
+            state = await engine.get(job["id"])
+
+        assert state["status"] == "running"
+        assert state["updated_at"] > first
+        assert state["processed"] < 20
+    finally:
+        await engine.shutdown()
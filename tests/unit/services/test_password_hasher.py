@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.teltonika_http.services.password_hasher import (
+    PasswordHasher, HasherBusyException, calibrate_rounds
+)
+
+
+################################################################
+# Test PasswordHasher.run
+################################################################
+
+@pytest.mark.asyncio
+async def test_run_returns_result():
+    hasher = PasswordHasher(max_workers=1, max_queue=1, queue_timeout=1)
+
+    result = await hasher.run(lambda a, b: a + b, 2, 3)
+
+    assert result == 5
+    assert hasher.pending == 0
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_when_queue_full():
+    hasher = PasswordHasher(max_workers=1, max_queue=0, queue_timeout=1)
+    release = threading.Event()
+
+    busy = asyncio.create_task(hasher.run(release.wait))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(HasherBusyException):
+        await hasher.run(lambda: None)
+    assert hasher.rejected == 1
+
+    release.set()
+    await busy
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_after_queue_timeout():
+    hasher = PasswordHasher(max_workers=1, max_queue=1, queue_timeout=0.05)
+    release = threading.Event()
+
+    busy = asyncio.create_task(hasher.run(release.wait))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(HasherBusyException):
+        await hasher.run(lambda: None)
+
+    release.set()
+    await busy
+    assert hasher.pending == 0
+    hasher.shutdown()
+
+
+def test_run_after_shutdown_in_new_loop():
+    hasher = PasswordHasher(max_workers=1, max_queue=1, queue_timeout=1)
+
+    # Два запуска приложения подряд: каждый в своём event loop
+    for _ in range(2):
+        hasher.start()
+        assert asyncio.run(hasher.run(lambda: 42)) == 42
+        hasher.shutdown()
+
+################################################################
+
+
+################################################################
+# Test calibrate_rounds
+################################################################
+
+def test_calibrate_rounds_respects_bounds():
+    assert calibrate_rounds(target_ms=0, min_rounds=4, max_rounds=6) == 4
+    assert calibrate_rounds(target_ms=10 ** 9, min_rounds=4, max_rounds=6) == 6
+
+################################################################
@@ -0,0 +1,77 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.teltonika_http.services.rate_limiter import (
+    RateLimitExceededException, TokenBucketLimiter, enforce_auth_limits, ip_rate_limiter, user_rate_limiter
+)
+
+
+def make_broker(*results):
+    broker = MagicMock()
+    broker.run_script = AsyncMock(side_effect=list(results))
+    return broker
+
+
+################################################################
+# Test TokenBucketLimiter
+################################################################
+
+async def test_hit_allowed():
+    limiter = TokenBucketLimiter("rl", capacity=5, refill_rate=1)
+    broker = make_broker([1, "0"])
+
+    assert await limiter.hit(broker, "alice") == 0
+    broker.run_script.assert_awaited_once()
+    assert broker.run_script.await_args.kwargs["keys"] == ["rl:alice"]
+
+
+async def test_rejected_key_is_blocked_locally():
+    limiter = TokenBucketLimiter("rl", capacity=5, refill_rate=1, local_block=5)
+    broker = make_broker([0, "2.5"])
+
+    assert await limiter.hit(broker, "alice") == 2.5
+    # второй отказ — без похода в Redis
+    assert 0 < await limiter.hit(broker, "alice") <= 2.5
+    assert broker.run_script.await_count == 1
+
+
+async def test_redis_failure_fails_open():
+    limiter = TokenBucketLimiter("rl", capacity=5, refill_rate=1)
+    broker = make_broker(ConnectionError("down"))
+
+    assert await limiter.hit(broker, "alice") == 0
+
+
+async def test_token_bucket_script_on_fakeredis():
+    pytest.importorskip("lupa")
+    fakeredis = pytest.importorskip("fakeredis")
+    from src.teltonika_http.infra.broker.redis_client import RedisClient
+
+    client = RedisClient()
+    client._redis = fakeredis.FakeAsyncRedis(decode_responses=False)
+    client._closed = False
+    limiter = TokenBucketLimiter("rl", capacity=2, refill_rate=0.01, local_block=0)
+
+    assert await limiter.hit(client, "bob") == 0
+    assert await limiter.hit(client, "bob") == 0
+    assert await limiter.hit(client, "bob") > 50
+    assert await limiter.hit(client, "carol") == 0
+
+
+################################################################
+# Test enforce_auth_limits
+################################################################
+
+async def test_enforce_auth_limits_raises_429_with_retry_after():
+    ip_rate_limiter._blocked.clear()
+    user_rate_limiter._blocked.clear()
+    broker = make_broker([1, "0"], [0, "9.2"])
+
+    with pytest.raises(RateLimitExceededException) as exc:
+        await enforce_auth_limits(broker, "10.0.0.1", "Alice")
+
+    assert exc.value.status_code == 429
+    assert exc.value.headers == {"Retry-After": "10"}
+    assert broker.run_script.await_args.kwargs["keys"] == ["ratelimit:user:alice"]
+    user_rate_limiter._blocked.clear()
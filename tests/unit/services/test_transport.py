@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.teltonika_http.infra.db.queries.transport_orm import TransportOrm
+from src.teltonika_http.infra.db.exceptions import ItemNotFoundException
+from src.teltonika_http.services.transport import TransportService
+from src.teltonika_http.services.transport_cache import (
+    transport_cache, cache_missing, TRANSPORT_INVALIDATION_CHANNEL
+)
+from src.teltonika_http.util.cache import MISSING
+from src.teltonika_http.util.dtos import TransportDto
+
+
+################################################################
+# Test TransportService.lookup
+################################################################
+
+@pytest.mark.asyncio
+async def test_lookup_merges_transport_and_connection():
+    broker = AsyncMock()
+    broker.get_connections_details.return_value = [
+        {"imei": "1", "ip": "10.0.0.1", "port": "5027", "server_node": "n1", "last_seen": "1.5"},
+        {},
+    ]
+    rows = [SimpleNamespace(imei="2", name="B"), SimpleNamespace(imei="1", name="A")]
+
+    with patch.object(TransportOrm, "get_many", return_value=rows) as mock_get_many:
+        result = await TransportService("fake_db", broker).lookup(["1", "2", "3", "1"])
+
+    mock_get_many.assert_called_once_with("fake_db", ["1", "2", "3"])
+    broker.get_connections_details.assert_called_once_with(["1", "2"])
+    assert [item.transport.imei for item in result.data] == ["1", "2"]
+    assert result.data[0].connection.last_seen == 1.5
+    assert result.data[1].connection is None
+    assert result.missing == ["3"]
+
+
+@pytest.mark.asyncio
+async def test_lookup_ignores_incomplete_connection_hash():
+    broker = AsyncMock()
+    broker.get_connections_details.return_value = [{"last_seen": "1.5"}]
+
+    with patch.object(TransportOrm, "get_many", return_value=[SimpleNamespace(imei="1", name="A")]):
+        result = await TransportService("fake_db", broker).lookup(["1"])
+
+    assert result.data[0].connection is None
+
+################################################################
+
+
+################################################################
+# Test TransportService.get_details
+################################################################
+
+@pytest.mark.asyncio
+async def test_get_details_cached():
+    with patch.object(TransportOrm, "get_first", return_value=SimpleNamespace(imei="1", name="A")) as mock_get:
+        first = await TransportService("fake_db").get_details("1")
+        second = await TransportService("fake_db").get_details("1")
+
+    assert first == second
+    mock_get.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_details_negative_entry():
+    with patch.object(TransportOrm, "get_first", return_value=None) as mock_get:
+        for _ in range(2):
+            with pytest.raises(ItemNotFoundException):
+                await TransportService("fake_db").get_details("404")
+
+    mock_get.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_create_publishes_invalidation():
+    broker = AsyncMock()
+    cache_missing("1")
+
+    with patch.object(TransportOrm, "create"):
+        await TransportService("fake_db", broker).create(TransportDto(imei="1", name="A"))
+
+    broker.publish.assert_called_once_with(TRANSPORT_INVALIDATION_CHANNEL, {"imei": "1"})
+    assert transport_cache.get("1") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_lookup_queries_only_uncached():
+    broker = AsyncMock()
+    broker.get_connections_details.return_value = [{}]
+    transport_cache.set("1", TransportDto(imei="1", name="A"))
+    cache_missing("2")
+
+    with patch.object(TransportOrm, "get_many", return_value=[]) as mock_get_many:
+        result = await TransportService("fake_db", broker).lookup(["1", "2", "3"])
+
+    mock_get_many.assert_called_once_with("fake_db", ["3"])
+    assert [item.transport.imei for item in result.data] == ["1"]
+    assert result.missing == ["2", "3"]
+
+################################################################
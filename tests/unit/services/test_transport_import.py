@@ -0,0 +1,74 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.teltonika_http.infra.db.queries.transport_orm import TransportOrm
+from src.teltonika_http.services import transport_import
+from src.teltonika_http.services.transport_import import TransportImportService, ImportFormat
+from src.teltonika_http.util.dtos import TransportImportConflictDto
+
+
+async def aiter(lines):
+    for line in lines:
+        yield line
+
+
+def fake_bulk_import(received: list):
+    async def bulk_import(self, session_factory, batches, max_conflicts=1000):
+        async for batch in batches:
+            received.append(batch)
+        rows = [row for batch in received for row in batch]
+        return len(rows), 1, [TransportImportConflictDto(line=rows[-1][0], imei=rows[-1][1], reason="already_exists")]
+    return bulk_import
+
+
+################################################################
+# Test TransportImportService.import_lines
+################################################################
+
+@pytest.mark.asyncio
+async def test_import_csv_batches_and_skips_header():
+    received = []
+    lines = ["imei,name\n", "111,Truck 1\n", "222,Truck 2\n", "333,\"Truck, 3\"\n"]
+
+    with patch.object(TransportOrm, "bulk_import", fake_bulk_import(received)):
+        report = await TransportImportService("fake_db", batch_size=2).import_lines(aiter(lines), ImportFormat.csv)
+
+    assert received == [[(2, "111", "Truck 1"), (3, "222", "Truck 2")], [(4, "333", "Truck, 3")]]
+    assert report.total_rows == 3
+    assert report.inserted == 3
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson_reports_invalid_rows():
+    received = []
+    lines = ['{"imei": "111", "name": "A"}', 'not json', '{"imei": "abc", "name": "B"}', '{"imei": "222", "name": "C"}']
+
+    with patch.object(TransportOrm, "bulk_import", fake_bulk_import(received)):
+        report = await TransportImportService("fake_db").import_lines(aiter(lines), ImportFormat.ndjson)
+
+    assert received == [[(1, "111", "A"), (4, "222", "C")]]
+    assert report.total_rows == 4
+    assert report.conflicts_total == 3
+    assert [(c.line, c.reason) for c in report.conflicts] == [
+        (2, "invalid_row"), (3, "invalid_row"), (4, "already_exists")
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("inserted, bumped", [(1, True), (0, False)])
+async def test_import_bumps_version_and_invalidates(inserted, bumped):
+    broker = AsyncMock()
+
+    with patch.object(TransportOrm, "bulk_import", return_value=(inserted, 0, [])), \
+        patch.object(transport_import, "publish_transport_invalidation") as mock_publish:
+        await TransportImportService("fake_db", broker).import_lines(aiter(["111,A"]), ImportFormat.csv)
+
+    if bumped:
+        broker.bump_table_version.assert_awaited_once_with("transports")
+        mock_publish.assert_awaited_once_with(broker)
+    else:
+        broker.bump_table_version.assert_not_awaited()
+        mock_publish.assert_not_called()
+
+################################################################
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.teltonika_http.infra.db.queries.transport_orm import TransportOrm, escape_like
+from src.teltonika_http.services import transport_search
+from src.teltonika_http.services.transport import TransportService
+from src.teltonika_http.services.transport_search import TransportNameIndex, WATERMARK_OVERLAP, transport_name_index
+
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def rows(*names, at=T0):
+    return [(f"{n}", name, at) for n, name in enumerate(names)]
+
+
+################################################################
+# Test TransportNameIndex
+################################################################
+
+def test_prefix_search_is_case_insensitive_and_ordered():
+    index = TransportNameIndex()
+    index.load(rows("КАМАЗ 102", "камаз 101", "МАЗ 7", "Volvo  FH", "КАМАЗ-Лидер"))
+
+    assert index.search("кама") == [("1", "камаз 101"), ("0", "КАМАЗ 102"), ("4", "КАМАЗ-Лидер")]
+    assert index.search("КАМАЗ 1", limit=1) == [("1", "камаз 101")]
+    assert index.search("volvo fh") == [("3", "Volvo  FH")]
+    assert index.search("X") == []
+
+
+@pytest.mark.parametrize("merge_threshold", [1000, 0])
+def test_upsert_adds_and_renames(merge_threshold):
+    index = TransportNameIndex()
+    index.load(rows("Alpha", "Beta", "Gamma"))
+
+    with patch.object(transport_search, "MERGE_THRESHOLD", merge_threshold):
+        changed = index.upsert([
+            ("1", "Delta", T0 + timedelta(seconds=1)),
+            ("2", "Gamma", T0),
+            ("9", "Alpine", T0 + timedelta(seconds=2)),
+        ])
+
+    assert changed == 2
+    assert len(index) == 4
+    assert index.search("b") == []
+    assert index.search("al") == [("0", "Alpha"), ("9", "Alpine")]
+    assert index.search("d") == [("1", "Delta")]
+    assert index.stats()["watermark"] == (T0 + timedelta(seconds=2)).isoformat()
+
+
+async def test_refresh_loads_then_queries_from_watermark():
+    index = TransportNameIndex()
+    calls = []
+
+    async def names_changed_since(self, session_factory, since):
+        calls.append(since)
+        if since is None:
+            return rows("Alpha", "Beta")
+        return [("2", "Bravo", T0 + timedelta(seconds=10))]
+
+    with patch.object(TransportOrm, "names_changed_since", names_changed_since):
+        await index.refresh("fake_db")
+        await index.refresh("fake_db")
+
+    assert calls == [None, T0 - WATERMARK_OVERLAP]
+    assert index.ready
+    assert index.search("b") == [("1", "Beta"), ("2", "Bravo")]
+
+
+async def test_threaded_upsert_does_not_touch_live_list():
+    index = TransportNameIndex()
+    index.load(rows("Alpha", "Beta", "Gamma"))
+    live_keys = index._keys
+    snapshot = list(live_keys)
+
+    async def names_changed_since(self, session_factory, since):
+        # Пачка больше порога, но изменилась одна запись
+        return [*rows("Alpha", "Beta"), ("2", "Delta", T0 + timedelta(seconds=1))]
+
+    with patch.object(transport_search, "MERGE_THRESHOLD", 1), \
+        patch.object(TransportOrm, "names_changed_since", names_changed_since):
+        await index.refresh("fake_db")
+
+    assert live_keys == snapshot
+    assert index._keys is not live_keys
+    assert index.search("d") == [("2", "Delta")]
+
+
+async def test_full_reload_on_request():
+    index = TransportNameIndex()
+    calls = []
+
+    async def names_changed_since(self, session_factory, since):
+        calls.append(since)
+        return rows("Alpha")
+
+    with patch.object(TransportOrm, "names_changed_since", names_changed_since):
+        await index.refresh("fake_db")
+        index.request_refresh(full=True)
+        await index.refresh("fake_db")
+        await index.refresh("fake_db")
+
+    assert calls == [None, None, T0 - WATERMARK_OVERLAP]
+
+
+def test_escape_like():
+    assert escape_like("50%_a\\b") == "50\\%\\_a\\\\b"
+
+
+################################################################
+# Test TransportService.autocomplete
+################################################################
+
+async def test_autocomplete_falls_back_to_db_until_index_ready():
+    with patch.object(transport_name_index, "ready", False), \
+        patch.object(TransportOrm, "prefix_search", return_value=[("1", "Alpha")]) as mock_prefix:
+        result = await TransportService("fake_db").autocomplete("al", 10)
+
+    mock_prefix.assert_called_once_with("fake_db", "al", 10)
+    assert [item.imei for item in result.data] == ["1"]
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.teltonika_http.util.admission import (
+    AdmissionLimiter, AdmissionMiddleware, AdmissionRejected, Priority, parse_admission_limits
+)
+
+
+################################################################
+# Test AdmissionLimiter
+################################################################
+
+async def test_limiter_admits_up_to_concurrency_then_queues():
+    limiter = AdmissionLimiter("test", concurrency=1, max_queue=4, max_wait=1)
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+
+    limiter.release(0.01)
+    await waiter
+    assert limiter.active == 1
+    assert limiter.queue_depth == 0
+
+    limiter.release(0.01)
+    assert limiter.active == 0
+
+
+async def test_limiter_rejects_when_queue_full():
+    limiter = AdmissionLimiter("test", concurrency=1, max_queue=1, max_wait=1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc:
+        await limiter.acquire()
+
+    assert exc.value.reason == "queue_full"
+    assert limiter.rejected["queue_full"] == 1
+    waiter.cancel()
+
+
+async def test_limiter_rejects_on_deadline_and_timeout():
+    limiter = AdmissionLimiter("test", concurrency=1, max_queue=10, max_wait=0.05)
+    await limiter.acquire()
+
+    # ожидание дольше max_wait — ждём и отказываем по таймауту
+    with pytest.raises(AdmissionRejected) as exc:
+        await limiter.acquire()
+    assert exc.value.reason == "timeout"
+    assert limiter.queue_depth == 0
+
+    # медленная группа: оценка ожидания сразу больше max_wait
+    limiter.release(10)
+    await limiter.acquire()
+    with pytest.raises(AdmissionRejected) as exc:
+        await limiter.acquire()
+    assert exc.value.reason == "deadline"
+
+
+async def test_limiter_serves_high_priority_first():
+    limiter = AdmissionLimiter("test", concurrency=1, max_queue=10, max_wait=1)
+    await limiter.acquire()
+    order = []
+
+    async def request(name, priority):
+        await limiter.acquire(priority)
+        order.append(name)
+
+    low = asyncio.create_task(request("low", Priority.low))
+    await asyncio.sleep(0)
+    high = asyncio.create_task(request("high", Priority.high))
+    await asyncio.sleep(0)
+
+    limiter.release(0.01)
+    await asyncio.sleep(0)
+    limiter.release(0.01)
+    await asyncio.gather(low, high)
+
+    assert order == ["high", "low"]
+
+
+def test_parse_admission_limits():
+    limiters = parse_admission_limits("auth=8:64:2, transports=32:256:0.5")
+
+    assert limiters["auth"].concurrency == 8
+    assert limiters["transports"].max_queue == 256
+    assert limiters["transports"].max_wait == 0.5
+    assert parse_admission_limits("") == {}
+
+
+################################################################
+# Test AdmissionMiddleware
+################################################################
+
+def test_middleware_returns_503_with_retry_after():
+    limiter = AdmissionLimiter("transports", concurrency=1, max_queue=0, max_wait=1)
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, limiters={"transports": limiter})
+
+    @app.get("/transports/")
+    async def transports():
+        return {"ok": True}
+
+    @app.get("/users/me")
+    async def me():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/transports/").status_code == 200
+
+    # слот занят и очередь нулевая
+    limiter._active = 1
+    response = client.get("/transports/")
+    assert response.status_code == 503
+    assert response.json()["error"] == "OVERLOADED"
+    assert int(response.headers["retry-after"]) >= 1
+    # группы без лимитера не затрагиваются
+    assert client.get("/users/me").status_code == 200
@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+from src.teltonika_http.util.cache import TTLCache, MISSING
+
+
+################################################################
+# Test TTLCache
+################################################################
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+
+def test_expired_entry_is_a_miss():
+    cache = TTLCache(maxsize=2, ttl=10)
+    with patch("src.teltonika_http.util.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("src.teltonika_http.util.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is MISSING
+
+    assert len(cache) == 0
+    assert cache.misses == 1
+
+
+def test_none_is_cached():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", None)
+
+    assert cache.get("a") is None
+    assert cache.stats()["hit_ratio"] == 1.0
+
+
+def test_peek_does_not_count_or_reorder():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.peek("a") == 1
+    assert cache.peek("x") is MISSING
+    cache.set("c", 3)
+
+    assert cache.peek("a") is MISSING
+    assert cache.hits == 0 and cache.misses == 0
+
+################################################################
@@ -0,0 +1,24 @@
+from src.teltonika_http.util.etag import make_etag, etag_matches
+
+
+################################################################
+# Test make_etag / etag_matches
+################################################################
+
+def test_make_etag_depends_on_parts():
+    assert make_etag("transports", 1, 10) == make_etag("transports", 1, 10)
+    assert make_etag("transports", 1, 10) != make_etag("transports", 2, 10)
+
+
+def test_etag_matches():
+    etag = make_etag("transport", 1, "123")
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches("*", etag, allow_wildcard=False)
+    assert etag_matches(f'*, {etag}', etag, allow_wildcard=False)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+################################################################
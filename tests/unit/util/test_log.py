@@ -0,0 +1,84 @@
+import json
+import logging
+import queue
+
+from src.teltonika_http.util.log import (
+    JsonFormatter, LazyQueueHandler, RateLimitFilter, SampleFilter, parse_logger_values
+)
+from src.teltonika_http.util.middlewares import request_id_var
+
+
+def make_record(msg="hello %s", args=("world",), level=logging.INFO, exc_info=None):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, exc_info)
+
+
+################################################################
+# Test LazyQueueHandler
+################################################################
+
+def test_queue_handler_merges_args_and_request_id():
+    q = queue.SimpleQueue()
+    handler = LazyQueueHandler(q)
+    token = request_id_var.set("rid-1")
+    try:
+        handler.emit(make_record())
+    finally:
+        request_id_var.reset(token)
+
+    record = q.get_nowait()
+    assert record.msg == "hello world"
+    assert record.args is None
+    assert record.request_id == "rid-1"
+
+
+def test_queue_handler_drops_traceback():
+    q = queue.SimpleQueue()
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        import sys
+        LazyQueueHandler(q).emit(make_record(exc_info=sys.exc_info()))
+
+    record = q.get_nowait()
+    assert record.exc_info is None
+    assert "RuntimeError: boom" in record.exc_text
+
+
+################################################################
+# Test JsonFormatter
+################################################################
+
+def test_json_formatter():
+    record = make_record()
+    record.request_id = "rid-2"
+
+    payload = json.loads(JsonFormatter().format(record))
+
+    assert payload["message"] == "hello world"
+    assert payload["level"] == "INFO"
+    assert payload["request_id"] == "rid-2"
+
+
+################################################################
+# Test filters
+################################################################
+
+def test_rate_limit_filter_drops_over_burst_but_keeps_warnings():
+    flt = RateLimitFilter(rate=0.001, burst=2)
+
+    passed = [flt.filter(make_record()) for _ in range(5)]
+
+    assert passed == [True, True, False, False, False]
+    assert flt.dropped == 3
+    assert flt.filter(make_record(level=logging.WARNING))
+
+
+def test_sample_filter_bounds():
+    assert not SampleFilter(0).filter(make_record())
+    assert SampleFilter(1).filter(make_record())
+    assert SampleFilter(0).filter(make_record(level=logging.ERROR))
+
+
+def test_parse_logger_values():
+    assert parse_logger_values("access=0.1, AuthService=50,") == {"access": 0.1, "AuthService": 50.0}
+    assert parse_logger_values("") == {}
@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from src.teltonika_http.util.metrics import MetricsMiddleware, route_group
+
+
+################################################################
+# Test route_group
+################################################################
+
+def test_route_group():
+    assert route_group("/transports/by-imei/123") == "transports"
+    assert route_group("/token") == "token"
+    assert route_group("/unknown/path") == "other"
+    assert route_group("/") == "other"
+
+
+################################################################
+# Test MetricsMiddleware
+################################################################
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/transports/by-imei/{imei}")
+    async def by_imei(imei: str):
+        return {"imei": imei}
+
+    labels = {"method": "GET", "route": "/transports/by-imei/{imei}", "status": "200"}
+    before = REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+    client = TestClient(app)
+    client.get("/transports/by-imei/1")
+    client.get("/transports/by-imei/2")
+
+    assert REGISTRY.get_sample_value("http_requests_total", labels) == before + 2
+    assert REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count",
+        {"method": "GET", "route": "/transports/by-imei/{imei}"},
+    ) >= 2
+
+
+def test_middleware_unmatched_route():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+    TestClient(app).get("/nope")
+
+    assert REGISTRY.get_sample_value("http_requests_total", labels) == before + 1
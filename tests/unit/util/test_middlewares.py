@@ -0,0 +1,78 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.teltonika_http.util.middlewares import (
+    AccessLogMiddleware, ErrorMiddleware, RequestIdMiddleware, TimingMiddleware, get_request_id
+)
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ErrorMiddleware)
+    app.add_middleware(TimingMiddleware)
+    app.add_middleware(AccessLogMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/ok")
+    async def ok():
+        return {"request_id": get_request_id()}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b"a"
+            yield b"b"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+################################################################
+# Test RequestIdMiddleware / TimingMiddleware
+################################################################
+
+def test_request_id_generated_and_returned():
+    response = TestClient(make_app()).get("/ok")
+
+    request_id = response.headers["x-request-id"]
+    assert len(request_id) == 32
+    assert response.json() == {"request_id": request_id}
+    assert float(response.headers["x-process-time"]) >= 0
+
+
+def test_request_id_propagated():
+    response = TestClient(make_app()).get("/ok", headers={"X-Request-ID": "abc-123"})
+
+    assert response.headers["x-request-id"] == "abc-123"
+    assert response.json() == {"request_id": "abc-123"}
+
+
+################################################################
+# Test ErrorMiddleware / AccessLogMiddleware
+################################################################
+
+def test_unhandled_error_returns_json_500(caplog):
+    client = TestClient(make_app())
+
+    with caplog.at_level(logging.INFO, logger="access"):
+        response = client.get("/boom")
+
+    assert response.status_code == 500
+    assert response.json() == {"error": "INTERNAL_ERROR", "message": "Internal server error"}
+    assert "x-request-id" in response.headers
+    access = [r for r in caplog.records if r.name == "access"]
+    assert access and "GET /boom 500" in access[-1].getMessage()
+
+
+def test_streaming_passes_through():
+    response = TestClient(make_app()).get("/stream")
+
+    assert response.status_code == 200
+    assert response.text == "ab"